@@ -0,0 +1,37 @@
+import os
+
+import django
+
+
+def setup():
+    """Настраивает Django для запуска бенчмарков из каталога ya_news."""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yanews.settings')
+    django.setup()
+
+
+def create_database(name=None):
+    """
+    Создаёт отдельную тестовую базу, чтобы не трогать рабочую.
+
+    По умолчанию SQLite создаёт её в памяти; name задаёт файл базы.
+    Возвращает функцию, которая удаляет базу после замеров.
+    """
+    from django.conf import settings
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+
+    try:
+        setup_test_environment()
+    except RuntimeError:
+        # Окружение уже настроено предыдущим вызовом.
+        pass
+    settings.ALLOWED_HOSTS = ['*']
+    old_name = connection.settings_dict['NAME']
+    if name is not None:
+        connection.settings_dict['TEST']['NAME'] = name
+    connection.creation.create_test_db(verbosity=0)
+
+    def destroy():
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    return destroy
@@ -0,0 +1,170 @@
+"""
+Одновременные медленные клиенты: WSGI с пулом потоков против ASGI с
+асинхронными страницами.
+
+Каждый клиент тратит --client-delay секунд на отправку запроса. В WSGI
+всё это время занят поток сервера, в ASGI ждёт цикл событий, а потоки
+нужны только для работы с базой.
+
+Запуск из каталога ya_news:
+    python -m benchmarks.asgi --clients 10 100 1000
+"""
+import argparse
+import asyncio
+import importlib
+import random
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from benchmarks import create_database, setup
+
+setup()
+
+from django.conf import settings  # noqa: E402
+from django.core.asgi import get_asgi_application  # noqa: E402
+from django.core.wsgi import get_wsgi_application  # noqa: E402
+from django.urls import clear_url_caches, reverse  # noqa: E402
+
+from benchmarks.seed import seed  # noqa: E402
+from news.models import News  # noqa: E402
+
+HOST = '127.0.0.1'
+
+
+def use_async_views(enabled):
+    """Переключает маршруты между синхронными и асинхронными страницами."""
+    import news.urls
+    import yanews.urls
+
+    settings.NEWS_ASYNC_VIEWS = enabled
+    importlib.reload(news.urls)
+    importlib.reload(yanews.urls)
+    clear_url_caches()
+
+
+def wsgi_request(application, path, delay, started):
+    # Пока поток читает медленного клиента, он не обслуживает других.
+    time.sleep(delay)
+    environ = {
+        'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': '',
+        'SERVER_NAME': HOST, 'SERVER_PORT': '80', 'HTTP_HOST': HOST,
+        'SERVER_PROTOCOL': 'HTTP/1.1', 'REMOTE_ADDR': HOST,
+        'wsgi.input': BytesIO(), 'wsgi.errors': sys.stderr,
+        'wsgi.url_scheme': 'http', 'wsgi.version': (1, 0),
+        'wsgi.multithread': True, 'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    statuses = []
+    result = application(
+        environ, lambda status, headers, exc_info=None: statuses.append(
+            int(status.split()[0])
+        )
+    )
+    b''.join(result)
+    result.close()
+    return statuses[0], time.perf_counter() - started
+
+
+async def asgi_request(application, path, delay):
+    started = time.perf_counter()
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+        'method': 'GET', 'scheme': 'http', 'path': path,
+        'raw_path': path.encode(), 'query_string': b'', 'root_path': '',
+        'headers': [(b'host', HOST.encode())],
+        'client': (HOST, 0), 'server': (HOST, 80),
+    }
+    received = False
+    statuses = []
+
+    async def receive():
+        nonlocal received
+        if received:
+            await asyncio.Future()
+        received = True
+        await asyncio.sleep(delay)
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            statuses.append(message['status'])
+
+    await application(scope, receive, send)
+    return statuses[0], time.perf_counter() - started
+
+
+def run_wsgi(paths, delay, threads):
+    use_async_views(False)
+    application = get_wsgi_application()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(threads) as executor:
+        return list(executor.map(
+            lambda path: wsgi_request(application, path, delay, started),
+            paths,
+        ))
+
+
+def run_asgi(paths, delay):
+    use_async_views(True)
+    application = get_asgi_application()
+
+    async def main():
+        return await asyncio.gather(*(
+            asgi_request(application, path, delay) for path in paths
+        ))
+
+    return asyncio.run(main())
+
+
+def summarize(name, clients, results, elapsed):
+    timings = sorted(seconds * 1000 for _, seconds in results)
+    errors = sum(status >= 500 for status, _ in results)
+    print(
+        f'{clients:>8} {name:>5} {elapsed:>8.2f} {clients / elapsed:>10.1f} '
+        f'{statistics.median(timings):>9.0f} '
+        f'{timings[int(len(timings) * 0.95) - 1]:>9.0f} {errors:>7}'
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        '--clients', type=int, nargs='+', default=(10, 100, 1000)
+    )
+    parser.add_argument('--client-delay', type=float, default=0.5)
+    parser.add_argument(
+        '--threads', type=int, default=settings.NEWS_ASYNC_POOL_SIZE,
+        help='Потоков WSGI-сервера; для честности равно пулу ASGI.',
+    )
+    parser.add_argument('--size', type=int, default=1000)
+    args = parser.parse_args()
+    destroy = create_database()
+    try:
+        seed(args.size)
+        rng = random.Random(0)
+        news_ids = list(News.objects.values_list('pk', flat=True)[:100])
+        print(
+            f'{"клиентов":>8} {"":>5} {"с":>8} {"в секунду":>10} '
+            f'{"p50, мс":>9} {"p95, мс":>9} {"ошибок":>7}'
+        )
+        for clients in args.clients:
+            paths = [
+                reverse('news:detail', args=(rng.choice(news_ids),))
+                if index % 2 else reverse('news:home')
+                for index in range(clients)
+            ]
+            started = time.perf_counter()
+            results = run_wsgi(paths, args.client_delay, args.threads)
+            summarize('WSGI', clients, results, time.perf_counter() - started)
+            started = time.perf_counter()
+            results = run_asgi(paths, args.client_delay)
+            summarize('ASGI', clients, results, time.perf_counter() - started)
+    finally:
+        destroy()
+
+
+if __name__ == '__main__':
+    main()
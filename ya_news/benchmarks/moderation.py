@@ -0,0 +1,73 @@
+"""
+Сравнение проверки запрещённых слов: цикл по словарю против автомата.
+
+Запуск из каталога ya_news:
+    python -m benchmarks.moderation
+"""
+import argparse
+import random
+import string
+import timeit
+
+from benchmarks import setup
+
+setup()
+
+from news.moderation import WordMatcher  # noqa: E402
+
+ALPHABET = 'абвгдеёжзийклмнопрстуфхцчшщъыьэюя'
+
+
+def loop_search(words, text):
+    """Прежняя реализация CommentForm.clean_text."""
+    for word in words:
+        if word in text:
+            return True
+    return False
+
+
+def make_words(count, rng):
+    return [
+        ''.join(rng.choices(ALPHABET, k=rng.randint(5, 10)))
+        for _ in range(count)
+    ]
+
+
+def make_text(length, rng):
+    return ''.join(
+        rng.choices(ALPHABET + string.whitespace[:1] * 6, k=length)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        '--sizes', type=int, nargs='+', default=(2, 100, 1000, 5000)
+    )
+    parser.add_argument('--text-length', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+    rng = random.Random(0)
+    text = make_text(args.text_length, rng)
+    print(
+        f'{"слов":>6} {"цикл, мкс":>12} {"автомат, мкс":>14} '
+        f'{"ускорение":>10}'
+    )
+    for size in args.sizes:
+        words = make_words(size, rng)
+        matcher = WordMatcher(words)
+        assert matcher.search(text) == loop_search(words, text)
+        loop_time = timeit.timeit(
+            lambda: loop_search(words, text), number=args.repeat
+        ) / args.repeat * 1e6
+        matcher_time = timeit.timeit(
+            lambda: matcher.search(text), number=args.repeat
+        ) / args.repeat * 1e6
+        print(
+            f'{size:>6} {loop_time:>12.1f} {matcher_time:>14.1f} '
+            f'{loop_time / matcher_time:>9.1f}x'
+        )
+
+
+if __name__ == '__main__':
+    main()
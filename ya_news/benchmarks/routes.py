@@ -0,0 +1,164 @@
+"""
+Время ответа и количество SQL-запросов для всех страниц news.urls
+на базах разного размера.
+
+Запуск из каталога ya_news:
+    python -m benchmarks.routes --sizes 1000 10000 --output results.json
+
+Сравнить два прогона:
+    python -m benchmarks.compare old.json new.json
+"""
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import time
+from datetime import datetime
+
+from benchmarks import create_database, setup
+
+setup()
+
+from django.core.cache import cache  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.urls import get_resolver, reverse  # noqa: E402
+
+from benchmarks.seed import seed  # noqa: E402
+from news.middleware import capture_reports  # noqa: E402
+
+NAMESPACE = 'news'
+ROUTE_KWARGS = {
+    'detail': lambda data: {'pk': data['news'].pk},
+    # Под WSGI события отдаются коротким опросом, его и замеряем.
+    'events': lambda data: {'pk': data['news'].pk},
+    'edit': lambda data: {'pk': data['comment'].pk},
+    'delete': lambda data: {'pk': data['comment'].pk},
+}
+ROUTE_QUERY = {
+    'search': {'q': 'погода спорт'},
+}
+# Маршруты, которые нельзя честно замерить GET-запросом, и причина.
+SKIPPED = {}
+
+
+def named_routes():
+    """Имена всех маршрутов приложения и именованные параметры."""
+    resolver = get_resolver()
+    routes = []
+    for name, variants in resolver.namespace_dict[NAMESPACE][1]\
+            .reverse_dict.lists():
+        if isinstance(name, str):
+            routes.append((name, variants[0][0][0][1]))
+    return sorted(routes)
+
+
+def percentile(values, share):
+    values = sorted(values)
+    return values[min(int(len(values) * share), len(values) - 1)]
+
+
+def measure(client, url, params, repeat, clear_cache):
+    timings = []
+    queries = None
+    for _ in range(repeat):
+        if clear_cache:
+            cache.clear()
+        with capture_reports() as reports:
+            started = time.perf_counter()
+            response = client.get(url, params)
+            timings.append((time.perf_counter() - started) * 1000)
+        queries = reports[-1]['count'] if reports else None
+    return {
+        'status': response.status_code,
+        'queries': queries,
+        'mean_ms': statistics.mean(timings),
+        'median_ms': statistics.median(timings),
+        'p95_ms': percentile(timings, 0.95),
+    }
+
+
+def run_size(size, repeat):
+    destroy = create_database()
+    try:
+        started = time.perf_counter()
+        data = seed(size)
+        elapsed = time.perf_counter() - started
+        print(f'{size}: база наполнена за {elapsed:.1f} с')
+        author_client = Client()
+        author_client.force_login(data['author'])
+        clients = (
+            ('anonymous', Client(), True),
+            ('author', author_client, False),
+        )
+        results = []
+        for name, params in named_routes():
+            if name in SKIPPED:
+                print(f'  {NAMESPACE}:{name}: пропущено, {SKIPPED[name]}')
+                continue
+            make_kwargs = ROUTE_KWARGS.get(name)
+            if params and make_kwargs is None:
+                raise LookupError(
+                    f'Для {NAMESPACE}:{name} нет ни параметров в '
+                    'ROUTE_KWARGS, ни причины в SKIPPED.'
+                )
+            url = reverse(
+                f'{NAMESPACE}:{name}',
+                kwargs=make_kwargs(data) if make_kwargs else None
+            )
+            for client_name, client, clear_cache in clients:
+                result = measure(
+                    client, url, ROUTE_QUERY.get(name), repeat, clear_cache
+                )
+                result.update(
+                    size=size, route=f'{NAMESPACE}:{name}',
+                    client=client_name,
+                )
+                results.append(result)
+                print(
+                    f'  {result["route"]:<14} {client_name:<10} '
+                    f'{result["status"]} {result["median_ms"]:8.1f} мс '
+                    f'{result["queries"]} запросов'
+                )
+        return results
+    finally:
+        destroy()
+
+
+def current_commit():
+    try:
+        return subprocess.run(
+            ('git', 'rev-parse', 'HEAD'), capture_output=True, text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=(1000,))
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--output', default='benchmark-results.json')
+    args = parser.parse_args()
+    results = []
+    for size in args.sizes:
+        results.extend(run_size(size, args.repeat))
+    with open(args.output, 'w', encoding='utf-8') as output:
+        json.dump({
+            'project': 'ya_news',
+            'commit': current_commit(),
+            'created': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'repeat': args.repeat,
+            'skipped': {
+                f'{NAMESPACE}:{name}': reason
+                for name, reason in SKIPPED.items()
+            },
+            'results': results,
+        }, output, ensure_ascii=False, indent=2)
+    print(f'Результаты записаны в {args.output}')
+
+
+if __name__ == '__main__':
+    main()
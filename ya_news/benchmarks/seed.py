@@ -0,0 +1,24 @@
+"""Наполнение базы для бенчмарков заданным количеством записей."""
+from django.contrib.auth import get_user_model
+
+from news.models import Comment, News
+from news.seeding import USER_PREFIX, seed_news
+
+
+def seed(size, seed=0):
+    """
+    Создаёт size новостей и size комментариев через news.seeding.
+
+    Возвращает словарь с объектами, по которым строятся адреса страниц:
+    новостью с длинной лентой комментариев и комментарием её читателя.
+    """
+    hot_id = seed_news(size, size, max(size // 100, 1), seed=seed)
+    author = get_user_model().objects.get(username=f'{USER_PREFIX}0')
+    comment = Comment.objects.filter(author=author).first() or (
+        Comment.objects.create(news_id=hot_id, author=author, text='Текст')
+    )
+    return {
+        'author': author,
+        'news': News.objects.get(pk=hot_id),
+        'comment': comment,
+    }
@@ -0,0 +1,84 @@
+"""
+Пользователь запроса из кеша.
+
+CachedModelBackend отличается от ModelBackend только тем, что берёт
+пользователя сессии из кеша; сессии хранятся в бэкенде cached_db.
+Пользователи лежат в том же кеше, что и сессии, — в файловом кеше
+SESSION_CACHE_ALIAS, общем для всех процессов сервера: выход, смена
+пароля или блокировка в одном процессе видны остальным сразу.
+Остальное делает django.contrib.auth: AuthenticationMiddleware
+загружает пользователя лениво, get_user сверяет хеш сессии, поэтому
+после смены пароля другие сессии завершаются, а неактивного
+пользователя бэкенд не пускает и из кеша.
+
+Ключ пользователя включает его поколение, которое меняется при каждом
+сохранении и удалении пользователя. QuerySet.update и сырой SQL
+сигналов не вызывают: после них пользователь из кеша действует ещё до
+AUTH_USER_CACHE_TIMEOUT секунд, так что после таких изменений нужно
+вызвать invalidate.
+
+Сессии, созданные до появления кеша, ссылаются на ModelBackend: он
+остаётся в AUTHENTICATION_BACKENDS, и такие сессии работают без кеша
+до следующего входа.
+"""
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+
+def _cache():
+    return caches[settings.SESSION_CACHE_ALIAS]
+
+
+def _generation_key(user_id):
+    return f'auth:generation:{user_id}'
+
+
+def get_generation(user_id):
+    cache = _cache()
+    generation = cache.get(_generation_key(user_id))
+    if generation is None:
+        generation = time.time_ns()
+        cache.add(_generation_key(user_id), generation, None)
+        generation = cache.get(_generation_key(user_id), generation)
+    return generation
+
+
+def invalidate(*user_ids):
+    """Сбрасывает закешированных пользователей."""
+    _cache().set_many(
+        {_generation_key(user_id): time.time_ns() for user_id in user_ids},
+        None,
+    )
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend с пользователем сессии из кеша."""
+
+    def get_user(self, user_id):
+        cache = _cache()
+        key = f'auth:user:{user_id}:{get_generation(user_id)}'
+        user = cache.get(key)
+        if user is None:
+            try:
+                user = get_user_model()._default_manager.get(pk=user_id)
+            except get_user_model().DoesNotExist:
+                return None
+            cache.set(key, user, settings.AUTH_USER_CACHE_TIMEOUT)
+        return user if self.user_can_authenticate(user) else None
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def invalidate_cached_user(sender, instance, using, **kwargs):
+    """Сбрасывает кеш пользователя сразу и ещё раз после фиксации."""
+    invalidate(instance.pk)
+    # Между сбросом и фиксацией другой запрос мог положить в кеш прежнюю
+    # строку пользователя.
+    transaction.on_commit(lambda: invalidate(instance.pk), using=using)
@@ -0,0 +1,54 @@
+"""
+Кеш страниц для анонимных посетителей.
+
+Ключ страницы включает поколение её области: главной страницы или
+страницы конкретной новости. Сброс области меняет поколение, и все её
+страницы, в том числе с разными курсорами, перестают находиться в кеше.
+"""
+import time
+from hashlib import md5
+
+from django.core.cache import cache
+
+HOME = 'home'
+
+
+def detail_scope(news_id):
+    return f'detail:{news_id}'
+
+
+def _generation_key(scope):
+    return f'news:generation:{scope}'
+
+
+def get_generation(scope):
+    generation = cache.get(_generation_key(scope))
+    if generation is None:
+        generation = time.time_ns()
+        cache.add(_generation_key(scope), generation, None)
+        generation = cache.get(_generation_key(scope), generation)
+    return generation
+
+
+def invalidate(*scopes):
+    """Сбрасывает закешированные страницы указанных областей."""
+    cache.set_many(
+        {_generation_key(scope): time.time_ns() for scope in scopes}, None
+    )
+
+
+def invalidate_news(*news_ids):
+    """Сбрасывает главную страницу и страницы указанных новостей."""
+    invalidate(HOME, *(detail_scope(news_id) for news_id in news_ids))
+
+
+def page_key(scope, request, params=()):
+    """
+    Ключ страницы в кеше.
+
+    Из строки запроса в ключ входят только params: иначе любой лишний
+    параметр, например метка рекламной кампании, заводил бы новую запись.
+    """
+    query = [(name, request.GET.get(name)) for name in params]
+    path = md5(repr((request.path, query)).encode()).hexdigest()
+    return f'news:page:{scope}:{get_generation(scope)}:{path}'
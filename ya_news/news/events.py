@@ -0,0 +1,268 @@
+"""
+Поток новых комментариев к новости в формате Server-Sent Events.
+
+Брокер внутри процесса будит подписчиков новости, когда к ней
+добавлены комментарии; сами комментарии всегда читаются из базы с id
+больше последнего отправленного. Поэтому переподключение с заголовком
+Last-Event-ID продолжает поток с нужного места, а комментарии из других
+процессов приходят не позже чем через settings.NEWS_EVENTS_POLL_INTERVAL.
+
+Поток обслуживает asgi_app: Django 3.2 перебирает содержимое
+StreamingHttpResponse прямо в цикле событий, поэтому долгий поток
+подключается в yanews.asgi в обход Django. Страница новости открывает
+поток только под ASGI. При запуске через WSGI представление news_events
+отвечает сразу тем, что накопилось, и не держит поток сервера: долгие
+соединения нескольких читателей заняли бы весь пул потоков.
+"""
+import asyncio
+import json
+import threading
+from collections import defaultdict
+from urllib.parse import parse_qs
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.http import Http404, HttpResponse
+from django.urls import Resolver404, resolve
+
+from .models import Comment, News
+
+EVENT_NAME = 'comment'
+
+_subscribers = defaultdict(set)
+_subscribers_lock = threading.Lock()
+
+
+class Subscription:
+    """Подписка на новые комментарии одной новости."""
+
+    def __init__(self, news_id, loop=None):
+        self.news_id = news_id
+        self.loop = loop
+        if loop is None:
+            self.event = threading.Event()
+        else:
+            self.event = asyncio.Event()
+
+    def notify(self):
+        if self.loop is None:
+            self.event.set()
+        else:
+            self.loop.call_soon_threadsafe(self.event.set)
+
+    def wait(self, timeout):
+        """Ждёт уведомления не дольше timeout секунд (синхронно)."""
+        notified = self.event.wait(timeout)
+        self.event.clear()
+        return notified
+
+    async def wait_async(self, timeout, cancel=None):
+        """
+        Ждёт уведомления не дольше timeout секунд (асинхронно).
+
+        Ожидание прерывается раньше, если установлено событие cancel,
+        например отключение клиента.
+        """
+        waiters = [asyncio.ensure_future(self.event.wait())]
+        if cancel is not None:
+            waiters.append(asyncio.ensure_future(cancel.wait()))
+        _, pending = await asyncio.wait(
+            waiters, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+        )
+        for waiter in pending:
+            waiter.cancel()
+        notified = self.event.is_set()
+        self.event.clear()
+        return notified
+
+    def __enter__(self):
+        with _subscribers_lock:
+            _subscribers[self.news_id].add(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        with _subscribers_lock:
+            _subscribers[self.news_id].discard(self)
+            if not _subscribers[self.news_id]:
+                del _subscribers[self.news_id]
+
+
+def publish(*news_ids):
+    """Будит подписчиков новостей, к которым добавлены комментарии."""
+    with _subscribers_lock:
+        subscriptions = [
+            subscription
+            for news_id in news_ids
+            for subscription in _subscribers.get(news_id, ())
+        ]
+    for subscription in subscriptions:
+        subscription.notify()
+
+
+def start_id(news_id, last_event_id):
+    """
+    С какого id продолжать поток.
+
+    Без Last-Event-ID клиент получает только комментарии, появившиеся
+    после подключения, а не всю ленту заново.
+    """
+    if not News.objects.filter(pk=news_id).exists():
+        raise Http404
+    if last_event_id is not None:
+        try:
+            return int(last_event_id)
+        except ValueError:
+            pass
+    return Comment.objects.filter(news_id=news_id).order_by(
+        '-id'
+    ).values_list('id', flat=True).first() or 0
+
+
+def comments_after(news_id, last_id):
+    return list(
+        Comment.objects.filter(news_id=news_id, id__gt=last_id).order_by(
+            'id'
+        ).values(
+            'id', 'text', 'created', 'author__username'
+        )[:settings.NEWS_EVENTS_BATCH_SIZE]
+    )
+
+
+def format_event(comment):
+    data = json.dumps({
+        'id': comment['id'],
+        'author': comment['author__username'],
+        'text': comment['text'],
+        'created': comment['created'].isoformat(),
+    }, ensure_ascii=False)
+    return (
+        f'id: {comment["id"]}\nevent: {EVENT_NAME}\ndata: {data}\n\n'
+    ).encode()
+
+
+def retry_line():
+    return f'retry: {settings.NEWS_EVENTS_RETRY}\n\n'.encode()
+
+
+def _last_event_id(request):
+    return request.headers.get('Last-Event-ID') or request.GET.get('last_id')
+
+
+def news_events(request, pk):
+    """
+    Новые комментарии для синхронного развёртывания.
+
+    Ответ отдаётся сразу, без ожидания: браузер переподключается через
+    settings.NEWS_EVENTS_RETRY миллисекунд с Last-Event-ID.
+    """
+    last_id = start_id(pk, _last_event_id(request))
+    response = HttpResponse(
+        retry_line() + b''.join(
+            map(format_event, comments_after(pk, last_id))
+        ),
+        content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    return response
+
+
+async def _in_pool(func, *args):
+    from .views import get_executor
+
+    def call():
+        close_old_connections()
+        try:
+            return func(*args)
+        finally:
+            close_old_connections()
+
+    return await asyncio.get_running_loop().run_in_executor(
+        get_executor(), call
+    )
+
+
+def _headers(scope):
+    return {
+        name.decode('latin-1').lower(): value.decode('latin-1')
+        for name, value in scope['headers']
+    }
+
+
+def _query_last_id(scope):
+    values = parse_qs(scope.get('query_string', b'').decode()).get('last_id')
+    return values[0] if values else None
+
+
+async def _serve(scope, receive, send, news_id):
+    last_event_id = (
+        _headers(scope).get('last-event-id') or _query_last_id(scope)
+    )
+    try:
+        last_id = await _in_pool(start_id, news_id, last_event_id)
+    except Http404:
+        await send({'type': 'http.response.start', 'status': 404,
+                    'headers': [(b'content-type', b'text/plain')]})
+        await send({'type': 'http.response.body', 'body': b'Not Found'})
+        return
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': [
+            (b'content-type', b'text/event-stream; charset=utf-8'),
+            (b'cache-control', b'no-cache'),
+            (b'x-accel-buffering', b'no'),
+        ],
+    })
+    disconnected = asyncio.Event()
+
+    async def watch_disconnect():
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+        disconnected.set()
+
+    watcher = asyncio.ensure_future(watch_disconnect())
+    loop = asyncio.get_running_loop()
+    try:
+        with Subscription(news_id, loop) as subscription:
+            await send({'type': 'http.response.body', 'body': retry_line(),
+                        'more_body': True})
+            while not disconnected.is_set():
+                comments = await _in_pool(comments_after, news_id, last_id)
+                if comments:
+                    last_id = comments[-1]['id']
+                    body = b''.join(map(format_event, comments))
+                elif not await subscription.wait_async(
+                        settings.NEWS_EVENTS_POLL_INTERVAL, disconnected):
+                    if disconnected.is_set():
+                        break
+                    body = b': ping\n\n'
+                else:
+                    continue
+                await send({'type': 'http.response.body', 'body': body,
+                            'more_body': True})
+    finally:
+        watcher.cancel()
+
+
+def asgi_app(django_application):
+    """
+    Оборачивает ASGI-приложение Django.
+
+    Поток news:events отдаётся напрямую, без ограничения длительности;
+    остальные запросы обрабатывает Django.
+    """
+    async def application(scope, receive, send):
+        if scope['type'] == 'http':
+            path = scope['path']
+            root_path = scope.get('root_path', '')
+            if root_path and path.startswith(root_path):
+                path = path[len(root_path):]
+            try:
+                match = resolve(path)
+            except Resolver404:
+                match = None
+            if match is not None and match.view_name == 'news:events':
+                return await _serve(scope, receive, send, match.kwargs['pk'])
+        return await django_application(scope, receive, send)
+
+    return application
@@ -0,0 +1,367 @@
+"""
+Отложенная пакетная запись комментариев.
+
+Принятые комментарии дописываются в журнал на диске, а фоновый поток
+или команда flush_comments переносят их в базу пачками INSERT. Время
+создания комментария — время его приёма, а не переноса, так что
+задержка очереди не сдвигает порядок комментариев.
+Доставка «как минимум один раз»: при падении между записью пакета в базу
+и удалением файла пакет будет записан повторно. Каждый файл пакета
+пишется в базу одной транзакцией, так что повтор не дублирует часть
+пакета, уже записанную в прошлый раз. Пакет, который переносится,
+заблокирован flock, и recover возвращает в очередь только брошенные
+пакеты. Счётчики переноса хранятся в каталоге очереди и общие для всех
+процессов.
+"""
+import io
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import close_old_connections, connection, transaction
+
+from . import events
+from .cache import invalidate_news
+from .models import Comment, News
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+ACTIVE = 'active.log'
+READY = '.ready'
+FLUSHING = '.flushing'
+STATS = 'stats.json'
+
+logger = logging.getLogger(__name__)
+
+
+def _lock(fd):
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+
+
+def _try_lock(fd):
+    """Блокирует файл, если его не держит другой процесс."""
+    if fcntl is None:
+        return True
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        return False
+    return True
+
+
+def _accepted_at(timestamp):
+    return datetime.fromtimestamp(timestamp, timezone.utc)
+
+
+class CommentQueue:
+    """Журнал принятых комментариев и их пакетный перенос в базу."""
+
+    def __init__(self, directory, batch_size, flush_interval):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.active_path = self.directory / ACTIVE
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._pending = 0
+        self._pending_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._worker = None
+
+    def put(self, news_id, author_id, text):
+        """Надёжно сохраняет комментарий в журнал."""
+        record = {
+            'news': news_id,
+            'author': author_id,
+            'text': text,
+            'accepted': time.time(),
+        }
+        self._append(
+            (json.dumps(record, ensure_ascii=False) + '\n').encode()
+        )
+        with self._pending_lock:
+            self._pending += 1
+            full = self._pending >= self.batch_size
+        if full:
+            self._wakeup.set()
+
+    def _append(self, data):
+        while True:
+            fd = os.open(
+                self.active_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT,
+                0o644
+            )
+            try:
+                _lock(fd)
+                try:
+                    current = os.stat(self.active_path).st_ino
+                except FileNotFoundError:
+                    continue
+                if current != os.fstat(fd).st_ino:
+                    # Файл успели запечатать, пишем в новый.
+                    continue
+                os.write(fd, data)
+                os.fsync(fd)
+                return
+            finally:
+                os.close(fd)
+
+    def _seal(self):
+        """Переименовывает текущий журнал в готовый к переносу пакет."""
+        try:
+            fd = os.open(self.active_path, os.O_RDONLY)
+        except FileNotFoundError:
+            return
+        try:
+            _lock(fd)
+            try:
+                current = os.stat(self.active_path).st_ino
+            except FileNotFoundError:
+                current = None
+            # Пока ждали блокировку, журнал мог запечатать другой процесс:
+            # тогда под этим именем уже новый файл, и он не заблокирован.
+            if current == os.fstat(fd).st_ino and os.fstat(fd).st_size:
+                os.rename(
+                    self.active_path,
+                    self.directory / f'{time.time_ns()}-{os.getpid()}{READY}'
+                )
+        finally:
+            os.close(fd)
+        with self._pending_lock:
+            self._pending = 0
+
+    def flush(self):
+        """Переносит все накопленные комментарии в базу."""
+        with self._flush_lock:
+            self._seal()
+            flushed = 0
+            lag = 0.0
+            started = time.monotonic()
+            try:
+                for path in sorted(self.directory.glob(f'*{READY}')):
+                    loaded, accepted = self._flush_file(path)
+                    flushed += loaded
+                    if loaded:
+                        lag = max(lag, time.time() - accepted)
+            finally:
+                if flushed:
+                    self._record(flushed, time.monotonic() - started, lag)
+            return flushed
+
+    def _flush_file(self, path):
+        """
+        Забирает пакет и переносит его в базу.
+
+        Пакет заблокирован, пока переносится: recover не вернёт его в
+        очередь, а другой процесс не заберёт повторно.
+        """
+        claimed = path.with_suffix(FLUSHING)
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except FileNotFoundError:
+            # Пакет забрал другой процесс.
+            return 0, None
+        try:
+            if not _try_lock(fd):
+                return 0, None
+            try:
+                os.rename(path, claimed)
+            except FileNotFoundError:
+                # Другой процесс уже перенёс пакет.
+                return 0, None
+            try:
+                with open(fd, encoding='utf-8', closefd=False) as journal:
+                    result = self._load(journal)
+            except Exception:
+                # Например, «database is locked»: пакет вернётся в
+                # очередь и будет перенесён при следующем вызове.
+                os.rename(claimed, path)
+                raise
+            claimed.unlink()
+            return result
+        finally:
+            os.close(fd)
+
+    def _load(self, journal):
+        """Записывает пакет одной транзакцией; возвращает число и время."""
+        records = [json.loads(line) for line in journal if line.strip()]
+        news_ids = set(News.objects.filter(
+            pk__in={record['news'] for record in records}
+        ).values_list('pk', flat=True))
+        author_ids = set(get_user_model().objects.filter(
+            pk__in={record['author'] for record in records}
+        ).values_list('pk', flat=True))
+        records = [
+            record for record in records
+            if record['news'] in news_ids and record['author'] in author_ids
+        ]
+        if not records:
+            return 0, None
+        counts = Counter(record['news'] for record in records)
+        with transaction.atomic():
+            self._insert(records)
+            for news_id, count in counts.items():
+                News.objects.filter(pk=news_id).change_comment_count(count)
+            transaction.on_commit(lambda: invalidate_news(*counts))
+            transaction.on_commit(lambda: events.publish(*counts))
+        return len(records), min(record['accepted'] for record in records)
+
+    def _insert(self, records):
+        """
+        Вставляет комментарии со временем приёма.
+
+        bulk_create заменил бы его текущим временем: поле created
+        заполняется автоматически.
+        """
+        fields = [
+            Comment._meta.get_field(name)
+            for name in ('news', 'author', 'text', 'created', 'modified')
+        ]
+        quote = connection.ops.quote_name
+        sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+            quote(Comment._meta.db_table),
+            ', '.join(quote(field.column) for field in fields),
+            ', '.join(['%s'] * len(fields)),
+        )
+        rows = []
+        for record in records:
+            accepted = _accepted_at(record['accepted'])
+            values = (
+                record['news'], record['author'], record['text'],
+                accepted, accepted,
+            )
+            rows.append([
+                field.get_db_prep_save(value, connection)
+                for field, value in zip(fields, values)
+            ])
+        with connection.cursor() as cursor:
+            for start in range(0, len(rows), self.batch_size):
+                cursor.executemany(sql, rows[start:start + self.batch_size])
+
+    def _record(self, flushed, duration, lag):
+        """Добавляет перенос к общим счётчикам очереди."""
+        fd = os.open(self.directory / STATS, os.O_RDWR | os.O_CREAT, 0o644)
+        with open(fd, 'r+', encoding='utf-8') as file:
+            _lock(fd)
+            stats = self._read_stats(file)
+            stats['flushes'] += 1
+            stats['flushed'] += flushed
+            stats['last_flush_seconds'] = duration
+            stats['max_flush_seconds'] = max(
+                stats['max_flush_seconds'], duration
+            )
+            stats['max_lag_seconds'] = max(stats['max_lag_seconds'], lag)
+            file.seek(0)
+            file.truncate()
+            json.dump(stats, file)
+
+    @staticmethod
+    def _read_stats(file):
+        stats = {
+            'flushes': 0,
+            'flushed': 0,
+            'last_flush_seconds': None,
+            'max_flush_seconds': 0.0,
+            'max_lag_seconds': 0.0,
+        }
+        content = file.read()
+        if content:
+            stats.update(json.loads(content))
+        return stats
+
+    def recover(self):
+        """Возвращает в очередь пакеты, перенос которых был прерван."""
+        for path in self.directory.glob(f'*{FLUSHING}'):
+            try:
+                fd = os.open(path, os.O_RDONLY)
+            except FileNotFoundError:
+                continue
+            try:
+                # Заблокированный пакет ещё переносится другим процессом.
+                if not _try_lock(fd):
+                    continue
+                try:
+                    if os.stat(path).st_ino != os.fstat(fd).st_ino:
+                        continue
+                except FileNotFoundError:
+                    continue
+                os.rename(path, path.with_suffix(READY))
+            finally:
+                os.close(fd)
+
+    def depth(self):
+        """Количество комментариев, ещё не перенесённых в базу."""
+        total = 0
+        for path in self.directory.iterdir():
+            if path.name == ACTIVE or path.suffix in (READY, FLUSHING):
+                try:
+                    with open(path, 'rb') as journal:
+                        total += sum(chunk.count(b'\n') for chunk in journal)
+                except FileNotFoundError:
+                    pass
+        return total
+
+    def stats(self):
+        """Глубина очереди и счётчики переноса всех процессов."""
+        try:
+            fd = os.open(self.directory / STATS, os.O_RDONLY)
+        except FileNotFoundError:
+            stats = self._read_stats(io.StringIO())
+        else:
+            with open(fd, encoding='utf-8') as file:
+                # Файл переписывается на месте, читаем под блокировкой.
+                _lock(fd)
+                stats = self._read_stats(file)
+        return {'depth': self.depth(), **stats}
+
+    def start(self):
+        """Запускает фоновый поток переноса комментариев."""
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(
+                target=self.run, name='comment-queue', daemon=True
+            )
+            self._worker.start()
+
+    def run(self):
+        """Переносит комментарии по таймеру или по размеру пакета."""
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            close_old_connections()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Не удалось перенести комментарии в базу')
+            finally:
+                close_old_connections()
+
+
+_queues = {}
+_queues_lock = threading.Lock()
+
+
+def get_comment_queue(start_worker=True):
+    """Очередь комментариев процесса, настроенная по settings."""
+    directory = str(settings.COMMENT_QUEUE_DIR)
+    with _queues_lock:
+        queue = _queues.get(directory)
+        if queue is None:
+            queue = _queues[directory] = CommentQueue(
+                directory,
+                settings.COMMENT_QUEUE_BATCH_SIZE,
+                settings.COMMENT_QUEUE_FLUSH_INTERVAL,
+            )
+        if start_worker and settings.COMMENT_QUEUE_WORKER:
+            queue.start()
+    return queue
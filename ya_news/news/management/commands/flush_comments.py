@@ -0,0 +1,40 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from news.ingestion import get_comment_queue
+
+
+class Command(BaseCommand):
+    help = 'Переносит комментарии из очереди в базу данных.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Работать постоянно, перенося комментарии по таймеру.',
+        )
+        parser.add_argument(
+            '--recover',
+            action='store_true',
+            help='Вернуть в очередь пакеты, перенос которых был прерван.',
+        )
+        parser.add_argument(
+            '--stats',
+            action='store_true',
+            help='Только показать состояние очереди.',
+        )
+
+    def handle(self, *args, **options):
+        queue = get_comment_queue(start_worker=False)
+        if options['stats']:
+            self.stdout.write(json.dumps(queue.stats(), indent=2))
+            return
+        if options['recover']:
+            queue.recover()
+        if options['loop']:
+            queue.run()
+        flushed = queue.flush()
+        self.stdout.write(
+            self.style.SUCCESS(f'Перенесено комментариев: {flushed}')
+        )
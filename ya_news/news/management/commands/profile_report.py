@@ -0,0 +1,55 @@
+import pstats
+from io import StringIO
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from news import profiling
+
+SORT_KEYS = ('cumulative', 'tottime', 'ncalls')
+
+
+class Command(BaseCommand):
+    help = (
+        'Сводит сохранённые профили запросов по страницам и печатает '
+        'самые затратные функции.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'views', nargs='*',
+            help='Имена страниц, например news:detail; по умолчанию все.',
+        )
+        parser.add_argument('--top', type=int, default=20)
+        parser.add_argument(
+            '--sort', choices=SORT_KEYS, default=SORT_KEYS[0],
+        )
+
+    def handle(self, *args, **options):
+        root = Path(settings.PROFILING_DIR)
+        if options['views']:
+            directories = [
+                profiling.view_directory(view) for view in options['views']
+            ]
+        else:
+            directories = sorted(
+                path for path in root.glob('*') if path.is_dir()
+            )
+        reported = False
+        for directory in directories:
+            files = sorted(directory.glob(f'*{profiling.SUFFIX}'))
+            if not files:
+                continue
+            reported = True
+            output = StringIO()
+            stats = pstats.Stats(*map(str, files), stream=output)
+            stats.strip_dirs().sort_stats(options['sort'])
+            stats.print_stats(options['top'])
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f'{directory.name}: профилей {len(files)}, в среднем '
+                f'{stats.total_tt / len(files) * 1000:.1f} мс'
+            ))
+            self.stdout.write(output.getvalue())
+        if not reported:
+            raise CommandError(f'В {root} нет профилей.')
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from news import search
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает полнотекстовый индекс новостей и комментариев.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Сколько записей индексировать в одной транзакции.',
+        )
+
+    def handle(self, *args, **options):
+        if not search.is_supported():
+            raise CommandError(
+                'Полнотекстовый индекс доступен только в SQLite.'
+            )
+        news, comments = search.reindex(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Проиндексировано новостей: {news}, комментариев: {comments}'
+        ))
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from news.seeding import BATCH_SIZE, seed_news
+
+
+class Command(BaseCommand):
+    help = 'Наполняет базу синтетическими новостями и комментариями.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--news', type=int, default=10_000)
+        parser.add_argument('--comments', type=int, default=100_000)
+        parser.add_argument(
+            '--users', type=int, default=1000,
+            help='Сколько читателей оставляют комментарии.',
+        )
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help='Одинаковый seed даёт одинаковые данные.',
+        )
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def progress(self, model, done, total, elapsed):
+        rate = done / elapsed if elapsed else 0
+        self.stdout.write(
+            f'{model._meta.label}: {done}/{total} '
+            f'({rate:.0f} строк/с)'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            hot_id = seed_news(
+                options['news'], options['comments'], options['users'],
+                seed=options['seed'], batch_size=options['batch_size'],
+                progress=self.progress,
+            )
+        except ValueError as error:
+            raise CommandError(error)
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово. Новость с длинной лентой комментариев: {hot_id}'
+        ))
@@ -0,0 +1,96 @@
+from django.db import migrations
+
+
+class RunSQLiteSQL(migrations.RunSQL):
+    """RunSQL, который выполняется только на SQLite: индекс на FTS5."""
+
+    def database_forwards(self, app_label, schema_editor, *args):
+        if schema_editor.connection.vendor == 'sqlite':
+            super().database_forwards(app_label, schema_editor, *args)
+
+    def database_backwards(self, app_label, schema_editor, *args):
+        if schema_editor.connection.vendor == 'sqlite':
+            super().database_backwards(app_label, schema_editor, *args)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0004_comment_page_index'),
+    ]
+
+    operations = [
+        RunSQLiteSQL(
+            [
+                """
+                CREATE VIRTUAL TABLE news_search USING fts5(
+                    title, body, content='',
+                    tokenize='unicode61 remove_diacritics 2'
+                )
+                """,
+                """
+                CREATE TRIGGER news_search_news_insert
+                AFTER INSERT ON news_news BEGIN
+                    INSERT INTO news_search(rowid, title, body)
+                    VALUES (new.id * 2, new.title, new.text);
+                END
+                """,
+                """
+                CREATE TRIGGER news_search_news_delete
+                AFTER DELETE ON news_news BEGIN
+                    INSERT INTO news_search(news_search, rowid, title, body)
+                    VALUES ('delete', old.id * 2, old.title, old.text);
+                END
+                """,
+                """
+                CREATE TRIGGER news_search_news_update
+                AFTER UPDATE OF title, text ON news_news BEGIN
+                    INSERT INTO news_search(news_search, rowid, title, body)
+                    VALUES ('delete', old.id * 2, old.title, old.text);
+                    INSERT INTO news_search(rowid, title, body)
+                    VALUES (new.id * 2, new.title, new.text);
+                END
+                """,
+                """
+                CREATE TRIGGER news_search_comment_insert
+                AFTER INSERT ON news_comment BEGIN
+                    INSERT INTO news_search(rowid, title, body)
+                    VALUES (new.id * 2 + 1, '', new.text);
+                END
+                """,
+                """
+                CREATE TRIGGER news_search_comment_delete
+                AFTER DELETE ON news_comment BEGIN
+                    INSERT INTO news_search(news_search, rowid, title, body)
+                    VALUES ('delete', old.id * 2 + 1, '', old.text);
+                END
+                """,
+                """
+                CREATE TRIGGER news_search_comment_update
+                AFTER UPDATE OF text ON news_comment BEGIN
+                    INSERT INTO news_search(news_search, rowid, title, body)
+                    VALUES ('delete', old.id * 2 + 1, '', old.text);
+                    INSERT INTO news_search(rowid, title, body)
+                    VALUES (new.id * 2 + 1, '', new.text);
+                END
+                """,
+                """
+                INSERT INTO news_search(rowid, title, body)
+                SELECT id * 2, title, text FROM news_news
+                """,
+                """
+                INSERT INTO news_search(rowid, title, body)
+                SELECT id * 2 + 1, '', text FROM news_comment
+                """,
+            ],
+            [
+                'DROP TRIGGER news_search_news_insert',
+                'DROP TRIGGER news_search_news_delete',
+                'DROP TRIGGER news_search_news_update',
+                'DROP TRIGGER news_search_comment_insert',
+                'DROP TRIGGER news_search_comment_delete',
+                'DROP TRIGGER news_search_comment_update',
+                'DROP TABLE news_search',
+            ],
+        ),
+    ]
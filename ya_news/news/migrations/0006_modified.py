@@ -0,0 +1,95 @@
+# Generated by Django 3.2.15 on 2026-10-18 19:02
+
+from django.db import migrations, models
+
+
+class RunSQLiteSQL(migrations.RunSQL):
+    """RunSQL, который выполняется только на SQLite: индекс на FTS5."""
+
+    def database_forwards(self, app_label, schema_editor, *args):
+        if schema_editor.connection.vendor == 'sqlite':
+            super().database_forwards(app_label, schema_editor, *args)
+
+    def database_backwards(self, app_label, schema_editor, *args):
+        if schema_editor.connection.vendor == 'sqlite':
+            super().database_backwards(app_label, schema_editor, *args)
+
+
+# SQLite пересоздаёт таблицы при добавлении и удалении поля, триггеры
+# индекса теряются и создаются заново.
+SEARCH_TRIGGERS_SQL = [
+    'DROP TRIGGER IF EXISTS news_search_news_insert',
+    'DROP TRIGGER IF EXISTS news_search_news_delete',
+    'DROP TRIGGER IF EXISTS news_search_news_update',
+    'DROP TRIGGER IF EXISTS news_search_comment_insert',
+    'DROP TRIGGER IF EXISTS news_search_comment_delete',
+    'DROP TRIGGER IF EXISTS news_search_comment_update',
+    """
+    CREATE TRIGGER news_search_news_insert
+    AFTER INSERT ON news_news BEGIN
+        INSERT INTO news_search(rowid, title, body)
+        VALUES (new.id * 2, new.title, new.text);
+    END
+    """,
+    """
+    CREATE TRIGGER news_search_news_delete
+    AFTER DELETE ON news_news BEGIN
+        INSERT INTO news_search(news_search, rowid, title, body)
+        VALUES ('delete', old.id * 2, old.title, old.text);
+    END
+    """,
+    """
+    CREATE TRIGGER news_search_news_update
+    AFTER UPDATE OF title, text ON news_news BEGIN
+        INSERT INTO news_search(news_search, rowid, title, body)
+        VALUES ('delete', old.id * 2, old.title, old.text);
+        INSERT INTO news_search(rowid, title, body)
+        VALUES (new.id * 2, new.title, new.text);
+    END
+    """,
+    """
+    CREATE TRIGGER news_search_comment_insert
+    AFTER INSERT ON news_comment BEGIN
+        INSERT INTO news_search(rowid, title, body)
+        VALUES (new.id * 2 + 1, '', new.text);
+    END
+    """,
+    """
+    CREATE TRIGGER news_search_comment_delete
+    AFTER DELETE ON news_comment BEGIN
+        INSERT INTO news_search(news_search, rowid, title, body)
+        VALUES ('delete', old.id * 2 + 1, '', old.text);
+    END
+    """,
+    """
+    CREATE TRIGGER news_search_comment_update
+    AFTER UPDATE OF text ON news_comment BEGIN
+        INSERT INTO news_search(news_search, rowid, title, body)
+        VALUES ('delete', old.id * 2 + 1, '', old.text);
+        INSERT INTO news_search(rowid, title, body)
+        VALUES (new.id * 2 + 1, '', new.text);
+    END
+    """,
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0005_news_search'),
+    ]
+
+    operations = [
+        RunSQLiteSQL(migrations.RunSQL.noop, SEARCH_TRIGGERS_SQL),
+        migrations.AddField(
+            model_name='comment',
+            name='modified',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='news',
+            name='modified',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        RunSQLiteSQL(SEARCH_TRIGGERS_SQL, migrations.RunSQL.noop),
+    ]
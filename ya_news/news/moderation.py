@@ -0,0 +1,110 @@
+import os
+import threading
+from collections import deque
+
+from django.conf import settings
+
+
+class WordMatcher:
+    """
+    Автомат Ахо — Корасик для поиска запрещённых слов.
+
+    Строится один раз по словарю и проверяет текст за один проход
+    независимо от количества слов в словаре.
+    """
+
+    def __init__(self, words):
+        self.transitions = [{}]
+        self.fail = [0]
+        self.terminal = [False]
+        for word in words:
+            self._add(word)
+        self._link()
+
+    def _add(self, word):
+        state = 0
+        for char in word:
+            next_state = self.transitions[state].get(char)
+            if next_state is None:
+                next_state = len(self.transitions)
+                self.transitions.append({})
+                self.fail.append(0)
+                self.terminal.append(False)
+                self.transitions[state][char] = next_state
+            state = next_state
+        if state:
+            self.terminal[state] = True
+
+    def _link(self):
+        queue = deque(self.transitions[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.transitions[state].items():
+                fallback = self.fail[state]
+                while fallback and char not in self.transitions[fallback]:
+                    fallback = self.fail[fallback]
+                link = self.transitions[fallback].get(char, 0)
+                self.fail[next_state] = link
+                self.terminal[next_state] |= self.terminal[link]
+                queue.append(next_state)
+
+    def search(self, text):
+        """Возвращает True, если в тексте есть хотя бы одно слово."""
+        transitions = self.transitions
+        fail = self.fail
+        terminal = self.terminal
+        state = 0
+        for char in text:
+            while state and char not in transitions[state]:
+                state = fail[state]
+            state = transitions[state].get(char, 0)
+            if terminal[state]:
+                return True
+        return False
+
+
+_lock = threading.Lock()
+_cache = {}
+
+
+def read_words(path):
+    """Читает словарь из файла: по одному слову в строке, # — комментарий."""
+    with open(path, encoding='utf-8') as words_file:
+        return [
+            line.strip() for line in words_file
+            if line.strip() and not line.startswith('#')
+        ]
+
+
+def _file_state(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except (OSError, TypeError):
+        return None
+
+
+def get_matcher(words):
+    """
+    Возвращает автомат для слов и словаря из settings.BAD_WORDS_FILE.
+
+    Автомат собирается один раз на процесс и пересобирается, когда
+    меняется файл словаря.
+    """
+    path = getattr(settings, 'BAD_WORDS_FILE', None)
+    key = (tuple(words), str(path), _file_state(path))
+    matcher = _cache.get(key)
+    if matcher is None:
+        with _lock:
+            extra = read_words(path) if key[2] is not None else []
+            matcher = WordMatcher(
+                word.lower() for word in (*words, *extra) if word
+            )
+            _cache.clear()
+            _cache[key] = matcher
+    return matcher
+
+
+def reload_matcher():
+    """Сбрасывает собранные автоматы, следующий вызов соберёт их заново."""
+    with _lock:
+        _cache.clear()
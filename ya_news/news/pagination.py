@@ -0,0 +1,64 @@
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.http import Http404
+from django.utils.encoding import force_bytes, force_str
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+
+
+def encode_cursor(obj, fields):
+    """Упаковывает значения ключевых полей объекта в строку-курсор."""
+    values = [str(getattr(obj, name)) for name in fields]
+    return urlsafe_base64_encode(force_bytes(json.dumps(values)))
+
+
+def decode_cursor(queryset, fields, cursor):
+    """Распаковывает курсор в значения полей модели или отдаёт 404."""
+    try:
+        values = json.loads(force_str(urlsafe_base64_decode(cursor)))
+        if len(values) != len(fields):
+            raise ValueError
+        opts = queryset.model._meta
+        return [
+            opts.get_field(name).to_python(value)
+            for name, value in zip(fields, values)
+        ]
+    except (ValueError, TypeError, ValidationError):
+        raise Http404('Некорректный курсор.')
+
+
+def keyset_filter(queryset, fields, cursor, descending=False):
+    """
+    Оставляет в выборке только записи после курсора.
+
+    Записи упорядочиваются по полям fields, сравнение идёт по кортежу
+    значений, поэтому запрос опирается на составной индекс и не зависит
+    от номера страницы.
+    """
+    if descending:
+        ordering = [f'-{name}' for name in fields]
+    else:
+        ordering = list(fields)
+    queryset = queryset.order_by(*ordering)
+    if not cursor:
+        return queryset
+    values = decode_cursor(queryset, fields, cursor)
+    lookup = 'lt' if descending else 'gt'
+    condition = Q()
+    for index, name in enumerate(fields):
+        step = Q(**dict(zip(fields[:index], values[:index])))
+        step &= Q(**{f'{name}__{lookup}': values[index]})
+        condition |= step
+    return queryset.filter(condition)
+
+
+def next_cursor(queryset, fields, page, descending=False):
+    """Возвращает курсор следующей страницы или None, если её нет."""
+    page = list(page)
+    if not page:
+        return None
+    cursor = encode_cursor(page[-1], fields)
+    if not keyset_filter(queryset, fields, cursor, descending).exists():
+        return None
+    return cursor
@@ -0,0 +1,149 @@
+"""
+Выборочное профилирование запросов через cProfile.
+
+ProfilingMiddleware профилирует долю settings.PROFILING_SAMPLE_RATE
+запросов, все запросы к страницам из settings.PROFILING_VIEWS и запросы
+сотрудников с заголовком settings.PROFILING_HEADER. Профиль охватывает
+представление и middleware после аутентификации и сохраняется в каталог
+страницы внутри settings.PROFILING_DIR; в каждом каталоге остаются
+только settings.PROFILING_KEEP последних профилей. Сводку по страницам
+печатает команда profile_report.
+
+Запрос вне выборки стоит одного вызова random(), а при заданном
+PROFILING_VIEWS — ещё и разбора адреса. cProfile видит только поток, в
+котором включён, и в нём одновременно работает один профиль. В
+асинхронной цепочке это поток цикла событий: работа представлений в
+пуле потоков видна в профиле как ожидание, а в профиль попадают и
+другие запросы, которые цикл обслуживал в это время.
+"""
+import asyncio
+import cProfile
+import os
+import random
+import threading
+import time
+from pathlib import Path
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.urls import Resolver404, resolve
+
+SUFFIX = '.prof'
+UNRESOLVED = 'unresolved'
+
+_local = threading.local()
+
+
+def view_directory(view_name):
+    """Каталог профилей страницы; двоеточие в имени недопустимо в Windows."""
+    return Path(settings.PROFILING_DIR) / view_name.replace(':', '.')
+
+
+def _view_name(request):
+    try:
+        return resolve(
+            request.path_info, getattr(request, 'urlconf', None)
+        ).view_name
+    except Resolver404:
+        return None
+
+
+def is_sampled(request):
+    """Попадает ли запрос в выборку; пользователь здесь не проверяется."""
+    if settings.PROFILING_VIEWS and (
+            _view_name(request) in settings.PROFILING_VIEWS):
+        return True
+    return random.random() < settings.PROFILING_SAMPLE_RATE
+
+
+def is_requested(request):
+    return bool(
+        settings.PROFILING_HEADER
+        and request.headers.get(settings.PROFILING_HEADER)
+    )
+
+
+def _is_staff(request):
+    return request.user.is_staff
+
+
+def save(profiler, view_name):
+    """Записывает профиль и удаляет самые старые профили страницы."""
+    directory = view_directory(view_name)
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f'{time.time_ns()}.{os.getpid()}{SUFFIX}'
+    # Сначала во временный файл: profile_report не должен видеть
+    # недописанный профиль.
+    partial = path.with_suffix('.tmp')
+    profiler.dump_stats(partial)
+    os.replace(partial, path)
+    profiles = sorted(directory.glob(f'*{SUFFIX}'))
+    for old in profiles[:-settings.PROFILING_KEEP]:
+        old.unlink(missing_ok=True)
+    return path
+
+
+def start():
+    """Включает профиль, если в потоке ещё нет другого."""
+    if getattr(_local, 'profiler', None) is not None:
+        return None
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # В потоке уже работает другой профилировщик.
+        return None
+    _local.profiler = profiler
+    return profiler
+
+
+def stop(profiler, request):
+    profiler.disable()
+    _local.profiler = None
+    match = request.resolver_match
+    save(profiler, match.view_name if match else UNRESOLVED)
+
+
+class ProfilingMiddleware:
+    """
+    Профилирует выбранные запросы и сохраняет профили по страницам.
+
+    Стоит после AuthenticationMiddleware: заголовок профилирования
+    действует только для сотрудников.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self._acall(request)
+        profiler = None
+        if is_sampled(request) or (
+                is_requested(request) and _is_staff(request)):
+            profiler = start()
+        if profiler is None:
+            return self.get_response(request)
+        try:
+            return self.get_response(request)
+        finally:
+            stop(profiler, request)
+
+    async def _acall(self, request):
+        profiler = None
+        # Пользователь может загружаться из базы, поэтому вне цикла.
+        if is_sampled(request) or (
+                is_requested(request)
+                and await sync_to_async(_is_staff)(request)):
+            profiler = start()
+        if profiler is None:
+            return await self.get_response(request)
+        try:
+            return await self.get_response(request)
+        finally:
+            stop(profiler, request)
@@ -1,14 +1,24 @@
+import importlib
 from datetime import datetime, timedelta
 
 import pytest
+from django.core.cache import cache, caches
 from django.test import Client
-from django.urls import reverse
+from django.urls import clear_url_caches, reverse
 from django.conf import settings
+from django.db import connections
 from django.utils import timezone
 
+from news.middleware import assert_query_budget, capture_reports
 from news.models import Comment, News
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    caches[settings.SESSION_CACHE_ALIAS].clear()
+
+
 @pytest.fixture
 def get_news():
     today = datetime.today()
@@ -87,6 +97,16 @@ def url_comments(detail_url):
     return detail_url + '#comments'
 
 
+@pytest.fixture
+def events_url(news):
+    return reverse('news:events', args=(news.id,))
+
+
+@pytest.fixture
+def search_url():
+    return reverse('news:search')
+
+
 @pytest.fixture
 def login_url():
     return reverse('users:login')
@@ -100,3 +120,49 @@ def logout_url():
 @pytest.fixture
 def signup_url():
     return reverse('users:signup')
+
+
+@pytest.fixture
+def query_budget():
+    """Проверяет, что страница укладывается в бюджет SQL-запросов."""
+    def check(client, url, budget=None, **kwargs):
+        with capture_reports() as reports:
+            client.get(url, **kwargs)
+        report = reports[-1]
+        assert_query_budget(report, budget)
+        return report
+    return check
+
+
+def reload_urls():
+    import news.urls
+    import yanews.urls
+
+    importlib.reload(news.urls)
+    importlib.reload(yanews.urls)
+    clear_url_caches()
+
+
+@pytest.fixture
+def async_views(settings):
+    """Асинхронные представления новостей, как под ASGI."""
+    settings.NEWS_ASYNC_VIEWS = True
+    reload_urls()
+    yield
+    settings.NEWS_ASYNC_VIEWS = False
+    reload_urls()
+
+
+@pytest.fixture
+def replica(tmp_path, settings):
+    """Реплика для чтения в отдельном файле SQLite."""
+    alias = 'replica'
+    connections.settings[alias] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': str(tmp_path / 'replica.sqlite3'),
+    }
+    settings.DATABASE_REPLICAS = [alias]
+    yield alias
+    connections[alias].close()
+    del connections[alias]
+    del connections.settings[alias]
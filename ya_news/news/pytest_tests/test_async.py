@@ -0,0 +1,76 @@
+import asyncio
+import threading
+import time
+from http import HTTPStatus
+
+import pytest
+from asgiref.sync import sync_to_async
+from django.test import AsyncClient
+from django.urls import reverse
+
+from news import views
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.usefixtures('async_views')
+def test_async_views(news, author, comment):
+    """Асинхронные страницы отдают то же, что синхронные, и принимают POST."""
+    async def requests():
+        client = AsyncClient()
+        home = await client.get(reverse('news:home'))
+        detail = await client.get(reverse('news:detail', args=(news.pk,)))
+        await sync_to_async(client.force_login)(author)
+        # Multipart-тело AsyncClient в Django 3.2 читает с ошибкой.
+        posted = await client.post(
+            reverse('news:detail', args=(news.pk,)), 'text=Новый',
+            content_type='application/x-www-form-urlencoded',
+        )
+        return home, detail, posted
+
+    home, detail, posted = asyncio.run(requests())
+    assert home.status_code == HTTPStatus.OK
+    assert news.title in home.content.decode()
+    assert comment.text in detail.content.decode()
+    assert posted.status_code == HTTPStatus.FOUND
+    assert news.comment_set.filter(text='Новый').exists()
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.usefixtures('async_views')
+def test_async_pages_are_served_concurrently(monkeypatch, news):
+    """
+    Под ASGI медленные страницы строятся одновременно.
+
+    Синхронный middleware в цепочке перевёл бы её в один поток, и
+    страницы строились бы по очереди.
+    """
+    requests = 8
+    active = peak = 0
+    lock = threading.Lock()
+    render = views._render
+
+    def slow_render(*args, **kwargs):
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        time.sleep(0.2)
+        with lock:
+            active -= 1
+        return render(*args, **kwargs)
+
+    monkeypatch.setattr(views, '_render', slow_render)
+
+    async def get_all():
+        client = AsyncClient()
+        return await asyncio.gather(*(
+            client.get(reverse('news:home')) for _ in range(requests)
+        ))
+
+    responses = asyncio.run(get_all())
+    assert all(
+        response.status_code == HTTPStatus.OK for response in responses
+    )
+    assert peak == requests
@@ -0,0 +1,73 @@
+import os
+import subprocess
+import sys
+
+import pytest
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from news import auth
+
+pytestmark = pytest.mark.django_db
+
+
+def test_repeated_requests_read_session_and_user_from_cache(
+        author, author_client, detail_url
+):
+    """Повторный запрос не читает из базы ни сессию, ни пользователя."""
+    author_client.get(detail_url)
+    with CaptureQueriesContext(connection) as context:
+        response = author_client.get(detail_url)
+    assert response.context['user'] == author
+    for table in ('auth_user', 'django_session'):
+        assert not any(
+            f'FROM "{table}"' in query['sql']
+            for query in context.captured_queries
+        )
+    # Смена пароля, как и без кеша, завершает остальные сессии.
+    author.set_password('Новый пароль')
+    author.save()
+    response = author_client.get(detail_url)
+    assert not response.context['user'].is_authenticated
+
+
+def test_update_bypasses_user_cache_until_invalidated(
+        author, author_client, detail_url
+):
+    """QuerySet.update не сбрасывает кеш: это делает auth.invalidate."""
+    author_client.get(detail_url)
+    User = get_user_model()
+    User.objects.filter(pk=author.pk).update(is_active=False)
+    response = author_client.get(detail_url)
+    assert response.context['user'].is_authenticated
+    auth.invalidate(author.pk)
+    response = author_client.get(detail_url)
+    assert not response.context['user'].is_authenticated
+
+
+def test_deactivated_user_is_logged_out(author, author_client, detail_url):
+    """Неактивный пользователь не проходит и с пользователем из кеша."""
+    author_client.get(detail_url)
+    author.is_active = False
+    author.save()
+    response = author_client.get(detail_url)
+    assert not response.context['user'].is_authenticated
+
+
+def test_session_cache_is_shared_between_processes():
+    """Кеш сессий и пользователей виден другим процессам сервера."""
+    subprocess.run(
+        (
+            sys.executable, '-c',
+            'import django; django.setup(); '
+            'from django.conf import settings; '
+            'from django.core.cache import caches; '
+            'caches[settings.SESSION_CACHE_ALIAS].set("shared", 1)',
+        ),
+        check=True, cwd=settings.BASE_DIR,
+        env={**os.environ, 'DJANGO_SETTINGS_MODULE': 'yanews.settings'},
+    )
+    assert caches[settings.SESSION_CACHE_ALIAS].get('shared') == 1
@@ -0,0 +1,111 @@
+import threading
+import time
+from http import HTTPStatus
+
+import pytest
+from django.contrib.auth.models import AnonymousUser
+from django.core.exceptions import ImproperlyConfigured
+from django.urls import reverse
+from django.views import generic
+
+from news import singleflight, views
+from news.models import News
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def clear_stats():
+    singleflight.reset_stats()
+
+
+def test_single_flight_computes_once():
+    """Отсутствующее значение вычисляется один раз на все потоки."""
+    calls = []
+    results = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.1)
+        return 'page'
+
+    def worker():
+        results.append(singleflight.get_or_compute('key', compute, 60))
+
+    threads = [threading.Thread(target=worker) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert results == ['page'] * 5
+    assert singleflight.stats() == {
+        'hits': 0, 'misses': 1, 'stale': 0, 'lock_waits': 4,
+    }
+
+
+def test_single_flight_serves_stale_while_locked():
+    """Пока значение пересчитывается, остальные получают прежнее."""
+    singleflight.get_or_compute('key', lambda: 'old', 0)
+    with singleflight.key_lock('key', wait=False, timeout=1) as acquired:
+        assert acquired
+        value = singleflight.get_or_compute('key', lambda: 'new', 60)
+    assert value == 'old'
+    assert singleflight.get_or_compute('key', lambda: 'new', 60) == 'new'
+    assert singleflight.get_or_compute('key', lambda: 'newer', 60) == 'new'
+    assert singleflight.stats() == {
+        'hits': 1, 'misses': 2, 'stale': 1, 'lock_waits': 0,
+    }
+
+
+def test_single_flight_refreshes_early():
+    """Дорогое значение обновляется раньше срока."""
+    singleflight.get_or_compute('key', lambda: time.sleep(0.01) or 'old', 1)
+    value = singleflight.get_or_compute('key', lambda: 'new', 60, beta=1e6)
+    assert value == 'new'
+
+
+def test_anonymous_pages_cached(
+        client,
+        author_client,
+        news,
+        home_url,
+        detail_url,
+        django_assert_num_queries,
+        django_capture_on_commit_callbacks
+):
+    """Анонимные страницы берутся из кеша до изменения новости."""
+    other = News.objects.create(title='Другая', text='Текст')
+    other_url = reverse('news:detail', args=(other.pk,))
+    for url in (home_url, detail_url, other_url):
+        client.get(url)
+    with django_assert_num_queries(0):
+        for url in (home_url, detail_url, other_url):
+            assert client.get(url).status_code == HTTPStatus.OK
+    with django_capture_on_commit_callbacks(execute=True):
+        author_client.post(detail_url, data={'text': 'Новый комментарий'})
+    with django_assert_num_queries(0):
+        client.get(other_url)
+    assert 'Новый комментарий' in client.get(detail_url).content.decode()
+    assert 'Комментариев: 1' in client.get(home_url).content.decode()
+
+
+def test_anonymous_cache_keys_only_on_read_params(
+        client, home_url, django_assert_num_queries
+):
+    """Лишние параметры запроса не заводят новых записей в кеше."""
+    client.get(home_url, {'cursor': ''})
+    with django_assert_num_queries(0):
+        response = client.get(home_url, {'cursor': '', 'utm_source': 'x'})
+    assert response.status_code == HTTPStatus.OK
+
+
+def test_anonymous_cache_requires_scope(rf):
+    """Страница без области кеша не кешируется молча под общим ключом."""
+    class Unscoped(views.AnonymousCacheMixin, generic.TemplateView):
+        template_name = 'news/home.html'
+
+    request = rf.get('/')
+    request.user = AnonymousUser()
+    with pytest.raises(ImproperlyConfigured):
+        Unscoped.as_view()(request)
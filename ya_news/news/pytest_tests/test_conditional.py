@@ -0,0 +1,50 @@
+import time
+from http import HTTPStatus
+
+import pytest
+from django.utils.http import http_date
+
+pytestmark = pytest.mark.django_db
+
+
+def test_detail_not_modified(
+        client,
+        news,
+        comment,
+        detail_url,
+        django_assert_max_num_queries
+):
+    """Неизменившаяся страница новости отдаётся ответом 304."""
+    etag = client.get(detail_url)['ETag']
+    with django_assert_max_num_queries(1):
+        response = client.get(detail_url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+
+def test_detail_etag_changes(
+        client,
+        author_client,
+        news,
+        detail_url,
+        django_capture_on_commit_callbacks
+):
+    """Тег ETag зависит от пользователя и от новых комментариев."""
+    etag = client.get(detail_url)['ETag']
+    assert author_client.get(detail_url)['ETag'] != etag
+    with django_capture_on_commit_callbacks(execute=True):
+        author_client.post(detail_url, data={'text': 'Новый комментарий'})
+    response = client.get(detail_url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+
+
+def test_detail_ignores_if_modified_since(
+        client, author_client, news, detail_url
+):
+    """Страница не отдаёт Last-Modified: ответ зависит от пользователя."""
+    response = client.get(detail_url)
+    assert 'Last-Modified' not in response
+    response = author_client.get(
+        detail_url, HTTP_IF_MODIFIED_SINCE=http_date(time.time() + 60)
+    )
+    assert response.status_code == HTTPStatus.OK
+    assert 'form' in response.context
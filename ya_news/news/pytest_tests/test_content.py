@@ -1,3 +1,5 @@
+from http import HTTPStatus
+
 import pytest
 from django.conf import settings
 
@@ -16,6 +18,17 @@ def test_news_count_on_homepage(client, get_news, home_url):
     assert news_count == settings.NEWS_COUNT_ON_HOME_PAGE
 
 
+def test_homepage_does_not_load_comments(
+        client,
+        get_news,
+        home_url,
+        django_assert_num_queries
+):
+    """Главная страница не загружает комментарии."""
+    with django_assert_num_queries(2):
+        client.get(home_url)
+
+
 def test_news_sorted_by_date(client, get_news, home_url):
     """Тест сортировки новостей."""
     response = client.get(home_url)
@@ -24,6 +37,26 @@ def test_news_sorted_by_date(client, get_news, home_url):
     assert news_get_all == news_sort
 
 
+def test_older_news_page_by_cursor(client, get_news, home_url):
+    """Тест перехода к более старым новостям по курсору."""
+    response = client.get(home_url)
+    first_page = list(response.context['object_list'])
+    cursor = response.context['next_cursor']
+    assert cursor
+    response = client.get(home_url, {'cursor': cursor})
+    older_page = list(response.context['object_list'])
+    assert len(older_page) == 1
+    assert older_page[0] not in first_page
+    assert older_page[0].date < first_page[-1].date
+    assert response.context['next_cursor'] is None
+
+
+def test_invalid_cursor(client, home_url):
+    """Тест некорректного курсора ленты новостей."""
+    response = client.get(home_url, {'cursor': 'broken'})
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
 def test_comments_sorted_by_date(client, news, get_comments_news, detail_url):
     """Тест сортировки комментариев."""
     response = client.get(detail_url)
@@ -34,6 +67,39 @@ def test_comments_sorted_by_date(client, news, get_comments_news, detail_url):
     assert comments == sorted_comments
 
 
+def test_comments_split_into_pages(
+        client,
+        settings,
+        news,
+        get_comments_news,
+        detail_url
+):
+    """Тест постраничного вывода комментариев."""
+    settings.COMMENTS_COUNT_ON_NEWS_PAGE = 1
+    response = client.get(detail_url)
+    first_page = response.context['comments']
+    assert len(first_page) == 1
+    response = client.get(
+        detail_url, {'cursor': response.context['next_cursor']}
+    )
+    second_page = response.context['comments']
+    assert len(second_page) == 1
+    assert second_page[0].created > first_page[0].created
+    assert response.context['next_cursor'] is None
+
+
+def test_comment_author_loaded_partially(
+        client,
+        news,
+        get_comments_news,
+        detail_url
+):
+    """Для автора комментария загружаются только нужные поля."""
+    response = client.get(detail_url)
+    author = response.context['comments'][0].author
+    assert 'password' in author.get_deferred_fields()
+
+
 def test_anonymous_user_not_available_form_comment(client, news, detail_url):
     """Тест недоступности формы комментария анонимному пользователю."""
     response = client.get(detail_url)
@@ -0,0 +1,126 @@
+import asyncio
+from http import HTTPStatus
+
+import pytest
+from asgiref.sync import sync_to_async
+from django.urls import reverse
+
+from news import events
+from news.events import Subscription, asgi_app
+from news.models import Comment
+
+pytestmark = pytest.mark.django_db
+
+
+def test_events_publish_wakes_subscribers(news):
+    """Публикация будит только подписчиков своей новости."""
+    with Subscription(news.pk) as subscription:
+        events.publish(news.pk + 1)
+        assert not subscription.wait(0)
+        events.publish(news.pk)
+        assert subscription.wait(0)
+
+
+def test_events_resume_from_last_event_id(
+        client, events_url, news, author
+):
+    """Поток комментариев продолжается после Last-Event-ID без повторов."""
+    first, second = (
+        Comment.objects.create(news=news, author=author, text=f'Текст {index}')
+        for index in range(2)
+    )
+    response = client.get(events_url, HTTP_LAST_EVENT_ID=str(first.pk))
+    assert response['Content-Type'] == 'text/event-stream'
+    content = response.content.decode()
+    assert f'id: {second.pk}\n' in content
+    assert f'id: {first.pk}\n' not in content
+    response = client.get(events_url)
+    assert 'id: ' not in response.content.decode()
+
+
+def test_detail_subscribes_to_events_only_under_asgi(
+        client, detail_url, events_url
+):
+    """Под WSGI страница не держит поток сервера подпиской на события."""
+    response = client.get(detail_url)
+    assert not response.context['live_comments']
+    assert events_url not in response.content.decode()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_events_asgi_stream(news, author, settings):
+    """ASGI-поток присылает новый комментарий сразу после публикации."""
+    settings.NEWS_EVENTS_POLL_INTERVAL = 0.05
+    application = asgi_app(None)
+    path = reverse('news:events', args=(news.pk,))
+    scope = {
+        'type': 'http', 'path': path, 'query_string': b'',
+        'headers': [(b'host', b'testserver')],
+    }
+
+    async def stream():
+        sent = []
+        disconnected = asyncio.Event()
+
+        async def receive():
+            await disconnected.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            sent.append(message)
+
+        task = asyncio.ensure_future(application(scope, receive, send))
+        while len(sent) < 2:
+            await asyncio.sleep(0.01)
+        comment = await sync_to_async(Comment.objects.create)(
+            news=news, author=author, text='Свежий'
+        )
+        events.publish(news.pk)
+        for _ in range(100):
+            if any('Свежий'.encode() in message.get('body', b'')
+                   for message in sent):
+                break
+            await asyncio.sleep(0.01)
+        disconnected.set()
+        await asyncio.wait_for(task, 1)
+        return sent, comment
+
+    sent, comment = asyncio.run(stream())
+    assert sent[0]['status'] == HTTPStatus.OK
+    body = b''.join(message.get('body', b'') for message in sent).decode()
+    assert f'id: {comment.pk}\n' in body
+
+
+@pytest.mark.django_db(transaction=True)
+def test_events_asgi_stream_under_root_path_stops_on_disconnect(
+        news, settings
+):
+    """Поток находится под root_path и сразу замечает отключение."""
+    settings.NEWS_EVENTS_POLL_INTERVAL = 60
+    application = asgi_app(None)
+    scope = {
+        'type': 'http', 'root_path': '/site',
+        'path': '/site' + reverse('news:events', args=(news.pk,)),
+        'query_string': b'', 'headers': [(b'host', b'testserver')],
+    }
+
+    async def stream():
+        sent = []
+        disconnected = asyncio.Event()
+
+        async def receive():
+            await disconnected.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            sent.append(message)
+
+        task = asyncio.ensure_future(application(scope, receive, send))
+        while len(sent) < 2:
+            await asyncio.sleep(0.01)
+        disconnected.set()
+        await asyncio.wait_for(task, 1)
+        return sent
+
+    sent = asyncio.run(stream())
+    assert sent[0]['status'] == HTTPStatus.OK
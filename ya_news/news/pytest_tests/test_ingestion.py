@@ -0,0 +1,100 @@
+import fcntl
+import json
+import time
+
+import pytest
+from django.db import OperationalError
+from pytest_django.asserts import assertRedirects
+
+from news.ingestion import CommentQueue, get_comment_queue
+from news.models import Comment
+
+pytestmark = pytest.mark.django_db
+
+FORMS_DATA = {
+    'text': 'Test comment'
+}
+
+
+def test_comment_queue_writes_comments_in_batches(
+        author_client,
+        detail_url,
+        url_comments,
+        news,
+        settings,
+        tmp_path
+):
+    """В режиме очереди комментарий попадает в базу при переносе пакета."""
+    settings.COMMENT_QUEUE_ENABLED = True
+    settings.COMMENT_QUEUE_WORKER = False
+    settings.COMMENT_QUEUE_DIR = tmp_path
+    response = author_client.post(detail_url, data=FORMS_DATA)
+    assertRedirects(response, url_comments)
+    assert Comment.objects.count() == 0
+    queue = get_comment_queue()
+    assert queue.stats()['depth'] == 1
+    assert queue.flush() == 1
+    news.refresh_from_db()
+    assert news.comment_count == 1
+    assert Comment.objects.get().text == FORMS_DATA['text']
+    stats = queue.stats()
+    assert stats['depth'] == 0
+    assert stats['flushed'] == 1
+
+
+def test_comment_queue_returns_batch_on_failed_flush(
+        news, author, monkeypatch, tmp_path
+):
+    """Пакет, который не удалось записать, возвращается в очередь целиком."""
+    queue = CommentQueue(tmp_path, batch_size=1, flush_interval=1)
+    for text in ('Первый', 'Второй'):
+        queue.put(news.pk, author.pk, text)
+
+    def insert(self, records):
+        raise OperationalError('database is locked')
+
+    monkeypatch.setattr(CommentQueue, '_insert', insert)
+    with pytest.raises(OperationalError):
+        queue.flush()
+    assert not list(tmp_path.glob('*.flushing'))
+    assert queue.depth() == 2
+    monkeypatch.undo()
+    assert queue.flush() == 2
+    assert Comment.objects.count() == 2
+    # Счётчики видны и очереди другого процесса.
+    stats = CommentQueue(tmp_path, 1, 1).stats()
+    assert stats['flushes'] == 1
+    assert stats['flushed'] == 2
+    assert stats['depth'] == 0
+
+
+def test_comment_queue_recovers_only_abandoned_batches(
+        news, author, tmp_path
+):
+    """Команда --recover не трогает пакет, который ещё переносится."""
+    queue = CommentQueue(tmp_path, batch_size=10, flush_interval=1)
+    queue.put(news.pk, author.pk, 'Текст')
+    queue._seal()
+    ready, = tmp_path.glob('*.ready')
+    claimed = ready.with_suffix('.flushing')
+    ready.rename(claimed)
+    with open(claimed) as batch:
+        fcntl.flock(batch, fcntl.LOCK_EX)
+        queue.recover()
+        assert claimed.exists()
+    queue.recover()
+    assert not claimed.exists()
+    assert queue.flush() == 1
+    assert Comment.objects.count() == 1
+
+
+def test_comment_queue_keeps_accept_time(news, author, tmp_path):
+    """Время создания комментария — время приёма, а не переноса."""
+    queue = CommentQueue(tmp_path, batch_size=10, flush_interval=1)
+    queue.put(news.pk, author.pk, 'Текст')
+    accepted = json.loads(queue.active_path.read_text())['accepted']
+    time.sleep(0.05)
+    assert queue.flush() == 1
+    assert Comment.objects.get().created.timestamp() == pytest.approx(
+        accepted, abs=1e-3
+    )
@@ -0,0 +1,19 @@
+from io import StringIO
+
+from django.core.management import call_command
+
+from news.models import Comment
+
+
+def test_loadtest_reports_every_url(transactional_db, news):
+    """Команда loadtest проходит сценарии и отчитывается по каждому URL."""
+    stdout = StringIO()
+    for scenario in ('browse', 'comment'):
+        call_command(
+            'loadtest', workers=1, iterations=1,
+            scenario=[(scenario, 1)], stdout=stdout,
+        )
+    output = stdout.getvalue()
+    for view in ('news:home', 'news:detail', 'users:login'):
+        assert view in output
+    assert Comment.objects.filter(news=news).count() == 1
@@ -1,11 +1,16 @@
+import os
 import random
+from io import StringIO
 from http import HTTPStatus
 
 import pytest
+from django.core.management import call_command
+from django.urls import reverse
 from pytest_django.asserts import assertFormError, assertRedirects
 
-from news.models import Comment
+from news.models import Comment, News
 from news.forms import BAD_WORDS, WARNING
+from news.moderation import WordMatcher
 
 pytestmark = pytest.mark.django_db
 
@@ -55,6 +60,41 @@ def test_comment_contains_prohibited_words(author_client, detail_url):
     assert comments_count_after == comments_count_before
 
 
+@pytest.mark.parametrize(
+    'text, expected',
+    (
+        ('ushers', True),
+        ('ahis', True),
+        ('hxe', False),
+        ('', False),
+    ),
+)
+def test_word_matcher(text, expected):
+    """Автомат находит слова, в том числе вложенные друг в друга."""
+    matcher = WordMatcher(('he', 'she', 'his', 'hers'))
+    assert matcher.search(text) is expected
+
+
+def test_comment_contains_words_from_file(
+        author_client,
+        detail_url,
+        settings,
+        tmp_path
+):
+    """Тест на запрещённые слова из внешнего словаря с перезагрузкой."""
+    words_file = tmp_path / 'bad_words.txt'
+    words_file.write_text('# словарь\nзлодей\n', encoding='utf-8')
+    settings.BAD_WORDS_FILE = words_file
+    response = author_client.post(detail_url, data={'text': 'Вот ЗЛОДЕЙ!'})
+    assertFormError(response, form='form', field='text', errors=WARNING)
+    words_file.write_text('плут\n', encoding='utf-8')
+    os.utime(words_file, ns=(0, 0))
+    author_client.post(detail_url, data={'text': 'Вот злодей!'})
+    response = author_client.post(detail_url, data={'text': 'Вот плут!'})
+    assertFormError(response, form='form', field='text', errors=WARNING)
+    assert Comment.objects.count() == 1
+
+
 def test_authenticated_user_can_edit_own_comment(
         author_client,
         edit_url,
@@ -112,3 +152,26 @@ def test_authenticated_user_cannot_delete_others_comment(
     assert response.status_code == HTTPStatus.NOT_FOUND
     comments_count_after = Comment.objects.count()
     assert comments_count_after == comments_count_before
+
+
+def test_comment_count_follows_submit_and_delete(
+        author_client,
+        detail_url,
+        news
+):
+    """Счётчик комментариев растёт при отправке и падает при удалении."""
+    author_client.post(detail_url, data=FORMS_DATA)
+    news.refresh_from_db()
+    assert news.comment_count == 1
+    comment = Comment.objects.get()
+    author_client.delete(reverse('news:delete', args=(comment.id,)))
+    news.refresh_from_db()
+    assert news.comment_count == 0
+
+
+def test_recount_comments_repairs_counter(news, get_comments_news):
+    """Команда recount_comments восстанавливает счётчик."""
+    News.objects.update(comment_count=100)
+    call_command('recount_comments', stdout=StringIO())
+    news.refresh_from_db()
+    assert news.comment_count == Comment.objects.filter(news=news).count()
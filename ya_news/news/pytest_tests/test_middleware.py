@@ -0,0 +1,48 @@
+import asyncio
+from http import HTTPStatus
+
+import pytest
+from django.test import AsyncClient
+
+from news.middleware import capture_reports
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.mark.parametrize(
+    'url_fixture, client_fixture, view_name',
+    (
+        ('home_url', 'client', 'news:home'),
+        ('detail_url', 'client', 'news:detail'),
+        ('detail_url', 'author_client', 'news:detail'),
+        ('search_url', 'client', 'news:search'),
+        ('edit_url', 'author_client', 'news:edit'),
+        ('delete_url', 'author_client', 'news:delete'),
+    ),
+)
+def test_query_budget(
+        request,
+        query_budget,
+        get_news,
+        get_comments_news,
+        url_fixture,
+        client_fixture,
+        view_name
+):
+    """Страницы укладываются в бюджет SQL-запросов без N+1."""
+    url = request.getfixturevalue(url_fixture)
+    client = request.getfixturevalue(client_fixture)
+    report = query_budget(client, url, data={'q': 'news'})
+    assert report['view'] == view_name
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.usefixtures('async_views')
+def test_async_pages_report_queries(news, comment, detail_url):
+    """Учёт SQL-запросов видит запросы асинхронных страниц."""
+    with capture_reports() as reports:
+        response = asyncio.run(AsyncClient().get(detail_url))
+    assert response.status_code == HTTPStatus.OK
+    report, = reports
+    assert report['view'] == 'news:detail'
+    assert report['count'] > 0
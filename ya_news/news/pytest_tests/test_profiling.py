@@ -0,0 +1,41 @@
+import asyncio
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.test import AsyncClient
+
+pytestmark = pytest.mark.django_db
+
+
+def test_sampled_requests_are_profiled_and_reported(
+        tmp_path, settings, client, home_url, detail_url
+):
+    """Профили выбранных страниц сохраняются с ротацией и сводятся."""
+    settings.PROFILING_DIR = tmp_path
+    settings.PROFILING_VIEWS = {'news:detail'}
+    settings.PROFILING_KEEP = 2
+    client.get(home_url)
+    for _ in range(3):
+        client.get(detail_url)
+    assert [path.name for path in tmp_path.iterdir()] == ['news.detail']
+    assert len(list((tmp_path / 'news.detail').glob('*.prof'))) == 2
+    stdout = StringIO()
+    call_command('profile_report', '--top', '5', stdout=stdout)
+    assert 'news.detail: профилей 2' in stdout.getvalue()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_sampled_requests_are_profiled_in_async_chain(
+        tmp_path, settings, detail_url
+):
+    """В асинхронной цепочке профиль снимается вокруг ожидания ответа."""
+    settings.PROFILING_DIR = tmp_path
+    settings.PROFILING_VIEWS = {'news:detail'}
+
+    async def get():
+        return await AsyncClient().get(detail_url)
+
+    assert asyncio.run(get()).status_code == HTTPStatus.OK
+    assert len(list((tmp_path / 'news.detail').glob('*.prof'))) == 1
@@ -0,0 +1,36 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.test import Client
+
+from news.models import News
+
+pytestmark = pytest.mark.django_db
+
+FORMS_DATA = {
+    'text': 'Test comment'
+}
+
+
+@pytest.mark.django_db(transaction=True)
+def test_pages_read_lagging_replica_until_own_write(
+        replica, settings, news, client, admin_user, author_client,
+        home_url, detail_url
+):
+    """Страницы читают реплику, а написавший видит свою запись сразу."""
+    call_command('refresh_replicas', stdout=StringIO())
+    # Сессии нет на реплике, но она читается из основной базы.
+    admin_client = Client()
+    admin_client.force_login(admin_user)
+    News.objects.create(title='После копирования', text='Текст')
+    response = admin_client.get(home_url)
+    assert list(response.context['object_list']) == [news]
+    # Общий кеш анонимных страниц заполняется из основной базы.
+    assert len(client.get(home_url).context['object_list']) == 2
+    response = author_client.post(detail_url, data=FORMS_DATA)
+    assert settings.REPLICA_PIN_COOKIE in response.cookies
+    assert author_client.get(detail_url).context['comments']
+    assert not admin_client.get(detail_url).context['comments']
+    call_command('refresh_replicas', stdout=StringIO())
+    assert admin_client.get(detail_url).context['comments']
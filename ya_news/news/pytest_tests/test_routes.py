@@ -11,6 +11,7 @@ pytestmark = pytest.mark.django_db
     'url_fixture, client_fixture, expected_status',
     (
         ('home_url', 'client', HTTPStatus.OK),
+        ('search_url', 'client', HTTPStatus.OK),
         ('detail_url', 'client', HTTPStatus.OK),
         ('login_url', 'client', HTTPStatus.OK),
         ('logout_url', 'client', HTTPStatus.OK),
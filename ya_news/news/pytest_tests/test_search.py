@@ -0,0 +1,39 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from news.models import News
+
+pytestmark = pytest.mark.django_db
+
+
+def test_search_by_news_and_comments(client, news, comment, search_url):
+    """Поиск находит новость по заголовку, тексту и комментариям."""
+    other = News.objects.create(title='Другое', text='Text comment')
+    for query, expected in (
+        ('test news', [news]),
+        ('comment', [news, other]),
+        ('нет такого', []),
+    ):
+        response = client.get(search_url, {'q': query})
+        found = [item.pk for item in response.context['object_list']]
+        assert sorted(found) == sorted(item.pk for item in expected)
+
+
+def test_search_index_follows_changes(client, news, comment, search_url):
+    """Индекс поиска обновляется при изменении и удалении записей."""
+    comment.text = 'Синхрофазотрон'
+    comment.save()
+    response = client.get(search_url, {'q': 'синхрофазотрон'})
+    assert list(response.context['object_list']) == [news]
+    comment.delete()
+    response = client.get(search_url, {'q': 'синхрофазотрон'})
+    assert not response.context['object_list']
+
+
+def test_reindex_news_search(client, news, comment, search_url):
+    """Команда переиндексации восстанавливает индекс."""
+    call_command('reindex_news_search', batch_size=1, stdout=StringIO())
+    response = client.get(search_url, {'q': 'comment'})
+    assert list(response.context['object_list']) == [news]
@@ -0,0 +1,48 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from news import search, seeding
+from news.models import Comment, News
+
+pytestmark = pytest.mark.django_db
+
+
+def test_seed_news_is_consistent_and_deterministic():
+    """Команда seed_news создаёт согласованные и повторяемые данные."""
+    def snapshot():
+        return list(News.objects.order_by('pk').values_list(
+            'title', 'text', 'date', 'comment_count'
+        ))
+
+    options = {'news': 30, 'comments': 100, 'users': 5, 'seed': 7}
+    call_command('seed_news', **options, stdout=StringIO())
+    first = snapshot()
+    News.objects.all().delete()
+    call_command('seed_news', **options, stdout=StringIO())
+    assert snapshot() == first
+    assert Comment.objects.count() == 100
+    for news in News.objects.all():
+        assert news.comment_count == news.comment_set.count()
+    assert search.search_news_ids(first[0][0].split()[0], 100)
+
+
+def test_seed_news_rejects_comments_without_news():
+    """Комментарии без новостей не создаются, триггеры поиска на месте."""
+    with pytest.raises(CommandError):
+        call_command('seed_news', news=0, comments=10, stdout=StringIO())
+    assert Comment.objects.count() == 0
+
+
+def test_seed_news_restores_search_triggers_on_error(monkeypatch):
+    """Если вставка упала, триггеры поиска всё равно возвращаются."""
+    def fail(*args, **kwargs):
+        raise RuntimeError
+
+    monkeypatch.setattr(seeding, '_insert', fail)
+    with pytest.raises(RuntimeError):
+        seeding.seed_news(3, 5, 1)
+    news = News.objects.create(title='Заголовок триггера', text='Текст')
+    assert search.search_news_ids('триггера', 10) == [news.pk]
@@ -0,0 +1,20 @@
+import pytest
+from django.db import connections
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.mark.parametrize(
+    'profile, journal_mode, mmap_size',
+    (('default', 'delete', 0), ('production', 'wal', 256 * 1024 * 1024)),
+)
+def test_sqlite_profile_applies_to_new_connections(
+        replica, settings, profile, journal_mode, mmap_size
+):
+    """Новое соединение с файлом базы получает PRAGMA своего профиля."""
+    settings.SQLITE_PROFILE = profile
+    with connections[replica].cursor() as cursor:
+        cursor.execute('PRAGMA journal_mode')
+        assert cursor.fetchone()[0] == journal_mode
+        cursor.execute('PRAGMA mmap_size')
+        assert cursor.fetchone()[0] == mmap_size
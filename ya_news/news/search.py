@@ -0,0 +1,216 @@
+"""
+Полнотекстовый поиск по новостям и комментариям на SQLite FTS5.
+
+Индекс news_search не хранит сами тексты, только словарь. Новость
+хранится под rowid = 2 * id, комментарий под rowid = 2 * id + 1, так что
+по rowid без дополнительных полей понятно, к какой записи он относится.
+Индекс обновляют триггеры на таблицах новостей и комментариев.
+"""
+from django.db import connection, transaction
+
+FTS_TABLE = 'news_search'
+
+INSTALL_SQL = (
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_news_insert',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_news_delete',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_news_update',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_comment_insert',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_comment_delete',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_comment_update',
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, body, content='',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_news_insert AFTER INSERT ON news_news BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, body)
+        VALUES (new.id * 2, new.title, new.text);
+    END
+    """,
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_news_delete AFTER DELETE ON news_news BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, body)
+        VALUES ('delete', old.id * 2, old.title, old.text);
+    END
+    """,
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_news_update
+    AFTER UPDATE OF title, text ON news_news BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, body)
+        VALUES ('delete', old.id * 2, old.title, old.text);
+        INSERT INTO {FTS_TABLE}(rowid, title, body)
+        VALUES (new.id * 2, new.title, new.text);
+    END
+    """,
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_comment_insert
+    AFTER INSERT ON news_comment BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, body)
+        VALUES (new.id * 2 + 1, '', new.text);
+    END
+    """,
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_comment_delete
+    AFTER DELETE ON news_comment BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, body)
+        VALUES ('delete', old.id * 2 + 1, '', old.text);
+    END
+    """,
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_comment_update
+    AFTER UPDATE OF text ON news_comment BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, body)
+        VALUES ('delete', old.id * 2 + 1, '', old.text);
+        INSERT INTO {FTS_TABLE}(rowid, title, body)
+        VALUES (new.id * 2 + 1, '', new.text);
+    END
+    """,
+)
+
+UNINSTALL_SQL = INSTALL_SQL[:6] + (f'DROP TABLE IF EXISTS {FTS_TABLE}',)
+
+INSERT_SQL = (
+    f'INSERT INTO {FTS_TABLE}(rowid, title, body) VALUES (%s, %s, %s)'
+)
+
+
+def is_supported(db=None):
+    return (db or connection).vendor == 'sqlite'
+
+
+def _execute(db, statements):
+    with db.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+def install(db=None):
+    """Создаёт индекс и триггеры; повторный вызов восстанавливает триггеры."""
+    db = db or connection
+    if is_supported(db):
+        _execute(db, INSTALL_SQL)
+
+
+def uninstall(db=None):
+    db = db or connection
+    if is_supported(db):
+        _execute(db, UNINSTALL_SQL)
+
+
+def drop_triggers(db=None):
+    """Снимает триггеры, например на время массовой вставки."""
+    db = db or connection
+    if is_supported(db):
+        _execute(db, INSTALL_SQL[:6])
+
+
+def index_since(news_id, comment_id, db=None):
+    """
+    Индексирует новости и комментарии с id не меньше указанных.
+
+    Нужна после массовой вставки со снятыми триггерами: индексирование
+    одним запросом внутри базы быстрее, чем по строке в триггере.
+    """
+    db = db or connection
+    if not is_supported(db):
+        return
+    with transaction.atomic(using=db.alias), db.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE}(rowid, title, body) '
+            f'SELECT id * 2, title, text FROM news_news WHERE id >= %s',
+            (news_id,),
+        )
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE}(rowid, title, body) '
+            f"SELECT id * 2 + 1, '', text FROM news_comment WHERE id >= %s",
+            (comment_id,),
+        )
+
+
+def _stream(queryset, fields, batch_size):
+    """Отдаёт строки пачками по возрастанию id, не загружая всё в память."""
+    last_pk = 0
+    while True:
+        rows = list(
+            queryset.filter(pk__gt=last_pk).order_by('pk').values_list(
+                'pk', *fields
+            )[:batch_size]
+        )
+        if not rows:
+            return
+        yield rows
+        last_pk = rows[-1][0]
+
+
+def reindex(batch_size=1000, db=None):
+    """
+    Заново наполняет индекс пачками по batch_size записей.
+
+    Возвращает количество проиндексированных новостей и комментариев.
+    """
+    from .models import Comment, News
+
+    db = db or connection
+    install(db)
+    _execute(db, (
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('delete-all')",
+    ))
+    totals = []
+    sources = (
+        (News.objects.all(), ('title', 'text'), 0),
+        (Comment.objects.all(), ('text',), 1),
+    )
+    for queryset, fields, shift in sources:
+        total = 0
+        queryset = queryset.using(db.alias)
+        for rows in _stream(queryset, fields, batch_size):
+            if shift:
+                rows = [(pk, '', text) for pk, text in rows]
+            with transaction.atomic(using=db.alias), db.cursor() as cursor:
+                cursor.executemany(INSERT_SQL, [
+                    (pk * 2 + shift, title, body)
+                    for pk, title, body in rows
+                ])
+            total += len(rows)
+        totals.append(total)
+    return tuple(totals)
+
+
+def build_query(text):
+    """Экранирует слова запроса; все слова должны встретиться в записи."""
+    terms = ' '.join(
+        '"{}"'.format(word.replace('"', '""')) for word in text.split()
+    )
+    return terms or None
+
+
+def search_news_ids(text, limit, db=None):
+    """
+    Возвращает id новостей в порядке релевантности.
+
+    Новость оценивается по лучшему совпадению среди её заголовка, текста
+    и комментариев.
+    """
+    from .models import Comment
+
+    query = build_query(text)
+    if query is None:
+        return []
+    with (db or connection).cursor() as cursor:
+        cursor.execute(
+            f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+            f'ORDER BY bm25({FTS_TABLE}, 5.0, 1.0) LIMIT %s',
+            (query, limit * 10),
+        )
+        rowids = [row[0] for row in cursor.fetchall()]
+    comment_news = dict(Comment.objects.filter(
+        pk__in=[rowid // 2 for rowid in rowids if rowid % 2]
+    ).values_list('pk', 'news_id'))
+    ids = dict.fromkeys(
+        comment_news.get(rowid // 2) if rowid % 2 else rowid // 2
+        for rowid in rowids
+    )
+    ids.pop(None, None)
+    return list(ids)[:limit]
@@ -0,0 +1,164 @@
+"""
+Быстрое наполнение базы синтетическими новостями и комментариями.
+
+Данные полностью определяются параметром seed. Новости и комментарии
+вставляются пачками через cursor.executemany в обход создания объектов
+моделей: на миллионах строк именно оно, а не база, занимает почти всё
+время bulk_create. В памяти одновременно находится одна пачка и
+компактные массивы id и счётчиков. Сигналы при этом не срабатывают, так
+что счётчики комментариев вычисляются заранее и записываются сразу. На
+время вставки триггеры поиска снимаются, а новые строки индексируются
+одним запросом в конце.
+"""
+import random
+import time
+from array import array
+from datetime import date, timedelta
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.utils import timezone
+
+from news import search
+from news.models import Comment, News
+
+BATCH_SIZE = 5000
+TEXT_VARIANTS = 1000
+USER_PREFIX = 'seed-reader-'
+WORDS = (
+    'новость', 'город', 'погода', 'спорт', 'наука', 'выборы', 'рынок',
+    'технологии', 'культура', 'транспорт', 'здоровье', 'образование',
+)
+
+
+def _texts(rng, words):
+    """Заранее собранные тексты: выбирать готовый быстрее, чем склеивать."""
+    return [
+        ' '.join(rng.choice(WORDS) for _ in range(words))
+        for _ in range(TEXT_VARIANTS)
+    ]
+
+
+def _next_id(model):
+    last_id = model.objects.order_by('-pk').values_list(
+        'pk', flat=True
+    ).first()
+    return (last_id or 0) + 1
+
+
+def _insert(model, fields, rows, total, batch_size, progress):
+    """
+    Вставляет строки пачками, сообщая о ходе работы.
+
+    Значения в rows должны быть уже подготовлены для базы.
+    """
+    quote = connection.ops.quote_name
+    columns = [model._meta.get_field(field).column for field in fields]
+    sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+        quote(model._meta.db_table),
+        ', '.join(quote(column) for column in columns),
+        ', '.join(['%s'] * len(columns)),
+    )
+    started = time.perf_counter()
+    done = 0
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            return done
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.executemany(sql, batch)
+        done += len(batch)
+        if progress is not None:
+            progress(model, done, total, time.perf_counter() - started)
+
+
+def seed_users(count, batch_size=BATCH_SIZE, progress=None):
+    """
+    Создаёт пользователей seed-reader-N без пароля.
+
+    Уже существующие пропускаются, поэтому повторный запуск безопасен.
+    Возвращает id всех таких пользователей.
+    """
+    User = get_user_model()
+    password = make_password(None)
+    User.objects.bulk_create(
+        (
+            User(username=f'{USER_PREFIX}{index}', password=password)
+            for index in range(count)
+        ),
+        batch_size=batch_size,
+        ignore_conflicts=True,
+    )
+    return array('q', User.objects.filter(
+        username__startswith=USER_PREFIX
+    ).order_by('pk').values_list('pk', flat=True)[:count])
+
+
+def seed_news(news, comments, users, seed=0, batch_size=BATCH_SIZE,
+              progress=None):
+    """
+    Создаёт news новостей, comments комментариев и users читателей.
+
+    Каждый десятый комментарий достаётся первой созданной новости, чтобы в
+    базе была страница с длинной лентой комментариев. Возвращает id этой
+    новости.
+    """
+    if comments and not news:
+        raise ValueError('Комментариям нужна хотя бы одна новость.')
+    rng = random.Random(seed)
+    titles, texts, comment_texts = (
+        _texts(rng, 3), _texts(rng, 40), _texts(rng, 12)
+    )
+    user_ids = seed_users(max(users, 1), batch_size, progress)
+    counts = array('I', bytes(4 * news))
+    for index in range(comments):
+        counts[0 if index % 10 == 0 else rng.randrange(news)] += 1
+
+    first_id = _next_id(News)
+    first_comment_id = _next_id(Comment)
+    today = date.today()
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+    search.drop_triggers()
+    try:
+        _insert(
+            News,
+            ('title', 'text', 'date', 'comment_count', 'modified'),
+            (
+                (
+                    titles[rng.randrange(TEXT_VARIANTS)][:50],
+                    texts[rng.randrange(TEXT_VARIANTS)],
+                    connection.ops.adapt_datefield_value(
+                        today - timedelta(days=index // 10)
+                    ),
+                    counts[index],
+                    now,
+                )
+                for index in range(news)
+            ),
+            news, batch_size, progress,
+        )
+        news_ids = array('q', News.objects.filter(pk__gte=first_id).order_by(
+            'pk'
+        ).values_list('pk', flat=True))
+        _insert(
+            Comment,
+            ('news', 'author', 'text', 'created', 'modified'),
+            (
+                (
+                    news_ids[index],
+                    user_ids[rng.randrange(len(user_ids))],
+                    comment_texts[rng.randrange(TEXT_VARIANTS)],
+                    now,
+                    now,
+                )
+                for index in range(news)
+                for _ in range(counts[index])
+            ),
+            comments, batch_size, progress,
+        )
+    finally:
+        search.install()
+    search.index_since(first_id, first_comment_id)
+    return news_ids[0] if news_ids else None
@@ -0,0 +1,38 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import invalidate_news
+from .models import Comment, News
+
+
+@receiver(post_save, sender=Comment)
+def increase_comment_count(sender, instance, created, raw, **kwargs):
+    """Учитываем новый комментарий в счётчике новости."""
+    if raw:
+        return
+    news = News.objects.filter(pk=instance.news_id)
+    if created:
+        news.change_comment_count(1)
+    else:
+        news.touch()
+
+
+@receiver(post_delete, sender=Comment)
+def decrease_comment_count(sender, instance, **kwargs):
+    """Убираем удалённый комментарий из счётчика новости."""
+    News.objects.filter(pk=instance.news_id).change_comment_count(-1)
+
+
+@receiver(post_save, sender=News)
+@receiver(post_delete, sender=News)
+def invalidate_news_pages(sender, instance, **kwargs):
+    """Сбрасываем кеш страниц после фиксации изменений новости."""
+    transaction.on_commit(lambda: invalidate_news(instance.pk))
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment_pages(sender, instance, **kwargs):
+    """Сбрасываем кеш страниц новости после изменения комментария."""
+    transaction.on_commit(lambda: invalidate_news(instance.news_id))
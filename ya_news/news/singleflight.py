@@ -0,0 +1,169 @@
+"""
+Пересчёт закешированных значений в один поток.
+
+Когда запись устаревает, пересчитывать её берётся только тот, кто
+захватил блокировку ключа, остальные получают прежнее значение. Запись
+может быть пересчитана и чуть раньше срока: вероятность растёт по мере
+приближения к нему и с ростом времени пересчёта (алгоритм XFetch), так
+что популярные ключи обновляются до того, как истекут.
+
+Блокировка работает между потоками процесса, а между процессами — через
+файл в settings.SINGLE_FLIGHT_LOCK_DIR или, если каталог не задан,
+через cache.add.
+"""
+import math
+import os
+import random
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import cache
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+POLL_INTERVAL = 0.01
+
+_thread_locks = weakref.WeakValueDictionary()
+_thread_locks_guard = threading.Lock()
+_counters = {'hits': 0, 'misses': 0, 'stale': 0, 'lock_waits': 0}
+_counters_lock = threading.Lock()
+
+
+def _count(name):
+    with _counters_lock:
+        _counters[name] += 1
+
+
+def stats():
+    """Счётчики попаданий, промахов, устаревших ответов и ожиданий."""
+    with _counters_lock:
+        return dict(_counters)
+
+
+def reset_stats():
+    with _counters_lock:
+        for name in _counters:
+            _counters[name] = 0
+
+
+def _thread_lock(key):
+    with _thread_locks_guard:
+        lock = _thread_locks.get(key)
+        if lock is None:
+            lock = _thread_locks[key] = threading.Lock()
+        return lock
+
+
+def _try_file_lock(path):
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        os.close(fd)
+        return None
+
+    def release():
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+    return release
+
+
+def _try_cache_lock(key, timeout):
+    lock_key = f'singleflight:lock:{key}'
+    if not cache.add(lock_key, 1, timeout):
+        return None
+    return lambda: cache.delete(lock_key)
+
+
+def _try_process_lock(key, timeout):
+    directory = getattr(settings, 'SINGLE_FLIGHT_LOCK_DIR', None)
+    if directory and fcntl is not None:
+        name = md5(key.encode()).hexdigest()
+        return _try_file_lock(os.path.join(directory, f'{name}.lock'))
+    return _try_cache_lock(key, timeout)
+
+
+@contextmanager
+def key_lock(key, wait, timeout):
+    """
+    Захватывает блокировку ключа.
+
+    Отдаёт True, если блокировка получена. С wait=True ждёт её не дольше
+    timeout секунд, иначе сразу сдаётся.
+    """
+    thread_lock = _thread_lock(key)
+    deadline = time.monotonic() + timeout
+    if not thread_lock.acquire(timeout=timeout if wait else 0):
+        yield False
+        return
+    try:
+        release = _try_process_lock(key, timeout)
+        while release is None and wait and time.monotonic() < deadline:
+            time.sleep(POLL_INTERVAL)
+            release = _try_process_lock(key, timeout)
+        try:
+            yield release is not None
+        finally:
+            if release is not None:
+                release()
+    finally:
+        thread_lock.release()
+
+
+def _is_fresh(entry, beta):
+    """Свежа ли запись с учётом раннего вероятностного обновления."""
+    early = -entry['delta'] * beta * math.log(1 - random.random())
+    return time.time() + early < entry['expires']
+
+
+def _compute(key, compute, ttl, stale_ttl, store):
+    started = time.time()
+    value = compute()
+    if store(value):
+        cache.set(key, {
+            'value': value,
+            'delta': time.time() - started,
+            'expires': time.time() + ttl,
+        }, ttl + stale_ttl)
+    return value
+
+
+def get_or_compute(key, compute, ttl, stale_ttl=None, beta=1.0,
+                   store=lambda value: True):
+    """
+    Возвращает значение ключа, пересчитывая его не более чем в одном потоке.
+
+    Запись хранится ttl секунд как свежая и ещё stale_ttl секунд как
+    устаревшая. Пока один поток пересчитывает устаревшую запись, остальные
+    получают её прежнее значение. Если записи нет совсем, остальные ждут
+    пересчёта. Функция store решает, можно ли сохранить результат.
+    """
+    if stale_ttl is None:
+        stale_ttl = settings.SINGLE_FLIGHT_STALE_TTL
+    lock_timeout = settings.SINGLE_FLIGHT_LOCK_TIMEOUT
+    entry = cache.get(key)
+    if entry is not None:
+        if _is_fresh(entry, beta):
+            _count('hits')
+            return entry['value']
+        with key_lock(key, wait=False, timeout=lock_timeout) as acquired:
+            if acquired:
+                _count('misses')
+                return _compute(key, compute, ttl, stale_ttl, store)
+        _count('stale')
+        return entry['value']
+    with key_lock(key, wait=True, timeout=lock_timeout):
+        entry = cache.get(key)
+        if entry is not None:
+            _count('lock_waits')
+            return entry['value']
+        _count('misses')
+        return _compute(key, compute, ttl, stale_ttl, store)
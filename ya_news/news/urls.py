@@ -1,12 +1,22 @@
+from django.conf import settings
 from django.urls import path
 
-from news import views
+from news import events, views
 
 app_name = 'news'
 
+if settings.NEWS_ASYNC_VIEWS:
+    home_view = views.news_list_async
+    detail_view = views.news_detail_async
+else:
+    home_view = views.NewsList.as_view()
+    detail_view = views.NewsDetailView.as_view()
+
 urlpatterns = [
-    path('', views.NewsList.as_view(), name='home'),
-    path('news/<int:pk>/', views.NewsDetailView.as_view(), name='detail'),
+    path('', home_view, name='home'),
+    path('search/', views.NewsSearch.as_view(), name='search'),
+    path('news/<int:pk>/', detail_view, name='detail'),
+    path('news/<int:pk>/events/', events.news_events, name='events'),
     path(
         'delete_comment/<int:pk>/',
         views.CommentDelete.as_view(),
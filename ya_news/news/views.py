@@ -1,42 +1,203 @@
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from hashlib import md5
+
 from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.exceptions import ImproperlyConfigured
+from django.core.handlers.asgi import ASGIRequest
+from django.db import close_old_connections, transaction
+from django.db.models import Case, Q, When
 from django.shortcuts import get_object_or_404
 from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.decorators import method_decorator
+from django.utils.http import quote_etag
 from django.views import generic
+from django.views.decorators.http import condition
+from django.views.decorators.vary import vary_on_cookie
 
+from . import cache as page_cache, events, replicas, search, singleflight
 from .forms import CommentForm
+from .ingestion import get_comment_queue
 from .models import Comment, News
+from .pagination import keyset_filter, next_cursor
+
+FEED_KEY = ('date', 'id')
+_executor = None
+COMMENTS_KEY = ('created', 'id')
+
+
+def page_etag(request, *parts):
+    """
+    Тег ETag страницы с учётом того, кто и какую её часть смотрит.
+
+    Страница авторизованного пользователя содержит форму с CSRF-токеном и
+    ссылки на правку его комментариев, поэтому в тег входят пользователь,
+    CSRF-cookie и строка запроса.
+    """
+    parts += (
+        request.user.pk,
+        request.COOKIES.get(settings.CSRF_COOKIE_NAME),
+        request.META.get('QUERY_STRING', ''),
+    )
+    return quote_etag(md5(repr(parts).encode()).hexdigest())
+
+
+def news_etag(request, pk):
+    """
+    Тег ETag страницы новости.
 
+    Last-Modified страница не отдаёт: время изменения одно для всех, и
+    If-Modified-Since не отличил бы страницу автора от анонимной.
+    """
+    modified = News.objects.filter(pk=pk).values_list(
+        'modified', flat=True
+    ).first()
+    if modified is None:
+        return None
+    return page_etag(request, 'news', pk, modified.timestamp())
 
-class NewsList(generic.ListView):
+
+class AnonymousCacheMixin:
+    """
+    Кеширует страницу целиком для анонимных посетителей.
+
+    Авторизованные пользователи видят форму комментария, поэтому для них
+    страница всегда строится заново. Область кеша задаёт cache_scope или
+    get_cache_scope, а cache_params перечисляет параметры запроса, от
+    которых зависит страница.
+    """
+
+    cache_scope = None
+    cache_params = ('cursor',)
+
+    def get_cache_scope(self):
+        return self.cache_scope
+
+    def dispatch(self, request, *args, **kwargs):
+        if (request.method not in ('GET', 'HEAD')
+                or request.user.is_authenticated):
+            return super().dispatch(request, *args, **kwargs)
+        scope = self.get_cache_scope()
+        if scope is None:
+            raise ImproperlyConfigured(
+                f'{type(self).__name__} не задаёт cache_scope.'
+            )
+        key = page_cache.page_key(scope, request, self.cache_params)
+        response = singleflight.get_or_compute(
+            key,
+            lambda: self.render_page(request, *args, **kwargs),
+            settings.NEWS_PAGE_CACHE_TIMEOUT,
+            store=self.is_cacheable,
+        )
+        return get_conditional_response(
+            request, etag=response.get('ETag'), response=response
+        )
+
+    def render_page(self, request, *args, **kwargs):
+        with replicas.primary():
+            response = super().dispatch(request, *args, **kwargs)
+            if callable(getattr(response, 'render', None)):
+                response.render()
+        return response
+
+    @staticmethod
+    def is_cacheable(response):
+        return response.status_code == 200 and not response.cookies
+
+
+class NewsList(AnonymousCacheMixin, generic.ListView):
     """Список новостей."""
     model = News
     template_name = 'news/home.html'
+    cache_scope = page_cache.HOME
 
     def get_queryset(self):
         """
         Выводим только несколько последних новостей.
 
-        Их количество определяется в настройках проекта.
+        Их количество определяется в настройках проекта. Более старые
+        новости листаются курсором по паре (date, id).
         """
-        return self.model.objects.prefetch_related(
-            'comment_set'
+        self.feed = self.model.objects.all()
+        return keyset_filter(
+            self.feed, FEED_KEY, self.request.GET.get('cursor'),
+            descending=True
         )[:settings.NEWS_COUNT_ON_HOME_PAGE]
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['next_cursor'] = next_cursor(
+            self.feed, FEED_KEY, context['object_list'], descending=True
+        )
+        return context
+
+
+class NewsSearch(generic.ListView):
+    """Поиск по новостям и комментариям к ним."""
+    model = News
+    template_name = 'news/search.html'
+
+    def get_queryset(self):
+        """Новости в порядке релевантности запросу."""
+        text = self.request.GET.get('q', '').strip()
+        queryset = self.model.objects.all()
+        if not text:
+            return queryset.none()
+        limit = settings.NEWS_SEARCH_LIMIT
+        if not search.is_supported():
+            return queryset.filter(
+                Q(title__icontains=text) | Q(text__icontains=text)
+                | Q(comment__text__icontains=text)
+            ).distinct()[:limit]
+        ids = search.search_news_ids(text, limit)
+        return queryset.filter(pk__in=ids).order_by(
+            Case(*(When(pk=pk, then=rank) for rank, pk in enumerate(ids)))
+        )
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['query'] = self.request.GET.get('q', '')
+        return context
+
 
-class NewsDetail(generic.DetailView):
+@method_decorator(vary_on_cookie, name='get')
+@method_decorator(
+    condition(etag_func=news_etag),
+    name='get'
+)
+class NewsDetail(AnonymousCacheMixin, generic.DetailView):
     model = News
     template_name = 'news/detail.html'
 
+    def get_cache_scope(self):
+        return page_cache.detail_scope(self.kwargs['pk'])
+
     def get_object(self, queryset=None):
-        obj = get_object_or_404(
-            self.model.objects.prefetch_related('comment_set__author'),
-            pk=self.kwargs['pk']
-        )
+        obj = get_object_or_404(self.model, pk=self.kwargs['pk'])
         return obj
 
+    def get_comments(self):
+        """Комментарии новости с подгрузкой только нужных полей автора."""
+        return Comment.objects.filter(news=self.object).select_related(
+            'author'
+        ).only('news', 'text', 'created', 'author__username')
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
+        comments = self.get_comments()
+        context['comments'] = list(keyset_filter(
+            comments, COMMENTS_KEY, self.request.GET.get('cursor')
+        )[:settings.COMMENTS_COUNT_ON_NEWS_PAGE])
+        context['next_cursor'] = next_cursor(
+            comments, COMMENTS_KEY, context['comments']
+        )
+        # Поток новых комментариев держит соединение, и под WSGI он занял
+        # бы поток сервера, см. news.events.
+        context['live_comments'] = isinstance(self.request, ASGIRequest)
         if self.request.user.is_authenticated:
             context['form'] = CommentForm()
         return context
@@ -56,15 +217,24 @@ class NewsComment(
         return super().post(request, *args, **kwargs)
 
     def form_valid(self, form):
+        if settings.COMMENT_QUEUE_ENABLED:
+            get_comment_queue().put(
+                self.object.pk, self.request.user.pk,
+                form.cleaned_data['text']
+            )
+            return super().form_valid(form)
         comment = form.save(commit=False)
         comment.news = self.object
         comment.author = self.request.user
-        comment.save()
+        with transaction.atomic():
+            comment.save()
+            transaction.on_commit(lambda: events.publish(comment.news_id))
         return super().form_valid(form)
 
     def get_success_url(self):
-        post = self.get_object()
-        return reverse('news:detail', kwargs={'pk': post.pk}) + '#comments'
+        return reverse(
+            'news:detail', kwargs={'pk': self.object.pk}
+        ) + '#comments'
 
 
 class NewsDetailView(generic.View):
@@ -83,9 +253,8 @@ class CommentBase(LoginRequiredMixin):
     model = Comment
 
     def get_success_url(self):
-        comment = self.get_object()
         return reverse(
-            'news:detail', kwargs={'pk': comment.news.pk}
+            'news:detail', kwargs={'pk': self.object.news_id}
         ) + '#comments'
 
     def get_queryset(self):
@@ -102,3 +271,58 @@ class CommentUpdate(CommentBase, generic.UpdateView):
 class CommentDelete(CommentBase, generic.DeleteView):
     """Удаление комментария."""
     template_name = 'news/delete.html'
+
+    def delete(self, request, *args, **kwargs):
+        with transaction.atomic():
+            return super().delete(request, *args, **kwargs)
+
+
+def get_executor():
+    """Пул потоков, в котором асинхронные представления обращаются к базе."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            settings.NEWS_ASYNC_POOL_SIZE, thread_name_prefix='news-async'
+        )
+    return _executor
+
+
+def _render(view, request, *args, **kwargs):
+    close_old_connections()
+    try:
+        response = view(request, *args, **kwargs)
+        if hasattr(response, 'render'):
+            # Ленивые запросы шаблона тоже должны выполниться в пуле.
+            response.render()
+        return response
+    finally:
+        close_old_connections()
+
+
+async def run_in_pool(view, request, *args, **kwargs):
+    """
+    Выполняет синхронное представление в ограниченном пуле потоков.
+
+    Цикл событий при этом свободен, а одновременно к базе обращаются не
+    больше settings.NEWS_ASYNC_POOL_SIZE потоков.
+    """
+    loop = asyncio.get_running_loop()
+    # Контекст нужен роутеру реплик, см. news.replicas.
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(get_executor(), functools.partial(
+        context.run, _render, view, request, *args, **kwargs
+    ))
+
+
+async def news_list_async(request, *args, **kwargs):
+    """Асинхронный вариант NewsList для развёртывания через ASGI."""
+    return await run_in_pool(NewsList.as_view(), request, *args, **kwargs)
+
+
+async def news_detail_async(request, *args, **kwargs):
+    """Асинхронный вариант NewsDetailView: страница новости и комментарий."""
+    if request.method == 'POST':
+        view = NewsComment.as_view()
+    else:
+        view = NewsDetail.as_view()
+    return await run_in_pool(view, request, *args, **kwargs)
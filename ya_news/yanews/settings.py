@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 from django.urls import reverse_lazy
@@ -21,11 +22,14 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'news.middleware.QueryInspectorMiddleware',
+    'news.replicas.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'news.profiling.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -55,9 +59,49 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
     }
 }
 
+# Профиль соединений SQLite, см. news.sqlite.
+SQLITE_PROFILES = {
+    # Настройки SQLite по умолчанию. Режим журнала указан явно: WAL
+    # сохраняется в файле базы и пережил бы смену профиля.
+    'default': {'journal_mode': 'delete'},
+    'production': {
+        'journal_mode': 'wal',
+        'synchronous': 'normal',
+        'busy_timeout': 5000,
+        'mmap_size': 256 * 1024 * 1024,
+        'cache_size': -16 * 1024,
+        'temp_store': 'memory',
+    },
+}
+SQLITE_PROFILE = os.environ.get('SQLITE_PROFILE', 'production')
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'yanews',
+    },
+    # Сессии и пользователи, см. news.auth: кеш в памяти у каждого
+    # процесса свой, и выход в одном процессе не был бы виден другим.
+    'auth': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'auth_cache',
+        'OPTIONS': {'MAX_ENTRIES': 100_000},
+    },
+}
+
+# Кеш сессий и пользователей, см. news.auth.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+SESSION_CACHE_ALIAS = 'auth'
+AUTHENTICATION_BACKENDS = [
+    'news.auth.CachedModelBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+AUTH_USER_CACHE_TIMEOUT = 300
+
 
 AUTH_PASSWORD_VALIDATORS = []
 
@@ -80,3 +124,71 @@ LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('news:home')
 
 NEWS_COUNT_ON_HOME_PAGE = 10
+
+COMMENTS_COUNT_ON_NEWS_PAGE = 50
+
+NEWS_PAGE_CACHE_TIMEOUT = 60 * 5
+
+# Пересчёт кеша в один поток, см. news.singleflight.
+SINGLE_FLIGHT_STALE_TTL = 60
+SINGLE_FLIGHT_LOCK_TIMEOUT = 10
+SINGLE_FLIGHT_LOCK_DIR = None
+
+NEWS_SEARCH_LIMIT = 20
+
+BAD_WORDS_FILE = BASE_DIR / 'bad_words.txt'
+
+# Отложенная пакетная запись комментариев, см. news.ingestion.
+COMMENT_QUEUE_ENABLED = False
+COMMENT_QUEUE_DIR = BASE_DIR / 'comment_queue'
+COMMENT_QUEUE_BATCH_SIZE = 500
+COMMENT_QUEUE_FLUSH_INTERVAL = 1.0
+COMMENT_QUEUE_WORKER = True
+
+# Учёт SQL-запросов, см. news.middleware.
+QUERY_INSPECTOR_ENABLED = False
+QUERY_REPEAT_THRESHOLD = 3
+QUERY_BUDGETS = {
+    'news:home': 2,
+    'news:detail': 6,
+    'news:search': 3,
+    'news:edit': 4,
+    'news:delete': 4,
+}
+
+# Выборочное профилирование запросов, см. news.profiling.
+PROFILING_SAMPLE_RATE = float(os.environ.get('PROFILING_SAMPLE_RATE', 0))
+PROFILING_VIEWS = set(filter(None, os.environ.get(
+    'PROFILING_VIEWS', ''
+).split(',')))
+PROFILING_HEADER = 'X-Profile'
+PROFILING_DIR = BASE_DIR / 'profiles'
+PROFILING_KEEP = 100
+
+# Асинхронные страницы для ASGI, см. news.views.run_in_pool.
+NEWS_ASYNC_VIEWS = os.environ.get('NEWS_ASYNC_VIEWS') == '1'
+NEWS_ASYNC_POOL_SIZE = 16
+
+# Поток новых комментариев, см. news.events.
+NEWS_EVENTS_POLL_INTERVAL = 5
+NEWS_EVENTS_BATCH_SIZE = 100
+NEWS_EVENTS_RETRY = 3000
+
+# Чтение страниц с реплик, см. news.replicas.
+DATABASE_REPLICAS = [
+    f'replica{number}'
+    for number in range(1, int(os.environ.get('DB_REPLICAS', 0)) + 1)
+]
+DATABASES.update({
+    alias: {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / f'db.{alias}.sqlite3',
+        'CONN_MAX_AGE': DATABASES['default']['CONN_MAX_AGE'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    for alias in DATABASE_REPLICAS
+})
+DATABASE_ROUTERS = ['news.replicas.ReplicaRouter']
+REPLICA_VIEWS = {'news:home', 'news:detail'}
+REPLICA_PIN_SECONDS = 5
+REPLICA_PIN_COOKIE = 'read_primary_until'
@@ -0,0 +1,59 @@
+"""
+Сравнение двух прогонов benchmarks.routes.
+
+Завершается с кодом 1, если медианное время какой-либо страницы выросло
+больше допустимого или страница стала делать больше SQL-запросов.
+
+    python -m benchmarks.compare old.json new.json --threshold 0.2
+"""
+import argparse
+import json
+import sys
+
+
+def load(path):
+    with open(path, encoding='utf-8') as source:
+        data = json.load(source)
+    return data, {
+        (result['size'], result['route'], result['client']): result
+        for result in data['results']
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('baseline')
+    parser.add_argument('candidate')
+    parser.add_argument(
+        '--threshold', type=float, default=0.2,
+        help='Допустимый относительный рост медианы времени ответа.',
+    )
+    args = parser.parse_args()
+    baseline_info, baseline = load(args.baseline)
+    candidate_info, candidate = load(args.candidate)
+    print(f'{baseline_info["commit"]} -> {candidate_info["commit"]}')
+    regressions = 0
+    for key in sorted(baseline.keys() & candidate.keys()):
+        old, new = baseline[key], candidate[key]
+        ratio = new['median_ms'] / old['median_ms'] if old['median_ms'] else 1
+        slower = ratio > 1 + args.threshold
+        more_queries = (
+            old['queries'] is not None and new['queries'] is not None
+            and new['queries'] > old['queries']
+        )
+        mark = 'РЕГРЕССИЯ' if slower or more_queries else ''
+        regressions += bool(mark)
+        size, route, client = key
+        print(
+            f'{size:>8} {route:<14} {client:<10} '
+            f'{old["median_ms"]:8.1f} -> {new["median_ms"]:8.1f} мс '
+            f'({ratio:4.2f}x), запросов {old["queries"]} -> '
+            f'{new["queries"]} {mark}'
+        )
+    for key in sorted(baseline.keys() ^ candidate.keys()):
+        print(f'{key}: есть только в одном из прогонов')
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""
+Память и время ответа страницы notes:list у пользователя с большим
+количеством заметок: прежняя выборка всех заметок против постраничной.
+
+Запуск из каталога ya_note:
+    python -m benchmarks.notes_list --notes 10000 50000
+"""
+import argparse
+import time
+import tracemalloc
+
+from benchmarks import create_database, setup
+
+setup()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.template.loader import render_to_string  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.urls import reverse  # noqa: E402
+
+from notes.models import Note  # noqa: E402
+
+TEXT = 'Подробности заметки. ' * 100
+
+
+def seed(user, count, offset):
+    Note.objects.bulk_create(
+        (
+            Note(
+                title=f'Заметка {index}', text=TEXT,
+                slug=f'note-{offset + index}', author=user,
+            )
+            for index in range(count)
+        ),
+        batch_size=1000,
+    )
+
+
+def measure(action, repeat):
+    """Возвращает среднее время в мс и пик памяти в КБ."""
+    tracemalloc.start()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        action()
+    elapsed = (time.perf_counter() - started) / repeat * 1000
+    peak = tracemalloc.get_traced_memory()[1] / 1024
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def render_full_list(user):
+    """Прежнее поведение: все заметки пользователя целиком."""
+    return render_to_string('notes/list.html', {
+        'object_list': Note.objects.filter(author=user),
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        '--notes', type=int, nargs='+', default=(10_000, 50_000)
+    )
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    destroy = create_database()
+    try:
+        url = reverse('notes:list')
+        print(
+            f'{"заметок":>8} {"вариант":>10} {"мс":>10} {"пик, КБ":>10}'
+        )
+        offset = 0
+        for count in args.notes:
+            user = get_user_model().objects.create(username=f'user{count}')
+            seed(user, count, offset)
+            offset += count
+            client = Client()
+            client.force_login(user)
+            rows = (
+                ('весь список', lambda: render_full_list(user)),
+                ('страница', lambda: client.get(url)),
+                ('последняя', lambda: client.get(url, {'page': 'last'})),
+            )
+            for name, action in rows:
+                elapsed, peak = measure(action, args.repeat)
+                print(f'{count:>8} {name:>10} {elapsed:>10.1f} {peak:>10.0f}')
+    finally:
+        destroy()
+
+
+if __name__ == '__main__':
+    main()
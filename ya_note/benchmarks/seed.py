@@ -0,0 +1,20 @@
+"""Наполнение базы для бенчмарков заданным количеством заметок."""
+from django.contrib.auth import get_user_model
+
+from notes.models import Note
+from notes.seeding import seed_notes
+
+
+def seed(size, seed=0):
+    """
+    Создаёт size заметок через notes.seeding.
+
+    Возвращает словарь с автором длинного списка заметок и его заметкой.
+    """
+    author = get_user_model().objects.get(
+        pk=seed_notes(size, max(size // 100, 1), seed=seed)
+    )
+    return {
+        'author': author,
+        'note': Note.objects.filter(author=author).first(),
+    }
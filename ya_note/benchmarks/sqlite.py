@@ -0,0 +1,145 @@
+"""
+Одновременные чтение и запись в SQLite: профиль по умолчанию против
+рабочего профиля notes.sqlite.
+
+Читатели в потоках выбирают страницу списка заметок автора и одну его
+заметку, писатели добавляют заметки вместе с записью в каталоге адресов
+и индексе поиска. База лежит в файле, как в рабочем развёртывании: в
+памяти режим WAL недоступен.
+
+Запуск из каталога ya_note:
+    python -m benchmarks.sqlite --readers 8 --writers 2 --duration 5
+"""
+import argparse
+import random
+import statistics
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from benchmarks import create_database, setup
+
+setup()
+
+from django.conf import settings  # noqa: E402
+from django.db import (  # noqa: E402
+    OperationalError, connection, connections, transaction,
+)
+
+from benchmarks.seed import seed  # noqa: E402
+from notes.models import Note  # noqa: E402
+
+
+def read(rng, notes):
+    author_id, slug = rng.choice(notes)
+    list(Note.objects.for_author(author_id).only(
+        'id', 'slug', 'title'
+    ).order_by('id')[:settings.NOTES_COUNT_ON_PAGE])
+    Note.objects.for_author(author_id).get(slug=slug)
+
+
+def write(rng, notes):
+    author_id, _ = rng.choice(notes)
+    with transaction.atomic():
+        Note.objects.create(
+            title=f'Замер {uuid.uuid4().hex}', text='Текст',
+            author_id=author_id,
+        )
+
+
+def worker(operation, seed, deadline, start, notes):
+    """Выполняет operation до deadline; возвращает время и число ошибок."""
+    rng = random.Random(seed)
+    timings = []
+    errors = 0
+    start.wait()
+    try:
+        while time.perf_counter() < deadline[0]:
+            started = time.perf_counter()
+            try:
+                operation(rng, notes)
+            except OperationalError:
+                # «database is locked»: запрос не дождался блокировки.
+                errors += 1
+                continue
+            timings.append(time.perf_counter() - started)
+    finally:
+        connection.close()
+    return timings, errors
+
+
+def run(profile, readers, writers, duration, notes):
+    settings.SQLITE_PROFILE = profile
+    connections.close_all()
+    # Режим журнала хранится в файле базы: включаем его до замера.
+    connection.ensure_connection()
+    start = threading.Barrier(readers + writers + 1)
+    deadline = [0]
+    operations = [read] * readers + [write] * writers
+    with ThreadPoolExecutor(len(operations)) as executor:
+        futures = [
+            executor.submit(
+                worker, operation, index, deadline, start, notes
+            )
+            for index, operation in enumerate(operations)
+        ]
+        deadline[0] = time.perf_counter() + duration
+        start.wait()
+        timings = {read: [], write: []}
+        errors = dict.fromkeys(timings, 0)
+        for operation, future in zip(operations, futures):
+            operation_timings, operation_errors = future.result()
+            timings[operation].extend(
+                seconds * 1000 for seconds in operation_timings
+            )
+            errors[operation] += operation_errors
+    return {
+        name: (sorted(timings[operation]), errors[operation])
+        for name, operation in (('чтение', read), ('запись', write))
+    }
+
+
+def summarize(profile, results, duration):
+    for name, (timings, errors) in results.items():
+        p95 = timings[int(len(timings) * 0.95) - 1] if timings else 0
+        median = statistics.median(timings) if timings else 0
+        print(
+            f'{profile:>10} {name:>7} {len(timings) / duration:>10.0f} '
+            f'{median:>9.1f} {p95:>9.1f} {errors:>7}'
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--duration', type=float, default=5)
+    parser.add_argument('--size', type=int, default=1000)
+    parser.add_argument(
+        '--profiles', nargs='+', default=('default', 'production'),
+        choices=sorted(settings.SQLITE_PROFILES),
+    )
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        destroy = create_database(str(Path(directory) / 'bench.sqlite3'))
+        try:
+            seed(args.size)
+            notes = list(Note.objects.values_list('author_id', 'slug'))
+            print(
+                f'{"профиль":>10} {"":>7} {"в секунду":>10} '
+                f'{"p50, мс":>9} {"p95, мс":>9} {"ошибок":>7}'
+            )
+            for profile in args.profiles:
+                summarize(profile, run(
+                    profile, args.readers, args.writers, args.duration, notes
+                ), args.duration)
+        finally:
+            connections.close_all()
+            destroy()
+
+
+if __name__ == '__main__':
+    main()
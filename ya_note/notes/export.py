@@ -0,0 +1,72 @@
+"""
+Потоковая выгрузка заметок пользователя.
+
+Заметки читаются из базы итератором пачками по CHUNK_SIZE строк и сразу
+отдаются клиенту, поэтому память не растёт с числом заметок. Архив zip
+содержит один файл notes.jsonl и пишется в поток без перемотки: zipfile
+умеет так работать, если поток не поддерживает seek.
+"""
+import io
+import json
+import zipfile
+
+from .models import Note
+
+CHUNK_SIZE = 1000
+FIELDS = ('id', 'slug', 'title', 'text', 'modified')
+MEMBER_NAME = 'notes.jsonl'
+
+
+def jsonl_chunks(user):
+    """Заметки пользователя в формате JSON Lines, пачками байтов."""
+    rows = Note.objects.for_author(user).order_by('id').values_list(
+        *FIELDS
+    ).iterator(chunk_size=CHUNK_SIZE)
+    lines = []
+    for row in rows:
+        note = dict(zip(FIELDS, row))
+        note['modified'] = note['modified'].isoformat()
+        lines.append(json.dumps(note, ensure_ascii=False))
+        if len(lines) == CHUNK_SIZE:
+            yield ('\n'.join(lines) + '\n').encode()
+            lines = []
+    if lines:
+        yield ('\n'.join(lines) + '\n').encode()
+
+
+class _Pipe(io.RawIOBase):
+    """Поток без перемотки, из которого забирают записанные байты."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def zip_chunks(user):
+    """Архив zip с заметками пользователя, пачками байтов."""
+    pipe = _Pipe()
+    with zipfile.ZipFile(pipe, 'w', zipfile.ZIP_DEFLATED) as archive:
+        with archive.open(MEMBER_NAME, 'w', force_zip64=True) as member:
+            for chunk in jsonl_chunks(user):
+                member.write(chunk)
+                data = pipe.drain()
+                if data:
+                    yield data
+    yield pipe.drain()
+
+
+FORMATS = {
+    'jsonl': (jsonl_chunks, 'application/x-ndjson', 'notes.jsonl'),
+    'zip': (zip_chunks, 'application/zip', 'notes.zip'),
+}
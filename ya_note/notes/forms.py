@@ -3,7 +3,7 @@ from pytils.translit import slugify
 from django import forms
 from django.core.exceptions import ValidationError
 
-from .models import Note
+from .models import Note, NoteSlug
 
 WARNING = ' - такой slug уже существует, придумайте уникальное значение!'
 
@@ -22,7 +22,7 @@ class NoteForm(forms.ModelForm):
         if not slug:
             title = cleaned_data.get('title')
             slug = slugify(title)[:100]
-        if Note.objects.filter(
+        if NoteSlug.objects.filter(
                 slug=slug
         ).exclude(id=self.instance.pk).exists():
             raise ValidationError(slug + WARNING)
@@ -0,0 +1,211 @@
+"""
+Массовый импорт заметок.
+
+Адрес заметки строится так же, как в Note.save: из указанного slug или
+из заголовка через pytils. Занятые адреса определяются для всей пачки
+сразу несколькими запросами slug IN (...), а не запросом на каждую
+заметку, и получают детерминированные суффиксы -2, -3 и так далее.
+Пачка записывается через bulk_create в одной транзакции вместе с
+каталогом адресов NoteSlug; если адрес успели занять между проверкой и
+записью, пачка откатывается и адреса подбираются заново.
+
+Пачки фиксируются по мере чтения, поэтому ошибка посреди импорта
+поднимает ImportStopped с уже созданными адресами: клиент может
+продолжить со следующей строки, а не повторять импорт целиком.
+"""
+import json
+from collections import Counter
+from itertools import islice
+
+from django.core.exceptions import NON_FIELD_ERRORS, ValidationError
+from django.db import IntegrityError
+from pytils.translit import slugify
+
+from .models import Note, NoteSlug
+
+BATCH_SIZE = 1000
+LOOKUP_CHUNK = 500
+SPARE_CANDIDATES = 5
+RETRIES = 3
+MAX_SLUG_LENGTH = Note._meta.get_field('slug').max_length
+
+
+class ImportStopped(Exception):
+    """Импорт прерван; заметки из записанных пачек остались в базе."""
+
+    def __init__(self, message, created, errors, line=None):
+        super().__init__(message)
+        self.created = created
+        self.errors = errors
+        self.line = line
+
+
+class MalformedInput(ImportStopped):
+    """Строка входных данных не разбирается."""
+
+
+class SlugConflict(ImportStopped):
+    """Адреса пачки заняты параллельной записью после всех попыток."""
+
+
+class MalformedLine(ValueError):
+    """Строка JSON Lines не разбирается; line — её номер."""
+
+    def __init__(self, line, error):
+        super().__init__(f'Строка {line}: {error}')
+        self.line = line
+
+
+def base_slug(note):
+    """Адрес без суффикса, как его выбрал бы Note.save."""
+    return note.slug or slugify(note.title)[:MAX_SLUG_LENGTH]
+
+
+def suffixed(slug, number):
+    if number == 1:
+        return slug
+    suffix = f'-{number}'
+    return slug[:MAX_SLUG_LENGTH - len(suffix)] + suffix
+
+
+def _taken(candidates):
+    taken = set()
+    candidates = list(candidates)
+    for start in range(0, len(candidates), LOOKUP_CHUNK):
+        taken.update(NoteSlug.objects.filter(
+            slug__in=candidates[start:start + LOOKUP_CHUNK]
+        ).values_list('slug', flat=True))
+    return taken
+
+
+def allocate_slugs(bases):
+    """
+    Подбирает свободные адреса для списка базовых адресов.
+
+    Для каждой базы проверяются сразу несколько кандидатов: сама база и
+    варианты с суффиксами, по числу её повторов в пачке с запасом. Если
+    все они заняты, проверяется следующий диапазон.
+    """
+    needed = Counter(bases)
+    free = {base: [] for base in needed}
+    used = set()
+    next_number = dict.fromkeys(needed, 1)
+    pending = set(needed)
+    while pending:
+        ranges = {
+            base: [
+                suffixed(base, number)
+                for number in range(
+                    next_number[base],
+                    next_number[base] + needed[base] + SPARE_CANDIDATES,
+                )
+            ]
+            for base in pending
+        }
+        taken = _taken(
+            candidate for candidates in ranges.values()
+            for candidate in candidates
+        )
+        for base in sorted(pending):
+            for candidate in ranges[base]:
+                if len(free[base]) == needed[base]:
+                    break
+                if candidate not in taken and candidate not in used:
+                    free[base].append(candidate)
+                    used.add(candidate)
+            next_number[base] += len(ranges[base])
+        pending = {base for base in pending if len(free[base]) < needed[base]}
+    allocated = {base: iter(slugs) for base, slugs in free.items()}
+    return [next(allocated[base]) for base in bases]
+
+
+def _clean(author, row):
+    if not isinstance(row, dict):
+        raise ValidationError(
+            {NON_FIELD_ERRORS: ['Ожидается объект JSON.']}
+        )
+    note = Note(
+        title=row.get('title') or Note._meta.get_field('title').default,
+        text=row.get('text') or '',
+        slug=row.get('slug') or '',
+        author=author,
+    )
+    note.full_clean(exclude=('author',), validate_unique=False)
+    return note
+
+
+def _clean_batch(author, batch, errors):
+    notes = []
+    for number, row in batch:
+        try:
+            notes.append(_clean(author, row))
+        except ValidationError as error:
+            errors[number] = error.message_dict
+    return notes
+
+
+def _write(notes):
+    for attempt in range(RETRIES):
+        bases = [base_slug(note) for note in notes]
+        for note, slug in zip(notes, allocate_slugs(bases)):
+            note.slug = slug
+        try:
+            Note.objects.bulk_create(notes)
+            return
+        except IntegrityError:
+            if attempt == RETRIES - 1:
+                raise
+            for note, base in zip(notes, bases):
+                note.slug = base
+
+
+def import_notes(author, rows, batch_size=BATCH_SIZE):
+    """
+    Импортирует заметки из пар (номер строки, словарь), как в read_jsonl.
+
+    Словари содержат поля title, text и slug. Возвращает адреса созданных
+    заметок по порядку и ошибки проверки по номерам строк; строки с
+    ошибками пропускаются. Неразборчивая строка и исчерпанные попытки
+    записи прерывают импорт через ImportStopped.
+    """
+    created = []
+    errors = {}
+    rows = iter(rows)
+    while True:
+        try:
+            batch = list(islice(rows, batch_size))
+        except ValueError as error:
+            raise MalformedInput(
+                str(error), created, errors, getattr(error, 'line', None)
+            ) from error
+        if not batch:
+            return created, errors
+        notes = _clean_batch(author, batch, errors)
+        if notes:
+            try:
+                _write(notes)
+            except IntegrityError as error:
+                raise SlugConflict(
+                    'Адреса заметок заняты параллельной записью.',
+                    created, errors, batch[0][0],
+                ) from error
+            created.extend(note.slug for note in notes)
+
+
+def read_jsonl(lines):
+    """
+    Разбирает JSON Lines, например выгрузку notes.export.
+
+    Выдаёт пары (номер строки в файле, значение): пустые строки
+    пропускаются, но не сдвигают нумерацию.
+    """
+    for number, line in enumerate(lines, start=1):
+        try:
+            if isinstance(line, bytes):
+                line = line.decode()
+            if not line.strip():
+                continue
+            row = json.loads(line)
+        except ValueError as error:
+            raise MalformedLine(number, error) from error
+        yield number, row
@@ -0,0 +1,240 @@
+"""
+Нагрузочное тестирование без сети и внешних инструментов.
+
+Виртуальные пользователи вызывают WSGI-приложение проекта напрямую, с
+собственными cookie, сессией и CSRF-токеном, и выполняют сценарии из
+SCENARIOS. Пользователи работают в пуле потоков или процессов, а время
+каждого ответа записывается вместе с именем URL.
+"""
+import random
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from http.cookies import SimpleCookie
+from io import BytesIO
+from multiprocessing import get_context
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.servers.basehttp import get_internal_wsgi_application
+from django.db import connections
+from django.urls import Resolver404, resolve, reverse
+
+from . import auth
+
+HOST = '127.0.0.1'
+USER_PREFIX = 'loadtest-'
+NOTE_TEXT = 'Заметка из нагрузочного теста'
+
+
+class WsgiClient:
+    """Клиент, который обращается к WSGI-приложению в том же процессе."""
+
+    def __init__(self, application, records):
+        self.application = application
+        self.records = records
+        self.cookies = SimpleCookie()
+
+    def request(self, method, path, data=None, query=None):
+        body = urlencode(data or {}).encode()
+        environ = {
+            'REQUEST_METHOD': method,
+            'PATH_INFO': path,
+            'QUERY_STRING': urlencode(query or {}),
+            'SERVER_NAME': HOST,
+            'SERVER_PORT': '80',
+            'SERVER_PROTOCOL': 'HTTP/1.1',
+            'REMOTE_ADDR': HOST,
+            'HTTP_HOST': HOST,
+            'HTTP_COOKIE': '; '.join(
+                f'{name}={morsel.value}'
+                for name, morsel in self.cookies.items()
+            ),
+            'CONTENT_TYPE': 'application/x-www-form-urlencoded',
+            'CONTENT_LENGTH': str(len(body)),
+            'wsgi.input': BytesIO(body),
+            'wsgi.errors': sys.stderr,
+            'wsgi.url_scheme': 'http',
+            'wsgi.version': (1, 0),
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': True,
+            'wsgi.run_once': False,
+        }
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response['status'] = int(status.split()[0])
+            response['headers'] = headers
+
+        started = time.perf_counter()
+        result = self.application(environ, start_response)
+        try:
+            content = b''.join(result)
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+        elapsed = time.perf_counter() - started
+        for name, value in response['headers']:
+            if name.lower() == 'set-cookie':
+                self.cookies.load(value)
+        self.records.append(
+            (_view_name(path), method, response['status'], elapsed)
+        )
+        return response['status'], content
+
+    def get(self, path, query=None):
+        return self.request('GET', path, query=query)
+
+    def post(self, path, data):
+        token = self.cookies.get(settings.CSRF_COOKIE_NAME)
+        data = dict(data, csrfmiddlewaretoken=token.value if token else '')
+        return self.request('POST', path, data)
+
+
+def _view_name(path):
+    try:
+        return resolve(path).view_name
+    except Resolver404:
+        return path
+
+
+def prepare_users(count, password):
+    """Создаёт пользователей loadtest-N с общим паролем."""
+    User = get_user_model()
+    names = [f'{USER_PREFIX}{index}' for index in range(count)]
+    User.objects.bulk_create(
+        (User(username=name) for name in names), ignore_conflicts=True
+    )
+    users = User.objects.filter(username__in=names)
+    users.update(password=make_password(password))
+    # update не вызывает сигналов: пароль в кеше пользователей устарел.
+    auth.invalidate(*users.values_list('pk', flat=True))
+    return [(name, password) for name in names]
+
+
+def login(client, username, password):
+    url = reverse('users:login')
+    client.get(url)
+    status, _ = client.post(
+        url, {'username': username, 'password': password}
+    )
+    if status != 302:
+        raise RuntimeError(f'Не удалось войти как {username}.')
+
+
+def browse(client, rng, context):
+    """Пользователь просматривает список заметок и ищет по ним."""
+    client.get(reverse('notes:home'))
+    client.get(reverse('notes:list'))
+    if rng.random() < 0.3:
+        client.get(reverse('notes:search'), {'q': 'заметка'})
+
+
+def crud(client, rng, context):
+    """Пользователь создаёт, читает, правит и удаляет заметку."""
+    slug = f'loadtest-{rng.getrandbits(64):x}'
+    data = {'title': 'Заметка', 'text': NOTE_TEXT, 'slug': slug}
+    client.get(reverse('notes:add'))
+    client.post(reverse('notes:add'), data)
+    client.get(reverse('notes:detail', args=(slug,)))
+    client.post(
+        reverse('notes:edit', args=(slug,)), dict(data, title='Правка')
+    )
+    client.post(reverse('notes:delete', args=(slug,)), {})
+
+
+SCENARIOS = {
+    'browse': (browse, True),
+    'crud': (crud, True),
+}
+
+
+def run_worker(index, scenarios, duration, iterations, seed, context):
+    """
+    Виртуальный пользователь, выполняющий сценарии в цикле.
+
+    scenarios — список пар (имя, вес). Работа заканчивается через duration
+    секунд или после iterations сценариев. Возвращает записи об ответах.
+    """
+    rng = random.Random(seed + index)
+    records = []
+    application = get_internal_wsgi_application()
+    anonymous = WsgiClient(application, records)
+    member = None
+    names = [name for name, _ in scenarios]
+    weights = [weight for _, weight in scenarios]
+    deadline = time.monotonic() + duration if duration else None
+    done = 0
+    while (iterations is None or done < iterations) and (
+            deadline is None or time.monotonic() < deadline):
+        scenario, needs_login = SCENARIOS[rng.choices(names, weights)[0]]
+        client = anonymous
+        if needs_login:
+            if member is None:
+                member = WsgiClient(application, records)
+                users = context['users']
+                login(member, *users[index % len(users)])
+            client = member
+        scenario(client, rng, context)
+        done += 1
+    connections.close_all()
+    return records
+
+
+def run(workers, scenarios, duration=None, iterations=None, mode='thread',
+        seed=0, context=None):
+    """
+    Запускает workers виртуальных пользователей в потоках или процессах.
+
+    Возвращает записи об ответах и общее время прогона в секундах.
+    """
+    if mode == 'process':
+        # Дочерние процессы не должны делить соединения с родителем.
+        connections.close_all()
+        executor = ProcessPoolExecutor(
+            workers, mp_context=get_context('fork')
+        )
+    else:
+        executor = ThreadPoolExecutor(workers)
+    started = time.perf_counter()
+    with executor:
+        futures = [
+            executor.submit(
+                run_worker, index, scenarios, duration, iterations, seed,
+                context or {},
+            )
+            for index in range(workers)
+        ]
+        records = [
+            record for future in futures for record in future.result()
+        ]
+    return records, time.perf_counter() - started
+
+
+def _percentile(values, share):
+    return values[min(int(len(values) * share), len(values) - 1)]
+
+
+def report(records, elapsed):
+    """Пропускная способность и перцентили времени ответа по именам URL."""
+    grouped = {}
+    for view, method, status, seconds in records:
+        grouped.setdefault((view, method), []).append((status, seconds))
+    rows = []
+    for (view, method), responses in sorted(grouped.items()):
+        timings = sorted(seconds * 1000 for _, seconds in responses)
+        rows.append({
+            'view': view,
+            'method': method,
+            'requests': len(responses),
+            'errors': sum(status >= 500 for status, _ in responses),
+            'rps': len(responses) / elapsed,
+            'mean_ms': statistics.mean(timings),
+            'p50_ms': _percentile(timings, 0.5),
+            'p95_ms': _percentile(timings, 0.95),
+            'p99_ms': _percentile(timings, 0.99),
+        })
+    return rows
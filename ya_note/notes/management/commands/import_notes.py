@@ -0,0 +1,49 @@
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from notes import importing
+
+
+class Command(BaseCommand):
+    help = 'Импортирует заметки пользователя из файла JSON Lines.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument(
+            'path', nargs='?', default='-',
+            help='Файл JSON Lines; по умолчанию стандартный ввод.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=importing.BATCH_SIZE,
+        )
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(
+                f'Пользователь {options["username"]} не найден.'
+            )
+        if options['path'] == '-':
+            source = sys.stdin
+        else:
+            source = open(options['path'], encoding='utf-8')
+        with source:
+            try:
+                created, errors = importing.import_notes(
+                    user, importing.read_jsonl(source),
+                    options['batch_size'],
+                )
+            except importing.ImportStopped as stop:
+                raise CommandError(
+                    f'Импорт прерван: {stop}. Уже создано заметок: '
+                    f'{len(stop.created)}.'
+                )
+        for number, messages in errors.items():
+            self.stderr.write(f'Строка {number}: {messages}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано заметок: {len(created)}, пропущено: {len(errors)}'
+        ))
@@ -0,0 +1,81 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from notes import loadtest
+
+
+def scenario_weight(value):
+    name, _, weight = value.partition(':')
+    if name not in loadtest.SCENARIOS:
+        raise ValueError(name)
+    return name, int(weight or 1)
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагружает сайт виртуальными пользователями в этом же процессе '
+        'и выводит пропускную способность и перцентили времени ответа.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=8)
+        parser.add_argument(
+            '--mode', choices=('thread', 'process'), default='thread',
+        )
+        parser.add_argument(
+            '--duration', type=float, default=10,
+            help='Длительность прогона в секундах.',
+        )
+        parser.add_argument(
+            '--iterations', type=int,
+            help='Сколько сценариев выполняет каждый пользователь.',
+        )
+        parser.add_argument(
+            '--scenario', type=scenario_weight, nargs='+',
+            default=[('browse', 1), ('crud', 1)],
+            help=(
+                'Сценарии с весами, например browse:3 crud:1. '
+                f'Доступны: {", ".join(loadtest.SCENARIOS)}.'
+            ),
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--password', default='loadtest-password')
+        parser.add_argument('--json', help='Файл для результатов в JSON.')
+
+    def handle(self, *args, **options):
+        context = {
+            'users': loadtest.prepare_users(
+                options['workers'], options['password']
+            ),
+        }
+        records, elapsed = loadtest.run(
+            options['workers'], options['scenario'],
+            duration=None if options['iterations'] else options['duration'],
+            iterations=options['iterations'], mode=options['mode'],
+            seed=options['seed'], context=context,
+        )
+        rows = loadtest.report(records, elapsed)
+        self.stdout.write(
+            f'{"URL":<16} {"метод":<6} {"запросов":>9} {"ошибок":>7} '
+            f'{"в секунду":>10} {"p50":>8} {"p95":>8} {"p99":>8}'
+        )
+        for row in rows:
+            self.stdout.write(
+                f'{row["view"]:<16} {row["method"]:<6} '
+                f'{row["requests"]:>9} {row["errors"]:>7} '
+                f'{row["rps"]:>10.1f} {row["p50_ms"]:>8.1f} '
+                f'{row["p95_ms"]:>8.1f} {row["p99_ms"]:>8.1f}'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Всего {len(records)} запросов за {elapsed:.1f} с, '
+            f'{len(records) / elapsed:.1f} в секунду.'
+        ))
+        if options['json']:
+            with open(options['json'], 'w', encoding='utf-8') as output:
+                json.dump({
+                    'workers': options['workers'],
+                    'mode': options['mode'],
+                    'elapsed': elapsed,
+                    'results': rows,
+                }, output, ensure_ascii=False, indent=2)
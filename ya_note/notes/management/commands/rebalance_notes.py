@@ -0,0 +1,66 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from notes import sharding
+from notes.models import AuthorShard, Note
+
+
+class Command(BaseCommand):
+    help = (
+        'Переносит заметки авторов между шардами, не останавливая сайт. '
+        'Без --to автор переносится в шард по хешу.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'usernames', nargs='*',
+            help='Авторы для переноса; по умолчанию все авторы.',
+        )
+        parser.add_argument('--to', help='Шард назначения.')
+        parser.add_argument(
+            '--grace', type=float,
+            help='Сколько секунд запись закрыта перед переключением; '
+                 'по умолчанию settings.NOTES_SHARD_MOVE_GRACE.',
+        )
+
+    def authors(self, usernames):
+        if usernames:
+            authors = dict(get_user_model().objects.filter(
+                username__in=usernames
+            ).values_list('username', 'pk'))
+            missing = set(usernames) - set(authors)
+            if missing:
+                raise CommandError(
+                    f'Пользователи не найдены: {", ".join(sorted(missing))}.'
+                )
+            return [authors[username] for username in usernames]
+        placed = set(AuthorShard.objects.values_list('author_id', flat=True))
+        # Авторы без шарда, чьи заметки остались в основной базе.
+        legacy = set(Note.objects.using(DEFAULT_DB_ALIAS).values_list(
+            'author_id', flat=True
+        ).distinct())
+        return sorted(placed | legacy)
+
+    def handle(self, *args, **options):
+        if not settings.NOTES_SHARDS:
+            raise CommandError(
+                'Шарды не настроены, см. settings.NOTES_SHARDS.'
+            )
+        target = options['to']
+        if target is not None and target not in (
+                *settings.NOTES_SHARDS, DEFAULT_DB_ALIAS):
+            raise CommandError(f'Неизвестный шард {target}.')
+        moved = 0
+        for author_id in self.authors(options['usernames']):
+            alias = target or sharding.hashed_shard(author_id)
+            notes = sharding.move_author(
+                author_id, alias, grace=options['grace']
+            )
+            if notes is not None:
+                moved += 1
+                self.stdout.write(
+                    f'Автор {author_id}: {notes} заметок перенесено в {alias}'
+                )
+        self.stdout.write(self.style.SUCCESS(f'Перенесено авторов: {moved}'))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from notes import search
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает полнотекстовый индекс заметок.'
+
+    def handle(self, *args, **options):
+        if not search.is_supported():
+            raise CommandError(
+                'Полнотекстовый индекс доступен только в SQLite.'
+            )
+        search.rebuild()
+        self.stdout.write(self.style.SUCCESS('Индекс заметок перестроен.'))
@@ -0,0 +1,39 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from notes import replicas
+
+
+class Command(BaseCommand):
+    help = 'Копирует основную базу SQLite в файлы реплик для чтения.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval',
+            type=float,
+            help='Копировать постоянно с этим интервалом в секундах; '
+                 'реплики при этом отстают от основной базы.',
+        )
+
+    def handle(self, *args, **options):
+        aliases = settings.DATABASE_REPLICAS
+        if not aliases:
+            raise CommandError(
+                'Реплики не настроены, см. settings.DATABASE_REPLICAS.'
+            )
+        if any(connections[alias].vendor != 'sqlite' for alias in aliases):
+            raise CommandError('Копировать можно только реплики SQLite.')
+        while True:
+            started = time.perf_counter()
+            for alias in aliases:
+                replicas.refresh(alias)
+            self.stdout.write(self.style.SUCCESS(
+                f'Реплики обновлены: {", ".join(aliases)} '
+                f'({time.perf_counter() - started:.2f} с)'
+            ))
+            if options['interval'] is None:
+                return
+            time.sleep(options['interval'])
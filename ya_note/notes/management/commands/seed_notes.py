@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from notes.seeding import BATCH_SIZE, seed_notes
+
+
+class Command(BaseCommand):
+    help = 'Наполняет базу синтетическими заметками.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--notes', type=int, default=100_000)
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help='Одинаковый seed даёт одинаковые данные.',
+        )
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def progress(self, model, done, total, elapsed):
+        rate = done / elapsed if elapsed else 0
+        self.stdout.write(
+            f'{model._meta.label}: {done}/{total} ({rate:.0f} строк/с)'
+        )
+
+    def handle(self, *args, **options):
+        author_id = seed_notes(
+            options['notes'], options['users'], seed=options['seed'],
+            batch_size=options['batch_size'], progress=self.progress,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово. Пользователь с длинным списком заметок: {author_id}'
+        ))
@@ -0,0 +1,213 @@
+"""
+Учёт SQL-запросов каждого запроса к сайту.
+
+QueryInspectorMiddleware считает количество и время запросов к базе,
+группирует их по форме (SQL без значений) и сверяет с бюджетом
+settings.QUERY_BUDGETS для имени URL, например notes:list. Одинаковые
+запросы, повторённые не меньше settings.QUERY_REPEAT_THRESHOLD раз,
+помечаются как вероятная проблема N+1.
+
+В асинхронной цепочке запросы к базе выполняются в других потоках, где
+у каждого потока свои соединения. Поэтому там учёт подключён к каждому
+соединению при его создании и пишет запросы в учёт, заданный
+переменной контекста: sync_to_async и пул представлений переносят её в
+свои потоки.
+"""
+import asyncio
+import contextvars
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+_recorder = contextvars.ContextVar('query_recorder', default=None)
+_summary = {}
+_summary_lock = threading.Lock()
+
+IN_LIST = re.compile(r'\bIN \((?:%s, )*%s\)')
+STRING = re.compile(r"'(?:[^']|'')*'")
+NUMBER = re.compile(r'\b\d+\b')
+SPACES = re.compile(r'\s+')
+
+
+def normalize(sql):
+    """Приводит SQL к форме без конкретных значений."""
+    sql = IN_LIST.sub('IN (...)', sql)
+    sql = STRING.sub('?', sql)
+    sql = NUMBER.sub('?', sql)
+    return SPACES.sub(' ', sql).strip()
+
+
+class QueryRecorder:
+    """Обёртка для connection.execute_wrapper, записывающая запросы."""
+
+    def __init__(self):
+        self.shapes = Counter()
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            self.shapes[normalize(sql)] += 1
+
+    def report(self, view_name):
+        threshold = settings.QUERY_REPEAT_THRESHOLD
+        budget = settings.QUERY_BUDGETS.get(view_name)
+        return {
+            'view': view_name,
+            'count': self.count,
+            'duration': self.duration,
+            'budget': budget,
+            'over_budget': budget is not None and self.count > budget,
+            'repeated': {
+                shape: count for shape, count in self.shapes.items()
+                if count >= threshold
+            },
+        }
+
+
+def _record_in_context(execute, sql, params, many, context):
+    recorder = _recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    return recorder(execute, sql, params, many, context)
+
+
+@receiver(connection_created)
+def install_recorder(sender, connection, **kwargs):
+    """Подключает учёт асинхронной цепочки к новому соединению."""
+    if _record_in_context not in connection.execute_wrappers:
+        # В начало списка: execute_wrapper снимает последнюю обёртку, а
+        # соединение могло открыться внутри него.
+        connection.execute_wrappers.insert(0, _record_in_context)
+
+
+def _view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match else request.path_info
+
+
+def summary():
+    """Сводка по именам URL: число запросов к сайту, к базе и их время."""
+    with _summary_lock:
+        return {view: dict(stats) for view, stats in _summary.items()}
+
+
+def _remember(report):
+    with _summary_lock:
+        stats = _summary.setdefault(
+            report['view'], {'requests': 0, 'queries': 0, 'duration': 0.0}
+        )
+        stats['requests'] += 1
+        stats['queries'] += report['count']
+        stats['duration'] += report['duration']
+    for capture in getattr(_local, 'captures', ()):
+        capture.append(report)
+
+
+def _log(report):
+    if report['over_budget']:
+        logger.warning(
+            '%s: %d SQL-запросов при бюджете %d',
+            report['view'], report['count'], report['budget'],
+        )
+    for shape, count in report['repeated'].items():
+        logger.warning(
+            '%s: возможно N+1, запрос повторён %d раз: %s',
+            report['view'], count, shape,
+        )
+
+
+@contextmanager
+def capture_reports():
+    """
+    Собирает отчёты о запросах в текущем потоке, например в тестах.
+
+    Пока действует, учёт работает даже с выключенной настройкой
+    QUERY_INSPECTOR_ENABLED.
+    """
+    reports = []
+    _local.captures = getattr(_local, 'captures', ()) + (reports,)
+    try:
+        yield reports
+    finally:
+        _local.captures = tuple(
+            capture for capture in _local.captures if capture is not reports
+        )
+
+
+def assert_query_budget(report, budget=None):
+    """Проверяет, что отчёт укладывается в бюджет и не содержит N+1."""
+    budget = report['budget'] if budget is None else budget
+    assert budget is not None, f'Для {report["view"]} не задан бюджет.'
+    assert report['count'] <= budget, (
+        f'{report["view"]}: {report["count"]} SQL-запросов '
+        f'при бюджете {budget}'
+    )
+    assert not report['repeated'], (
+        f'{report["view"]}: повторяющиеся запросы {report["repeated"]}'
+    )
+
+
+class QueryInspectorMiddleware:
+    """Учитывает запросы к базе при обработке запроса к сайту."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self._acall(request)
+        if not _is_enabled():
+            return self.get_response(request)
+        recorder = QueryRecorder()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(
+                    connections[alias].execute_wrapper(recorder)
+                )
+            response = self.get_response(request)
+        _finish(recorder, request)
+        return response
+
+    async def _acall(self, request):
+        if not _is_enabled():
+            return await self.get_response(request)
+        recorder = QueryRecorder()
+        token = _recorder.set(recorder)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _recorder.reset(token)
+        _finish(recorder, request)
+        return response
+
+
+def _is_enabled():
+    return settings.QUERY_INSPECTOR_ENABLED or getattr(_local, 'captures', ())
+
+
+def _finish(recorder, request):
+    report = recorder.report(_view_name(request))
+    _remember(report)
+    _log(report)
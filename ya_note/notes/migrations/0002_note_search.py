@@ -0,0 +1,80 @@
+from django.db import migrations
+
+
+class RunSQLiteSQL(migrations.RunSQL):
+    """RunSQL, который выполняется только на SQLite: индекс на FTS5."""
+
+    def database_forwards(self, app_label, schema_editor, *args):
+        if schema_editor.connection.vendor == 'sqlite':
+            super().database_forwards(app_label, schema_editor, *args)
+
+    def database_backwards(self, app_label, schema_editor, *args):
+        if schema_editor.connection.vendor == 'sqlite':
+            super().database_backwards(app_label, schema_editor, *args)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0001_initial'),
+    ]
+
+    operations = [
+        RunSQLiteSQL(
+            [
+                """
+                CREATE VIEW notes_note_fts_source AS
+                SELECT id, title, text, 'u' || author_id AS owner
+                FROM notes_note
+                """,
+                """
+                CREATE VIRTUAL TABLE notes_note_fts USING fts5(
+                    title, text, owner,
+                    content='notes_note_fts_source', content_rowid='id',
+                    tokenize='unicode61 remove_diacritics 2'
+                )
+                """,
+                """
+                CREATE TRIGGER notes_note_fts_insert
+                AFTER INSERT ON notes_note BEGIN
+                    INSERT INTO notes_note_fts(rowid, title, text, owner)
+                    VALUES (new.id, new.title, new.text, 'u' || new.author_id);
+                END
+                """,
+                """
+                CREATE TRIGGER notes_note_fts_delete
+                AFTER DELETE ON notes_note BEGIN
+                    INSERT INTO notes_note_fts(
+                        notes_note_fts, rowid, title, text, owner
+                    )
+                    VALUES (
+                        'delete', old.id, old.title, old.text,
+                        'u' || old.author_id
+                    );
+                END
+                """,
+                """
+                CREATE TRIGGER notes_note_fts_update
+                AFTER UPDATE ON notes_note BEGIN
+                    INSERT INTO notes_note_fts(
+                        notes_note_fts, rowid, title, text, owner
+                    )
+                    VALUES (
+                        'delete', old.id, old.title, old.text,
+                        'u' || old.author_id
+                    );
+                    INSERT INTO notes_note_fts(rowid, title, text, owner)
+                    VALUES (new.id, new.title, new.text, 'u' || new.author_id);
+                END
+                """,
+                "INSERT INTO notes_note_fts(notes_note_fts) VALUES ('rebuild')",
+            ],
+            [
+                'DROP TRIGGER notes_note_fts_insert',
+                'DROP TRIGGER notes_note_fts_delete',
+                'DROP TRIGGER notes_note_fts_update',
+                'DROP TABLE notes_note_fts',
+                'DROP VIEW notes_note_fts_source',
+            ],
+        ),
+    ]
@@ -0,0 +1,103 @@
+# Generated by Django 3.2.15 on 2026-10-18 19:03
+
+from django.db import migrations, models
+
+
+class RunSQLiteSQL(migrations.RunSQL):
+    """RunSQL, который выполняется только на SQLite: индекс на FTS5."""
+
+    def database_forwards(self, app_label, schema_editor, *args):
+        if schema_editor.connection.vendor == 'sqlite':
+            super().database_forwards(app_label, schema_editor, *args)
+
+    def database_backwards(self, app_label, schema_editor, *args):
+        if schema_editor.connection.vendor == 'sqlite':
+            super().database_backwards(app_label, schema_editor, *args)
+
+
+SEARCH_TRIGGERS_SQL = [
+    """
+    CREATE TRIGGER notes_note_fts_insert
+    AFTER INSERT ON notes_note BEGIN
+        INSERT INTO notes_note_fts(rowid, title, text, owner)
+        VALUES (new.id, new.title, new.text, 'u' || new.author_id);
+    END
+    """,
+    """
+    CREATE TRIGGER notes_note_fts_delete
+    AFTER DELETE ON notes_note BEGIN
+        INSERT INTO notes_note_fts(notes_note_fts, rowid, title, text, owner)
+        VALUES ('delete', old.id, old.title, old.text, 'u' || old.author_id);
+    END
+    """,
+    """
+    CREATE TRIGGER notes_note_fts_update
+    AFTER UPDATE ON notes_note BEGIN
+        INSERT INTO notes_note_fts(notes_note_fts, rowid, title, text, owner)
+        VALUES ('delete', old.id, old.title, old.text, 'u' || old.author_id);
+        INSERT INTO notes_note_fts(rowid, title, text, owner)
+        VALUES (new.id, new.title, new.text, 'u' || new.author_id);
+    END
+    """,
+]
+
+# Индекс из 0002 читает тексты через представление над notes_note.
+EXTERNAL_SEARCH_SQL = [
+    """
+    CREATE VIEW notes_note_fts_source AS
+    SELECT id, title, text, 'u' || author_id AS owner FROM notes_note
+    """,
+    """
+    CREATE VIRTUAL TABLE notes_note_fts USING fts5(
+        title, text, owner,
+        content='notes_note_fts_source', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    *SEARCH_TRIGGERS_SQL,
+    "INSERT INTO notes_note_fts(notes_note_fts) VALUES ('rebuild')",
+]
+
+# Индекс без содержимого хранит только словарь и заполняется из таблицы.
+CONTENTLESS_SEARCH_SQL = [
+    """
+    CREATE VIRTUAL TABLE notes_note_fts USING fts5(
+        title, text, owner, content='',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    *SEARCH_TRIGGERS_SQL,
+    """
+    INSERT INTO notes_note_fts(rowid, title, text, owner)
+    SELECT id, title, text, 'u' || author_id FROM notes_note
+    """,
+]
+
+DROP_SEARCH_SQL = [
+    'DROP TRIGGER IF EXISTS notes_note_fts_insert',
+    'DROP TRIGGER IF EXISTS notes_note_fts_delete',
+    'DROP TRIGGER IF EXISTS notes_note_fts_update',
+    'DROP TABLE IF EXISTS notes_note_fts',
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0002_note_search'),
+    ]
+
+    # SQLite пересоздаёт таблицу при добавлении поля, поэтому индекс и его
+    # триггеры убираются и строятся заново после изменения.
+    operations = [
+        RunSQLiteSQL(
+            DROP_SEARCH_SQL + ['DROP VIEW IF EXISTS notes_note_fts_source'],
+            EXTERNAL_SEARCH_SQL,
+        ),
+        migrations.AddField(
+            model_name='note',
+            name='modified',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        RunSQLiteSQL(CONTENTLESS_SEARCH_SQL, DROP_SEARCH_SQL),
+    ]
@@ -0,0 +1,122 @@
+# Generated by Django 3.2.15 on 2026-10-18 19:44
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class RunSQLiteSQL(migrations.RunSQL):
+    """RunSQL, который выполняется только на SQLite: индекс на FTS5."""
+
+    def database_forwards(self, app_label, schema_editor, *args):
+        if schema_editor.connection.vendor == 'sqlite':
+            super().database_forwards(app_label, schema_editor, *args)
+
+    def database_backwards(self, app_label, schema_editor, *args):
+        if schema_editor.connection.vendor == 'sqlite':
+            super().database_backwards(app_label, schema_editor, *args)
+
+
+# Смена внешнего ключа в SQLite пересоздаёт таблицу заметок вместе с
+# триггерами индекса, поэтому индекс строится заново после изменения.
+CREATE_SEARCH_SQL = [
+    """
+    CREATE VIRTUAL TABLE notes_note_fts USING fts5(
+        title, text, owner, content='',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER notes_note_fts_insert
+    AFTER INSERT ON notes_note BEGIN
+        INSERT INTO notes_note_fts(rowid, title, text, owner)
+        VALUES (new.id, new.title, new.text, 'u' || new.author_id);
+    END
+    """,
+    """
+    CREATE TRIGGER notes_note_fts_delete
+    AFTER DELETE ON notes_note BEGIN
+        INSERT INTO notes_note_fts(notes_note_fts, rowid, title, text, owner)
+        VALUES ('delete', old.id, old.title, old.text, 'u' || old.author_id);
+    END
+    """,
+    """
+    CREATE TRIGGER notes_note_fts_update
+    AFTER UPDATE ON notes_note BEGIN
+        INSERT INTO notes_note_fts(notes_note_fts, rowid, title, text, owner)
+        VALUES ('delete', old.id, old.title, old.text, 'u' || old.author_id);
+        INSERT INTO notes_note_fts(rowid, title, text, owner)
+        VALUES (new.id, new.title, new.text, 'u' || new.author_id);
+    END
+    """,
+    """
+    INSERT INTO notes_note_fts(rowid, title, text, owner)
+    SELECT id, title, text, 'u' || author_id FROM notes_note
+    """,
+]
+
+DROP_SEARCH_SQL = [
+    'DROP TRIGGER IF EXISTS notes_note_fts_insert',
+    'DROP TRIGGER IF EXISTS notes_note_fts_delete',
+    'DROP TRIGGER IF EXISTS notes_note_fts_update',
+    'DROP TABLE IF EXISTS notes_note_fts',
+]
+
+
+def fill_slugs(apps, schema_editor):
+    # Каталог выдаёт id новым заметкам, поэтому получает id существующих.
+    Note = apps.get_model('notes', 'Note')
+    NoteSlug = apps.get_model('notes', 'NoteSlug')
+    db = schema_editor.connection.alias
+    NoteSlug.objects.using(db).bulk_create(
+        (
+            NoteSlug(pk=pk, slug=slug, author_id=author_id)
+            for pk, slug, author_id in Note.objects.using(db).values_list(
+                'pk', 'slug', 'author_id'
+            ).iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('notes', '0004_note_sync'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthorShard',
+            fields=[
+                ('author', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('alias', models.CharField(max_length=100)),
+                ('moving', models.BooleanField(default=False)),
+            ],
+        ),
+        RunSQLiteSQL(DROP_SEARCH_SQL, CREATE_SEARCH_SQL),
+        migrations.AlterField(
+            model_name='note',
+            name='author',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='notetombstone',
+            name='author',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        RunSQLiteSQL(CREATE_SEARCH_SQL, DROP_SEARCH_SQL),
+        migrations.CreateModel(
+            name='NoteSlug',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('slug', models.SlugField(max_length=100, unique=True)),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.RunPython(
+            fill_slugs, migrations.RunPython.noop,
+            hints={'model_name': 'noteslug'},
+        ),
+    ]
@@ -1,8 +1,71 @@
+from contextlib import contextmanager
+
 from django.conf import settings
-from django.db import models
+from django.db import DEFAULT_DB_ALIAS, models, router, transaction
 
 from pytils.translit import slugify
 
+REGISTER_CHUNK = 500
+
+
+@contextmanager
+def note_atomic(using):
+    """
+    Транзакции в базе заметки и в основной базе с каталогом адресов.
+
+    Каталог фиксируется первым: если шард не зафиксирует заметку, адрес
+    останется занятым, но двух заметок с одним адресом не появится.
+    """
+    with transaction.atomic(using=using):
+        if using == DEFAULT_DB_ALIAS:
+            yield
+        else:
+            with transaction.atomic():
+                yield
+
+
+class AuthorQuerySet(models.QuerySet):
+
+    def for_author(self, author):
+        """Записи автора из шарда, в котором они хранятся."""
+        from .sharding import shard_for
+
+        queryset = self.filter(author=author)
+        if settings.NOTES_SHARDS:
+            queryset = queryset.using(shard_for(author))
+        return queryset
+
+
+class NoteQuerySet(AuthorQuerySet):
+
+    def bulk_create(self, objs, *args, **kwargs):
+        """
+        Создаёт заметки вместе с записями в каталоге адресов.
+
+        Без явной базы заметки раскладываются по шардам их авторов.
+        """
+        from .sharding import shard_for
+
+        objs = list(objs)
+        if self._db is None and settings.NOTES_SHARDS:
+            shards = {}
+            for note in objs:
+                shards.setdefault(
+                    shard_for(note.author_id, write=True), []
+                ).append(note)
+            for alias, notes in shards.items():
+                self.using(alias).bulk_create(notes, *args, **kwargs)
+            return objs
+        using = self._db or router.db_for_write(self.model, **self._hints)
+        try:
+            with note_atomic(using):
+                NoteSlug.register(objs)
+                return super().bulk_create(objs, *args, **kwargs)
+        except Exception:
+            for note in objs:
+                note.pk = None
+            raise
+
 
 class Note(models.Model):
     title = models.CharField(
@@ -26,13 +89,122 @@ class Note(models.Model):
     author = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
+        # Заметки могут лежать в шарде без таблицы пользователей.
+        db_constraint=False,
     )
+    modified = models.DateTimeField(auto_now=True)
+
+    objects = NoteQuerySet.as_manager()
+
+    class Meta:
+        indexes = (
+            models.Index(
+                fields=('author', 'modified', 'id'),
+                name='note_author_modified_idx',
+            ),
+        )
 
     def __str__(self):
         return self.title
 
     def save(self, *args, **kwargs):
+        """Сохраняет заметку и её адрес в каталоге NoteSlug."""
         if not self.slug:
             max_slug_length = self._meta.get_field('slug').max_length
             self.slug = slugify(self.title)[:max_slug_length]
-        super().save(*args, **kwargs)
+        using = kwargs.get('using') or router.db_for_write(
+            Note, instance=self
+        )
+        with note_atomic(using):
+            if self._state.adding:
+                NoteSlug.register([self])
+                kwargs['force_insert'] = True
+            else:
+                NoteSlug.objects.filter(pk=self.pk).exclude(
+                    slug=self.slug
+                ).update(slug=self.slug)
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        using = kwargs.get('using') or router.db_for_write(
+            Note, instance=self
+        )
+        with note_atomic(using):
+            NoteSlug.objects.filter(pk=self.pk).delete()
+            return super().delete(*args, **kwargs)
+
+
+class NoteTombstone(models.Model):
+    """Запись об удалённой заметке для синхронизации клиентов."""
+    note_id = models.BigIntegerField()
+    author = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        db_constraint=False,
+    )
+    deleted = models.DateTimeField(auto_now_add=True)
+
+    objects = AuthorQuerySet.as_manager()
+
+    class Meta:
+        indexes = (
+            models.Index(
+                fields=('author', 'id'), name='tombstone_author_id_idx'
+            ),
+        )
+
+    def __str__(self):
+        return str(self.note_id)
+
+
+class NoteSlug(models.Model):
+    """
+    Каталог адресов заметок всех шардов.
+
+    Адрес заметки уникален во всём сайте, а id записи каталога служит id
+    заметки, поэтому при переносе автора в другой шард id не меняются.
+    Каталог всегда хранится в основной базе.
+    """
+    slug = models.SlugField(max_length=100, unique=True)
+    author = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+    )
+
+    def __str__(self):
+        return self.slug
+
+    @classmethod
+    def register(cls, notes):
+        """Занимает адреса новых заметок и выдаёт им id."""
+        entries = [
+            cls(pk=note.pk, slug=note.slug, author_id=note.author_id)
+            for note in notes
+        ]
+        if len(entries) == 1:
+            entries[0].save(force_insert=True)
+            notes[0].pk = entries[0].pk
+            return
+        cls.objects.bulk_create(entries)
+        ids = {}
+        slugs = [note.slug for note in notes]
+        for start in range(0, len(slugs), REGISTER_CHUNK):
+            ids.update(cls.objects.filter(
+                slug__in=slugs[start:start + REGISTER_CHUNK]
+            ).values_list('slug', 'pk'))
+        for note in notes:
+            note.pk = ids[note.slug]
+
+
+class AuthorShard(models.Model):
+    """Шард с заметками автора, см. notes.sharding."""
+    author = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+    )
+    alias = models.CharField(max_length=100)
+    moving = models.BooleanField(default=False)
+
+    def __str__(self):
+        return f'{self.author_id}: {self.alias}'
@@ -0,0 +1,138 @@
+"""
+Чтение страниц с реплик базы данных.
+
+ReplicaMiddleware выбирает для GET-запроса к странице из
+settings.REPLICA_VIEWS одну из реплик settings.DATABASE_REPLICAS, и
+ReplicaRouter направляет на неё чтения этого запроса. Записи и все
+остальные чтения идут в основную базу default. После записи посетитель
+получает cookie и ещё settings.REPLICA_PIN_SECONDS секунд читает только
+основную базу, поэтому видит свои изменения, даже если реплики отстают.
+
+Реплики SQLite — копии файла основной базы; их обновляет команда
+refresh_replicas, а с --interval она же имитирует отставание реплик.
+"""
+import asyncio
+import random
+import sqlite3
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Сессии и пользователи всегда читаются из основной базы: по отставшей
+# реплике только что вошедший посетитель стал бы анонимом и потерял сессию.
+PRIMARY_APPS = {'auth', 'sessions'}
+
+_state = ContextVar('replica_state', default=None)
+
+
+class RequestState:
+    """База для чтения в текущем запросе и признак того, что он писал."""
+
+    def __init__(self):
+        self.alias = None
+        self.wrote = False
+
+
+def is_pinned(request):
+    """Читает ли посетитель основную базу после недавней записи."""
+    try:
+        until = float(request.COOKIES.get(settings.REPLICA_PIN_COOKIE, 0))
+    except ValueError:
+        return False
+    return until > time.time()
+
+
+class ReplicaRouter:
+    """Направляет чтения выбранных страниц на реплику, записи — в default."""
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or model._meta.app_label in PRIMARY_APPS:
+            return None
+        return state.alias
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            # До конца запроса читаем основную базу, где уже есть запись.
+            state.alias = None
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики содержат те же строки, что и основная база.
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db not in settings.DATABASE_REPLICAS
+
+
+class ReplicaMiddleware:
+    """
+    Выбирает базу для чтения и закрепляет писавших за основной.
+
+    В асинхронной цепочке middleware остаётся асинхронным: иначе Django
+    перевёл бы всю цепочку в один поток синхронных middleware.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self._acall(request)
+        state = RequestState()
+        _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.set(None)
+        return self._pin(state, response)
+
+    async def _acall(self, request):
+        state = RequestState()
+        _state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _state.set(None)
+        return self._pin(state, response)
+
+    @staticmethod
+    def _pin(state, response):
+        if state.wrote:
+            pin = settings.REPLICA_PIN_SECONDS
+            response.set_cookie(
+                settings.REPLICA_PIN_COOKIE, f'{time.time() + pin:.3f}',
+                max_age=pin, httponly=True, samesite='Lax',
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        replicas = settings.DATABASE_REPLICAS
+        if (replicas and request.method in ('GET', 'HEAD')
+                and request.resolver_match.view_name in settings.REPLICA_VIEWS
+                and not is_pinned(request)):
+            _state.get().alias = random.choice(replicas)
+
+
+def refresh(alias):
+    """Копирует основную базу SQLite в файл реплики через backup API."""
+    source = connections[DEFAULT_DB_ALIAS]
+    target = connections[alias]
+    if target.settings_dict['NAME'] == source.settings_dict['NAME']:
+        return
+    source.ensure_connection()
+    target.close()
+    destination = sqlite3.connect(target.settings_dict['NAME'])
+    try:
+        source.connection.backup(destination)
+    finally:
+        destination.close()
@@ -0,0 +1,138 @@
+"""
+Полнотекстовый поиск по заметкам на SQLite FTS5.
+
+Индекс notes_note_fts не хранит сами тексты, только словарь заголовков,
+текстов и токена владельца, поэтому поиск сразу ограничивается заметками
+одного пользователя. Синхронизацию индекса с таблицей notes_note
+выполняют триггеры.
+"""
+from django.db import connection
+
+FTS_TABLE = 'notes_note_fts'
+
+INSTALL_SQL = (
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_insert',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_delete',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_update',
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, text, owner, content='',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_insert AFTER INSERT ON notes_note BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, text, owner)
+        VALUES (new.id, new.title, new.text, 'u' || new.author_id);
+    END
+    """,
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_delete AFTER DELETE ON notes_note BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, text, owner)
+        VALUES ('delete', old.id, old.title, old.text, 'u' || old.author_id);
+    END
+    """,
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_update AFTER UPDATE ON notes_note BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, text, owner)
+        VALUES ('delete', old.id, old.title, old.text, 'u' || old.author_id);
+        INSERT INTO {FTS_TABLE}(rowid, title, text, owner)
+        VALUES (new.id, new.title, new.text, 'u' || new.author_id);
+    END
+    """,
+)
+
+UNINSTALL_SQL = (
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_insert',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_delete',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_update',
+    f'DROP TABLE IF EXISTS {FTS_TABLE}',
+)
+
+
+def is_supported(db=None):
+    return (db or connection).vendor == 'sqlite'
+
+
+def _execute(db, statements):
+    with db.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+def install(db=None):
+    """Создаёт индекс и триггеры; повторный вызов восстанавливает триггеры."""
+    db = db or connection
+    if is_supported(db):
+        _execute(db, INSTALL_SQL)
+
+
+def uninstall(db=None):
+    db = db or connection
+    if is_supported(db):
+        _execute(db, UNINSTALL_SQL)
+
+
+def drop_triggers(db=None):
+    """Снимает триггеры, например на время массовой вставки."""
+    db = db or connection
+    if is_supported(db):
+        _execute(db, INSTALL_SQL[:3])
+
+
+def index_since(note_id, db=None):
+    """Индексирует заметки с id не меньше note_id одним запросом."""
+    db = db or connection
+    if is_supported(db):
+        with db.cursor() as cursor:
+            cursor.execute(
+                f"""
+                INSERT INTO {FTS_TABLE}(rowid, title, text, owner)
+                SELECT id, title, text, 'u' || author_id FROM notes_note
+                WHERE id >= %s
+                """,
+                (note_id,),
+            )
+
+
+def rebuild(db=None):
+    """Перестраивает индекс по текущему содержимому таблицы заметок."""
+    db = db or connection
+    install(db)
+    if is_supported(db):
+        _execute(db, (
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('delete-all')",
+            f"""
+            INSERT INTO {FTS_TABLE}(rowid, title, text, owner)
+            SELECT id, title, text, 'u' || author_id FROM notes_note
+            """,
+        ))
+
+
+def build_query(user, text):
+    """
+    Превращает пользовательский ввод в запрос FTS5.
+
+    Каждое слово берётся в кавычки, чтобы спецсимволы синтаксиса FTS5
+    не ломали запрос; все слова должны встретиться в заметке.
+    """
+    terms = ' '.join(
+        '"{}"'.format(word.replace('"', '""')) for word in text.split()
+    )
+    if not terms:
+        return None
+    return f'owner : "u{user.pk}" AND {{title text}} : ({terms})'
+
+
+def search_ids(user, text, limit, db=None):
+    """Возвращает id заметок пользователя в порядке релевантности."""
+    query = build_query(user, text)
+    if query is None:
+        return []
+    with (db or connection).cursor() as cursor:
+        cursor.execute(
+            f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+            f'ORDER BY bm25({FTS_TABLE}, 10.0, 1.0, 0.0) LIMIT %s',
+            (query, limit),
+        )
+        return [row[0] for row in cursor.fetchall()]
@@ -0,0 +1,153 @@
+"""
+Быстрое наполнение базы синтетическими заметками.
+
+Данные полностью определяются параметром seed. Заметки вставляются
+пачками через cursor.executemany в обход создания объектов моделей, а
+адреса строятся из заголовка и будущего id заметки, поэтому уникальны
+без проверочного запроса на каждую строку, как в NoteForm.clean_slug.
+Записи каталога адресов NoteSlug вставляются так же, а заметки — в
+шарды своих авторов. На время вставки триггеры поиска снимаются, а новые
+заметки индексируются одним запросом в конце.
+"""
+import random
+import time
+from array import array
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import DEFAULT_DB_ALIAS, connection, connections, transaction
+from django.utils import timezone
+from pytils.translit import slugify
+
+from notes import search
+from notes.models import Note, NoteSlug
+from notes.sharding import shard_for
+
+BATCH_SIZE = 5000
+TEXT_VARIANTS = 1000
+USER_PREFIX = 'seed-writer-'
+WORDS = (
+    'покупки', 'работа', 'идея', 'встреча', 'книга', 'отпуск', 'проект',
+    'список', 'звонок', 'рецепт', 'ремонт', 'учёба',
+)
+
+
+def _texts(rng, words):
+    """Заранее собранные тексты: выбирать готовый быстрее, чем склеивать."""
+    return [
+        ' '.join(rng.choice(WORDS) for _ in range(words))
+        for _ in range(TEXT_VARIANTS)
+    ]
+
+
+def seed_users(count, batch_size=BATCH_SIZE):
+    """
+    Создаёт пользователей seed-writer-N без пароля.
+
+    Уже существующие пропускаются, поэтому повторный запуск безопасен.
+    Возвращает id всех таких пользователей.
+    """
+    User = get_user_model()
+    password = make_password(None)
+    User.objects.bulk_create(
+        (
+            User(username=f'{USER_PREFIX}{index}', password=password)
+            for index in range(count)
+        ),
+        batch_size=batch_size,
+        ignore_conflicts=True,
+    )
+    return array('q', User.objects.filter(
+        username__startswith=USER_PREFIX
+    ).order_by('pk').values_list('pk', flat=True)[:count])
+
+
+def seed_notes(notes, users, seed=0, batch_size=BATCH_SIZE, progress=None):
+    """
+    Создаёт notes заметок, распределённых между users пользователями.
+
+    Каждая десятая заметка принадлежит первому пользователю, чтобы у
+    него был длинный список. Возвращает id этого пользователя.
+    """
+    rng = random.Random(seed)
+    titles, texts = _texts(rng, 3), _texts(rng, 40)
+    max_slug_length = Note._meta.get_field('slug').max_length
+    slugs = [slugify(title) for title in titles]
+    user_ids = seed_users(max(users, 1), batch_size)
+    shards = {
+        user_id: shard_for(user_id, write=True) for user_id in user_ids
+    } if settings.NOTES_SHARDS else {}
+    aliases = set(shards.values()) or {DEFAULT_DB_ALIAS}
+    last_id = NoteSlug.objects.order_by('-pk').values_list(
+        'pk', flat=True
+    ).first()
+    first_id = (last_id or 0) + 1
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+
+    def rows():
+        for index in range(notes):
+            variant = rng.randrange(TEXT_VARIANTS)
+            suffix = f'-{first_id + index}'
+            yield (
+                first_id + index,
+                titles[variant],
+                texts[rng.randrange(TEXT_VARIANTS)],
+                slugs[variant][:max_slug_length - len(suffix)] + suffix,
+                user_ids[
+                    0 if index % 10 == 0 else rng.randrange(len(user_ids))
+                ],
+                now,
+            )
+
+    notes_sql = _insert_sql(
+        Note, ('id', 'title', 'text', 'slug', 'author', 'modified')
+    )
+    slugs_sql = _insert_sql(NoteSlug, ('id', 'slug', 'author'))
+    for alias in aliases:
+        search.drop_triggers(connections[alias])
+    started = time.perf_counter()
+    done = 0
+    source = rows()
+    try:
+        while True:
+            batch = list(islice(source, batch_size))
+            if not batch:
+                break
+            _write_batch(batch, shards, notes_sql, slugs_sql)
+            done += len(batch)
+            if progress is not None:
+                progress(Note, done, notes, time.perf_counter() - started)
+    finally:
+        for alias in aliases:
+            search.install(connections[alias])
+    for alias in aliases:
+        search.index_since(first_id, connections[alias])
+    return user_ids[0]
+
+
+def _write_batch(batch, shards, notes_sql, slugs_sql):
+    by_alias = {}
+    for row in batch:
+        by_alias.setdefault(
+            shards.get(row[4], DEFAULT_DB_ALIAS), []
+        ).append(row)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.executemany(
+            slugs_sql, [(row[0], row[3], row[4]) for row in batch]
+        )
+        for alias, rows in by_alias.items():
+            with transaction.atomic(using=alias), \
+                    connections[alias].cursor() as shard_cursor:
+                shard_cursor.executemany(notes_sql, rows)
+
+
+def _insert_sql(model, fields):
+    quote = connection.ops.quote_name
+    return 'INSERT INTO {} ({}) VALUES ({})'.format(
+        quote(model._meta.db_table),
+        ', '.join(quote(model._meta.get_field(field).column)
+                  for field in fields),
+        ', '.join(['%s'] * len(fields)),
+    )
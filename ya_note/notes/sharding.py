@@ -0,0 +1,298 @@
+"""
+Разделение заметок по авторам между базами settings.NOTES_SHARDS.
+
+Все заметки и записи об удалении одного автора лежат в одном шарде.
+Шард автора записан в AuthorShard в основной базе; новый автор при
+первой записи получает шард по rendezvous-хешу, так что добавление шарда
+меняет место лишь у части авторов. Автор без записи, у которого уже есть
+заметки в основной базе, остаётся там: это позволяет включить шарды на
+работающем сайте и переносить авторов по одному.
+
+Запросы к заметкам автора строятся через for_author, а ShardRouter
+направляет в шард сохранение и удаление объектов. Адреса заметок
+уникальны во всём сайте благодаря каталогу NoteSlug, который также
+выдаёт id, одинаковые во всех шардах.
+
+move_author переносит автора, не останавливая сайт: заметки копируются,
+затем на settings.NOTES_SHARD_MOVE_GRACE секунд запись для автора
+закрывается (ShardMiddleware отвечает 503), докопируются изменения,
+и шард автора переключается. Чтения с реплик для шардов не
+поддерживаются: с включёнными шардами заметки читаются из шардов.
+"""
+import asyncio
+import time
+from datetime import timedelta
+from zlib import crc32
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models.signals import pre_delete
+from django.dispatch import receiver
+from django.http import HttpResponse
+from django.utils import timezone
+
+from .models import AuthorShard, Note, NoteTombstone
+
+SHARDED_MODELS = {'note', 'notetombstone'}
+COPY_BATCH_SIZE = 1000
+
+
+class AuthorMoving(Exception):
+    """Автор переносится в другой шард, запись временно закрыта."""
+
+
+def hashed_shard(author_id):
+    """Шард автора по rendezvous-хешу среди settings.NOTES_SHARDS."""
+    return max(
+        settings.NOTES_SHARDS,
+        key=lambda alias: crc32(f'{alias}:{author_id}'.encode()),
+    )
+
+
+def _has_notes(author_id, alias):
+    return (
+        Note.objects.using(alias).filter(author_id=author_id).exists()
+        or NoteTombstone.objects.using(alias).filter(
+            author_id=author_id
+        ).exists()
+    )
+
+
+def placement(author_id, write=False):
+    """
+    Шард автора и признак переноса.
+
+    Для записи автор без шарда закрепляется за ним: за основной базой,
+    если заметки уже там, иначе за шардом по хешу.
+    """
+    row = AuthorShard.objects.filter(author_id=author_id).values_list(
+        'alias', 'moving'
+    ).first()
+    if row is not None or not write:
+        return row or (DEFAULT_DB_ALIAS, False)
+    if _has_notes(author_id, DEFAULT_DB_ALIAS):
+        alias = DEFAULT_DB_ALIAS
+    else:
+        alias = hashed_shard(author_id)
+    row, _ = AuthorShard.objects.get_or_create(
+        author_id=author_id, defaults={'alias': alias}
+    )
+    return row.alias, row.moving
+
+
+def shard_for(author, write=False):
+    """
+    Алиас базы с заметками автора; author — пользователь или его id.
+
+    Для пользователя ответ запоминается до конца запроса. При записи во
+    время переноса автора поднимается AuthorMoving.
+    """
+    if not settings.NOTES_SHARDS:
+        return DEFAULT_DB_ALIAS
+    author_id = getattr(author, 'pk', author)
+    cached = getattr(author, '_note_shard', None)
+    if cached is not None and (not write or cached[2]):
+        alias, moving, _ = cached
+    else:
+        alias, moving = placement(author_id, write)
+        if hasattr(author, 'pk'):
+            author._note_shard = (alias, moving, write)
+    if write and moving:
+        raise AuthorMoving(author_id)
+    return alias
+
+
+class ShardRouter:
+    """Направляет заметки и записи об удалении в шард их автора."""
+
+    def _shard(self, model, hints, write):
+        if not settings.NOTES_SHARDS or (
+                model._meta.app_label != 'notes'
+                or model._meta.model_name not in SHARDED_MODELS):
+            return None
+        instance = hints.get('instance')
+        if isinstance(instance, (Note, NoteTombstone)):
+            return shard_for(instance.author_id, write)
+        if isinstance(instance, get_user_model()):
+            return shard_for(instance, write)
+        return None
+
+    def db_for_read(self, model, **hints):
+        return self._shard(model, hints, write=False)
+
+    def db_for_write(self, model, **hints):
+        return self._shard(model, hints, write=True)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if settings.NOTES_SHARDS:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == DEFAULT_DB_ALIAS or db not in settings.NOTES_SHARDS:
+            return None
+        # В шардах только заметки, записи об удалении и индекс поиска.
+        return app_label == 'notes' and model_name in (None, *SHARDED_MODELS)
+
+
+class ShardMiddleware:
+    """Отвечает 503, пока автор переносится в другой шард."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        # В асинхронной цепочке возвращает корутину следующего звена.
+        return self.get_response(request)
+
+    def process_exception(self, request, exception):
+        if isinstance(exception, AuthorMoving):
+            response = HttpResponse(
+                'Заметки переносятся, повторите через несколько секунд.',
+                status=503,
+            )
+            response['Retry-After'] = str(settings.NOTES_SHARD_MOVE_GRACE)
+            return response
+        return None
+
+
+@receiver(pre_delete, sender=settings.AUTH_USER_MODEL)
+def delete_sharded_notes(sender, instance, using, **kwargs):
+    """Удаляет заметки пользователя из шарда вне основной базы."""
+    if not settings.NOTES_SHARDS:
+        return
+    alias = shard_for(instance.pk)
+    if alias != using:
+        Note.objects.using(alias).filter(author_id=instance.pk).delete()
+        NoteTombstone.objects.using(alias).filter(
+            author_id=instance.pk
+        ).delete()
+
+
+def _fields(model):
+    return model._meta.concrete_fields
+
+
+def _insert(alias, model, rows):
+    """Вставляет строки как есть, в обход auto_now и сохранения моделей."""
+    if not rows:
+        return
+    connection = connections[alias]
+    quote = connection.ops.quote_name
+    fields = _fields(model)
+    sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+        quote(model._meta.db_table),
+        ', '.join(quote(field.column) for field in fields),
+        ', '.join(['%s'] * len(fields)),
+    )
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, [
+            [
+                field.get_db_prep_value(value, connection)
+                for field, value in zip(fields, row)
+            ]
+            for row in rows
+        ])
+
+
+def _copy_notes(author_id, source, target, queryset):
+    """Копирует строки заметок с теми же id и временем изменения."""
+    rows = queryset.using(source).filter(author_id=author_id).order_by(
+        'pk'
+    ).values_list(*(field.attname for field in _fields(Note)))
+    batch = []
+    copied = 0
+    for row in rows.iterator(chunk_size=COPY_BATCH_SIZE):
+        batch.append(row)
+        if len(batch) == COPY_BATCH_SIZE:
+            with transaction.atomic(using=target):
+                _insert(target, Note, batch)
+            copied += len(batch)
+            batch = []
+    with transaction.atomic(using=target):
+        _insert(target, Note, batch)
+    return copied + len(batch)
+
+
+def _copy_tombstones(author_id, source, target):
+    """
+    Копирует записи об удалении с id больше любого id в источнике.
+
+    Курсор клиента хранит id записи об удалении из старого шарда, поэтому
+    копии должны оказаться после него; повторное удаление безвредно.
+    """
+    tombstones = list(NoteTombstone.objects.using(source).filter(
+        author_id=author_id
+    ).order_by('pk').values_list('note_id', 'author_id', 'deleted'))
+    start = max(
+        NoteTombstone.objects.using(alias).order_by('-pk').values_list(
+            'pk', flat=True
+        ).first() or 0
+        for alias in (source, target)
+    ) + 1
+    _insert(
+        target, NoteTombstone,
+        [(start + index, *row) for index, row in enumerate(tombstones)],
+    )
+
+
+def _purge(author_id, alias):
+    Note.objects.using(alias).filter(author_id=author_id).delete()
+    NoteTombstone.objects.using(alias).filter(
+        author_id=author_id
+    ).delete()
+
+
+def move_author(author_id, target, grace=None):
+    """
+    Переносит заметки автора в шард target, не останавливая сайт.
+
+    Возвращает число перенесённых заметок или None, если автор уже там.
+    """
+    grace = settings.NOTES_SHARD_MOVE_GRACE if grace is None else grace
+    source, _ = placement(author_id, write=True)
+    if source == target:
+        return None
+    # Остатки прерванного переноса.
+    _purge(author_id, target)
+    started = timezone.now()
+    _copy_notes(author_id, source, target, Note.objects.all())
+    AuthorShard.objects.filter(author_id=author_id).update(moving=True)
+    try:
+        # Запросы, узнавшие шард до закрытия записи, успевают завершиться.
+        time.sleep(grace)
+        lag = timedelta(seconds=grace + settings.NOTES_SYNC_LAG)
+        changed = Note.objects.using(source).filter(
+            author_id=author_id, modified__gte=started - lag
+        )
+        with transaction.atomic(using=target):
+            Note.objects.using(target).filter(
+                author_id=author_id,
+                pk__in=list(changed.values_list('pk', flat=True)),
+            ).delete()
+            _copy_notes(author_id, source, target, changed)
+            kept = set(Note.objects.using(source).filter(
+                author_id=author_id
+            ).values_list('pk', flat=True))
+            deleted = [
+                pk for pk in Note.objects.using(target).filter(
+                    author_id=author_id
+                ).values_list('pk', flat=True)
+                if pk not in kept
+            ]
+            Note.objects.using(target).filter(
+                pk__in=deleted
+            ).delete()
+            _copy_tombstones(author_id, source, target)
+        AuthorShard.objects.filter(author_id=author_id).update(alias=target)
+    finally:
+        AuthorShard.objects.filter(author_id=author_id).update(moving=False)
+    with transaction.atomic(using=source):
+        _purge(author_id, source)
+    return len(kept)
@@ -0,0 +1,29 @@
+"""
+Профиль соединений SQLite.
+
+Сразу после открытия соединения к нему применяются PRAGMA из
+settings.SQLITE_PROFILES[settings.SQLITE_PROFILE]. Рабочий профиль
+включает журнал WAL, при котором читатели не ждут писателя, а писатель —
+читателей, отображение файла в память, ожидание блокировки вместо
+немедленной ошибки «database is locked» и synchronous=NORMAL, которого
+в режиме WAL достаточно для целостности базы. Держать соединения
+открытыми между запросами позволяет CONN_MAX_AGE в DATABASES.
+"""
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+def pragmas():
+    return settings.SQLITE_PROFILES[settings.SQLITE_PROFILE]
+
+
+@receiver(connection_created)
+def apply_profile(sender, connection, **kwargs):
+    """Применяет PRAGMA профиля к новому соединению SQLite."""
+    if connection.vendor != 'sqlite':
+        return
+    # Напрямую через sqlite3: служебные запросы не должны попадать в учёт
+    # запросов страницы.
+    for name, value in pragmas().items():
+        connection.connection.execute(f'PRAGMA {name} = {value}')
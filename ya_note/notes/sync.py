@@ -0,0 +1,82 @@
+"""
+Синхронизация заметок с клиентами по курсору.
+
+Курсор хранит позицию в двух упорядоченных лентах пользователя:
+изменённых заметок по (modified, id) и записей об удалении по id.
+Заметки, изменённые позже чем settings.NOTES_SYNC_LAG секунд назад, в
+ответ не попадают: время изменения выставляется до фиксации транзакции,
+и без запаса медленная транзакция могла бы оказаться позади курсора.
+"""
+import json
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Note, NoteTombstone
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+CHUNK_SIZE = 500
+NOTE_FIELDS = ('id', 'slug', 'title', 'text', 'modified')
+
+
+def encode_cursor(modified, note_id, tombstone_id):
+    return f'{(modified - EPOCH) // MICROSECOND}.{note_id}.{tombstone_id}'
+
+
+def decode_cursor(value):
+    """Разбирает курсор; пустой курсор означает полную синхронизацию."""
+    if not value:
+        return EPOCH, 0, 0
+    microseconds, note_id, tombstone_id = map(int, value.split('.'))
+    return EPOCH + microseconds * MICROSECOND, note_id, tombstone_id
+
+
+def _line(data):
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+
+
+def changes(user, cursor, limit):
+    """
+    Отдаёт строки NDJSON с изменениями заметок пользователя после курсора.
+
+    Сначала идут изменённые и новые заметки ({"put": {...}}), затем id
+    удалённых ({"delete": id}), последней — новый курсор и признак того,
+    что за limit записями есть ещё изменения.
+    """
+    modified, note_id, tombstone_id = cursor
+    upper = timezone.now() - timedelta(seconds=settings.NOTES_SYNC_LAG)
+    notes = Note.objects.for_author(user).filter(
+        modified__gte=modified, modified__lte=upper
+    ).exclude(
+        modified=modified, id__lte=note_id
+    ).order_by('modified', 'id').values_list(*NOTE_FIELDS)[:limit]
+    sent = 0
+    lines = []
+    for row in notes.iterator(chunk_size=CHUNK_SIZE):
+        note = dict(zip(NOTE_FIELDS, row))
+        modified, note_id = note['modified'], note['id']
+        note['modified'] = modified.isoformat()
+        lines.append(_line({'put': note}))
+        sent += 1
+        if len(lines) == CHUNK_SIZE:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    more = sent == limit
+    tombstones = NoteTombstone.objects.for_author(user).filter(
+        id__gt=tombstone_id, deleted__lte=upper
+    ).order_by('id').values_list('id', 'note_id')[:limit]
+    deleted = 0
+    for tombstone_id, deleted_note_id in tombstones.iterator(
+            chunk_size=CHUNK_SIZE):
+        lines.append(_line({'delete': deleted_note_id}))
+        deleted += 1
+        if len(lines) == CHUNK_SIZE:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    lines.append(_line({
+        'cursor': encode_cursor(modified, note_id, tombstone_id),
+        'more': more or deleted == limit,
+    }))
+    yield '\n'.join(lines) + '\n'
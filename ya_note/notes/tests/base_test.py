@@ -3,11 +3,23 @@ from django.test import Client
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 
+from notes.middleware import assert_query_budget, capture_reports
 from notes.models import Note
 
 User = get_user_model()
 
 
+class QueryBudgetMixin:
+    """Проверка бюджета SQL-запросов страницы."""
+
+    def check_query_budget(self, client, url, budget=None, **kwargs):
+        with capture_reports() as reports:
+            client.get(url, **kwargs)
+        report = reports[-1]
+        assert_query_budget(report, budget)
+        return report
+
+
 # У меня уже нет времени улучшать код,
 # сегодня последний день сдачи этой работы. Потом мне переход оформят.(((
 # И я потеряю последний переход.
@@ -33,6 +45,7 @@ class BaseTestContent(TestCase):
         cls.list_url = reverse('notes:list')
         cls.add_url = reverse('notes:add')
         cls.edit_url = reverse('notes:edit', args=(cls.note.slug,))
+        cls.search_url = reverse('notes:search')
 
 
 class BaseTestLogic(TestCase):
@@ -76,7 +89,7 @@ class BaseTestLogic(TestCase):
         }
 
 
-class BaseTestRoutes(TestCase):
+class BaseTestRoutes(QueryBudgetMixin, TestCase):
     @classmethod
     def setUpTestData(cls):
         cls.author = User.objects.create(username='Пользователь')
@@ -104,4 +117,5 @@ class BaseTestRoutes(TestCase):
             reverse('notes:add'),
             reverse('notes:list'),
             reverse('notes:success'),
+            reverse('notes:search'),
         )
@@ -0,0 +1,54 @@
+import os
+import subprocess
+import sys
+from http import HTTPStatus
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import Client
+
+from notes import auth
+from .base_test import BaseTestRoutes
+
+User = get_user_model()
+
+
+class TestCachedUser(BaseTestRoutes):
+    def test_password_change_ends_cached_session(self):
+        """Смена пароля завершает сессию, даже если пользователь в кеше."""
+        client = Client()
+        client.force_login(self.author)
+        url = self.urls_for_author_access[1]
+        self.assertEqual(client.get(url).status_code, HTTPStatus.OK)
+        self.author.set_password('Новый пароль')
+        self.author.save()
+        self.assertRedirects(client.get(url), f'{self.login_url}?next={url}')
+
+    def test_update_bypasses_user_cache_until_invalidated(self):
+        """QuerySet.update не сбрасывает кеш: это делает auth.invalidate."""
+        client = Client()
+        client.force_login(self.author)
+        url = self.urls_for_author_access[1]
+        self.assertEqual(client.get(url).status_code, HTTPStatus.OK)
+        User.objects.filter(pk=self.author.pk).update(is_active=False)
+        self.assertEqual(client.get(url).status_code, HTTPStatus.OK)
+        auth.invalidate(self.author.pk)
+        self.assertRedirects(client.get(url), f'{self.login_url}?next={url}')
+
+    def test_session_cache_is_shared_between_processes(self):
+        """Кеш сессий и пользователей виден другим процессам сервера."""
+        subprocess.run(
+            (
+                sys.executable, '-c',
+                'import django; django.setup(); '
+                'from django.conf import settings; '
+                'from django.core.cache import caches; '
+                'caches[settings.SESSION_CACHE_ALIAS].set("shared", 1)',
+            ),
+            check=True, cwd=settings.BASE_DIR,
+            env={**os.environ, 'DJANGO_SETTINGS_MODULE': 'yanote.settings'},
+        )
+        cache = caches[settings.SESSION_CACHE_ALIAS]
+        self.addCleanup(cache.delete, 'shared')
+        self.assertEqual(cache.get('shared'), 1)
@@ -0,0 +1,31 @@
+import time
+from http import HTTPStatus
+
+from django.utils.http import http_date
+
+from .base_test import BaseTestRoutes
+
+
+class TestConditionalGet(BaseTestRoutes):
+    def test_note_detail_not_modified(self):
+        """Неизменившаяся заметка отдаётся ответом 304 без рендеринга."""
+        url = self.urls_for_author_only[0]
+        etag = self.author_client.get(url)['ETag']
+        # Сессия и пользователь берутся из кеша: остаётся только проверка
+        # времени изменения заметки.
+        with self.assertNumQueries(1):
+            response = self.author_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        self.assertNotEqual(self.reader_client.get(url).get('ETag'), etag)
+        self.note.save()
+        response = self.author_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_note_detail_ignores_if_modified_since(self):
+        """Страница заметки не отдаёт Last-Modified, только ETag."""
+        url = self.urls_for_author_only[0]
+        self.assertNotIn('Last-Modified', self.author_client.get(url))
+        response = self.author_client.get(
+            url, HTTP_IF_MODIFIED_SINCE=http_date(time.time() + 60)
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
@@ -1,6 +1,7 @@
 from django.contrib.auth import get_user_model
 
 from notes.forms import NoteForm
+from notes.models import Note
 from .base_test import BaseTestContent
 
 User = get_user_model()
@@ -18,6 +19,30 @@ class TestContent(BaseTestContent):
         notes = response.context['object_list']
         self.assertIn(self.note, notes)
 
+    def test_notes_list_is_paginated(self):
+        """Список заметок разбит на страницы в порядке создания."""
+        Note.objects.bulk_create(
+            Note(title=f'Заметка {index}', text='Текст', slug=f'note-{index}',
+                 author=self.author)
+            for index in range(3)
+        )
+        with self.settings(NOTES_COUNT_ON_PAGE=2):
+            first = self.author_client.get(self.list_url)
+            second = self.author_client.get(self.list_url, {'page': 2})
+        first_page = list(first.context['object_list'])
+        second_page = list(second.context['object_list'])
+        self.assertEqual(len(first_page), 2)
+        self.assertEqual(len(second_page), 2)
+        ids = [note.id for note in first_page + second_page]
+        self.assertEqual(ids, sorted(ids))
+        self.assertEqual(first_page[0], self.note)
+
+    def test_notes_list_loads_only_listed_fields(self):
+        """Список заметок не загружает текст заметки."""
+        response = self.author_client.get(self.list_url)
+        note = response.context['object_list'][0]
+        self.assertIn('text', note.get_deferred_fields())
+
     def test_edit_and_add_note_pages_contains_form(self):
         """Проверка передачи формы в контекст."""
         urls = (
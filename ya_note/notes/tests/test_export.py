@@ -0,0 +1,60 @@
+import io
+import json
+import os
+import tempfile
+import zipfile
+
+from django.core.management import call_command
+from django.urls import reverse
+
+from notes import export
+from notes.models import Note
+from .base_test import BaseTestContent
+
+
+class TestNoteExport(BaseTestContent):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        Note.objects.bulk_create(
+            Note(title=f'Заметка {index}', text='Текст',
+                 slug=f'export-{index}', author=cls.author)
+            for index in range(export.CHUNK_SIZE + 1)
+        )
+        cls.export_url = reverse('notes:export')
+        cls.expected = list(
+            Note.objects.filter(author=cls.author).order_by('id').values_list(
+                'slug', flat=True
+            )
+        )
+
+    def slugs(self, content):
+        return [json.loads(line)['slug'] for line in content.splitlines()]
+
+    def test_export_jsonl(self):
+        """Выгрузка в JSON Lines содержит все заметки пользователя."""
+        response = self.author_client.get(self.export_url)
+        self.assertTrue(response.streaming)
+        content = b''.join(response.streaming_content)
+        self.assertEqual(self.slugs(content), self.expected)
+
+    def test_export_zip(self):
+        """Архив zip открывается и содержит те же заметки."""
+        response = self.author_client.get(self.export_url, {'format': 'zip'})
+        archive = zipfile.ZipFile(
+            io.BytesIO(b''.join(response.streaming_content))
+        )
+        content = archive.read(export.MEMBER_NAME)
+        self.assertEqual(self.slugs(content), self.expected)
+
+    def test_export_command(self):
+        """Команда export_notes пишет выгрузку в файл."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'notes.jsonl')
+            call_command(
+                'export_notes', self.author.username, output=path,
+                stderr=io.StringIO(),
+            )
+            with open(path, 'rb') as output:
+                self.assertEqual(self.slugs(output.read()), self.expected)
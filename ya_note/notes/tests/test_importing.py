@@ -0,0 +1,122 @@
+import json
+import os
+import tempfile
+from http import HTTPStatus
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import IntegrityError
+from django.urls import reverse
+from pytils.translit import slugify
+
+from notes import importing
+from notes.models import Note
+from .base_test import BaseTestLogic
+
+
+class TestNoteImport(BaseTestLogic):
+    URL_IMPORT = reverse('notes:import')
+
+    def test_import_allocates_slugs_in_one_pass(self):
+        """Повторяющиеся адреса получают суффиксы за один запрос."""
+        Note.objects.create(
+            title=self.NOTE_TITLE, text=self.NOTE_TEXT, author=self.author
+        )
+        base = slugify(self.NOTE_TITLE)
+        rows = [{'title': self.NOTE_TITLE, 'text': self.NOTE_TEXT}] * 3
+        # Проверка адресов, точка сохранения, запись адресов в каталог и
+        # чтение выданных им id, вставка заметок и завершение.
+        with self.assertNumQueries(6):
+            created, errors = importing.import_notes(
+                self.author, enumerate(rows, start=1)
+            )
+        self.assertEqual(
+            created, [f'{base}-2', f'{base}-3', f'{base}-4']
+        )
+        self.assertEqual(errors, {})
+
+    def test_import_retries_after_slug_race(self):
+        """Если адрес заняли после проверки, пачка записывается заново."""
+        taken = importing._taken
+        calls = []
+
+        def stale(candidates):
+            calls.append(candidates)
+            return set() if len(calls) == 1 else taken(candidates)
+
+        row = {'title': 'Гонка', 'text': 'Текст', 'slug': self.note.slug}
+        with mock.patch.object(importing, '_taken', stale):
+            created, _ = importing.import_notes(self.author, [(1, row)])
+        self.assertEqual(created, [f'{self.note.slug}-2'])
+        self.assertEqual(len(calls), 2)
+
+    def test_import_api(self):
+        """API создаёт заметки и сообщает номера ошибочных строк файла."""
+        body = '\n\n'.join(json.dumps(row, ensure_ascii=False) for row in (
+            {'title': 'Первая', 'text': 'Текст', 'slug': 'first'},
+            {'title': 'Без текста'},
+            {'title': 'Вторая', 'text': 'Текст', 'slug': 'first'},
+        ))
+        response = self.author_client.post(
+            self.URL_IMPORT, body, content_type='application/x-ndjson'
+        )
+        self.assertEqual(response.status_code, HTTPStatus.CREATED)
+        data = response.json()
+        self.assertEqual(data['created'], ['first', 'first-2'])
+        # Пустые строки не сдвигают нумерацию.
+        self.assertEqual(list(data['errors']), ['3'])
+        self.assertEqual(
+            Note.objects.filter(author=self.author, slug__in=data['created'])
+            .count(), 2
+        )
+
+    def test_import_reports_progress_on_malformed_line(self):
+        """Ответ о прерванном импорте перечисляет записанные заметки."""
+        body = '\n'.join([
+            *(json.dumps({'title': f'Заметка {number}', 'slug': f'n{number}',
+                          'text': 'Текст'}) for number in range(3)),
+            '{broken',
+        ])
+        with mock.patch.object(importing.import_notes, '__defaults__', (2,)):
+            response = self.author_client.post(
+                self.URL_IMPORT, body, content_type='application/x-ndjson'
+            )
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+        data = response.json()
+        self.assertEqual(data['created'], ['n0', 'n1'])
+        self.assertEqual(data['failed_line'], 4)
+        self.assertEqual(
+            list(Note.objects.filter(slug__startswith='n').values_list(
+                'slug', flat=True
+            ).order_by('slug')),
+            ['n0', 'n1'],
+        )
+
+    def test_import_reports_conflict_after_retries(self):
+        """Исчерпанные попытки записи дают 409, а не ошибку сервера."""
+        row = json.dumps({'title': 'Гонка', 'text': 'Текст'})
+        with mock.patch.object(
+            importing, '_write', side_effect=IntegrityError
+        ):
+            response = self.author_client.post(
+                self.URL_IMPORT, row, content_type='application/x-ndjson'
+            )
+        self.assertEqual(response.status_code, HTTPStatus.CONFLICT)
+        self.assertEqual(response.json()['created'], [])
+
+    def test_import_command(self):
+        """Команда import_notes читает выгрузку export_notes."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'notes.jsonl')
+            call_command(
+                'export_notes', self.author.username, output=path,
+                stderr=StringIO(),
+            )
+            call_command(
+                'import_notes', self.reader.username, path,
+                stdout=StringIO(),
+            )
+        copy = Note.objects.get(author=self.reader)
+        self.assertEqual(copy.text, self.note.text)
+        self.assertEqual(copy.slug, f'{self.note.slug}-2')
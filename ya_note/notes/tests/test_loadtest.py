@@ -0,0 +1,21 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TransactionTestCase
+
+from notes.models import Note
+
+
+class TestLoadtest(TransactionTestCase):
+    def test_loadtest_reports_every_url(self):
+        """Команда loadtest проходит сценарии и отчитывается по URL."""
+        stdout = StringIO()
+        for scenario in ('browse', 'crud'):
+            call_command(
+                'loadtest', workers=1, iterations=1, stdout=stdout,
+                scenario=[(scenario, 1)],
+            )
+        output = stdout.getvalue()
+        for view in ('notes:list', 'notes:add', 'notes:delete'):
+            self.assertIn(view, output)
+        self.assertFalse(Note.objects.exists())
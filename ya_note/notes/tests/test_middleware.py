@@ -0,0 +1,50 @@
+import asyncio
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.handlers.asgi import ASGIHandler
+from django.test import AsyncClient, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from notes.middleware import capture_reports
+from notes.models import Note
+from .base_test import BaseTestRoutes
+
+User = get_user_model()
+
+
+class TestQueryInspector(BaseTestRoutes):
+    def test_asgi_chain_is_not_adapted_to_sync(self):
+        """Под ASGI ни один middleware не переводит цепочку в поток."""
+        # Django сообщает о переводе в поток только при DEBUG.
+        with override_settings(DEBUG=True), self.assertNoLogs(
+            'django.request', 'DEBUG'
+        ):
+            ASGIHandler()
+
+    def test_query_budget(self):
+        """Страницы укладываются в бюджет SQL-запросов без N+1."""
+        urls = (
+            self.urls_for_anonymous_access[:1] + self.urls_for_author_only
+            + self.urls_for_author_access
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                self.check_query_budget(
+                    self.author_client, url, data={'q': 'x'}
+                )
+
+
+class TestAsyncQueryInspector(TransactionTestCase):
+    def test_async_chain_reports_queries(self):
+        """Учёт SQL-запросов видит запросы страниц под ASGI."""
+        author = User.objects.create(username='Автор')
+        Note.objects.create(title='Заголовок', text='Текст', author=author)
+        client = AsyncClient()
+        client.force_login(author)
+        with capture_reports() as reports:
+            response = asyncio.run(client.get(reverse('notes:list')))
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        report, = reports
+        self.assertEqual(report['view'], 'notes:list')
+        self.assertGreater(report['count'], 0)
@@ -0,0 +1,45 @@
+import asyncio
+import tempfile
+from http import HTTPStatus
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import call_command
+from django.test import AsyncClient, override_settings
+from django.urls import reverse
+
+from .base_test import BaseTestRoutes
+
+
+class TestProfiling(BaseTestRoutes):
+    def test_sampled_requests_are_profiled_and_reported(self):
+        """Профили выбранных страниц сохраняются с ротацией и сводятся."""
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        root = Path(directory.name)
+        with override_settings(
+            PROFILING_DIR=root, PROFILING_VIEWS={'notes:list'},
+            PROFILING_KEEP=2,
+        ):
+            self.author_client.get(reverse('notes:home'))
+            for _ in range(3):
+                self.author_client.get(reverse('notes:list'))
+            self.assertEqual(
+                [path.name for path in root.iterdir()], ['notes.list']
+            )
+            self.assertEqual(len(list(root.glob('notes.list/*.prof'))), 2)
+            stdout = StringIO()
+            call_command('profile_report', '--top', '5', stdout=stdout)
+        self.assertIn('notes.list: профилей 2', stdout.getvalue())
+
+    def test_sampled_requests_are_profiled_in_async_chain(self):
+        """В асинхронной цепочке профиль снимается вокруг ожидания ответа."""
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        root = Path(directory.name)
+        with override_settings(
+            PROFILING_DIR=root, PROFILING_VIEWS={'notes:home'}
+        ):
+            response = asyncio.run(AsyncClient().get(reverse('notes:home')))
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(len(list(root.glob('notes.home/*.prof'))), 1)
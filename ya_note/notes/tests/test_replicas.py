@@ -0,0 +1,63 @@
+import os
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connections
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+
+from notes.models import Note
+
+User = get_user_model()
+
+
+class TestReplicas(TransactionTestCase):
+    ALIAS = 'replica'
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        connections.settings[self.ALIAS] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.path.join(directory.name, 'replica.sqlite3'),
+        }
+        self.addCleanup(self.remove_replica)
+        replicas = override_settings(DATABASE_REPLICAS=[self.ALIAS])
+        replicas.enable()
+        self.addCleanup(replicas.disable)
+        self.author = User.objects.create(username='Автор')
+        self.client.force_login(self.author)
+
+    def remove_replica(self):
+        connections[self.ALIAS].close()
+        del connections[self.ALIAS]
+        del connections.settings[self.ALIAS]
+
+    def test_pages_read_lagging_replica_until_own_write(self):
+        """Страницы читают реплику, а написавший видит свою запись сразу."""
+        note = Note.objects.create(
+            title='Заголовок', text='Текст', author=self.author
+        )
+        call_command('refresh_replicas', stdout=StringIO())
+        Note.objects.create(title='Новая', text='Текст', author=self.author)
+        list_url = reverse('notes:list')
+        detail_url = reverse('notes:detail', args=(note.slug,))
+        response = self.client.get(list_url)
+        self.assertEqual(list(response.context['object_list']), [note])
+        response = self.client.post(
+            reverse('notes:edit', args=(note.slug,)),
+            {'title': 'Правка', 'text': 'Текст', 'slug': note.slug},
+        )
+        self.assertIn(settings.REPLICA_PIN_COOKIE, response.cookies)
+        response = self.client.get(list_url)
+        self.assertEqual(len(response.context['object_list']), 2)
+        self.assertEqual(
+            self.client.get(detail_url).context['note'].title, 'Правка'
+        )
+        del self.client.cookies[settings.REPLICA_PIN_COOKIE]
+        self.assertEqual(
+            self.client.get(detail_url).context['note'].title, 'Заголовок'
+        )
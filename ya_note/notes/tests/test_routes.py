@@ -1,11 +1,7 @@
 from http import HTTPStatus
 
-from django.contrib.auth import get_user_model
-
 from .base_test import BaseTestRoutes
 
-User = get_user_model()
-
 
 class TestRoutes(BaseTestRoutes):
     def test_pages_availability(self):
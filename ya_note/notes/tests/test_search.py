@@ -0,0 +1,35 @@
+from notes.models import Note
+from .base_test import BaseTestContent
+
+
+class TestSearch(BaseTestContent):
+    def test_search_finds_only_own_notes_by_rank(self):
+        """Поиск ищет только по своим заметкам, сначала по заголовку."""
+        by_text = Note.objects.create(
+            title='Покупки', text='Купить молоко', author=self.author
+        )
+        by_title = Note.objects.create(
+            title='Молоко', text='Без лактозы', author=self.author
+        )
+        Note.objects.create(
+            title='Молоко', text='Чужая заметка', slug='milk',
+            author=self.reader
+        )
+        response = self.author_client.get(self.search_url, {'q': 'молоко'})
+        self.assertEqual(
+            list(response.context['object_list']), [by_title, by_text]
+        )
+
+    def test_search_follows_note_changes(self):
+        """Индекс поиска обновляется при изменении и удалении заметки."""
+        self.note.text = 'Синхрофазотрон'
+        self.note.save()
+        response = self.author_client.get(
+            self.search_url, {'q': 'синхрофазотрон'}
+        )
+        self.assertIn(self.note, response.context['object_list'])
+        Note.objects.filter(pk=self.note.pk).delete()
+        response = self.author_client.get(
+            self.search_url, {'q': 'синхрофазотрон'}
+        )
+        self.assertEqual(len(response.context['object_list']), 0)
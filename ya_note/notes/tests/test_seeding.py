@@ -0,0 +1,34 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from notes import search
+from notes.models import Note
+
+User = get_user_model()
+
+
+class TestSeedNotes(TestCase):
+    def test_seed_notes(self):
+        """Команда seed_notes создаёт заметки с уникальными адресами."""
+        options = {'notes': 50, 'users': 3, 'seed': 5}
+        call_command('seed_notes', **options, stdout=StringIO())
+        call_command('seed_notes', **options, stdout=StringIO())
+        self.assertEqual(Note.objects.count(), 100)
+        self.assertEqual(User.objects.count(), 3)
+        self.assertEqual(
+            Note.objects.values('slug').distinct().count(), 100
+        )
+        first, second = (
+            list(Note.objects.order_by('pk').values_list(
+                'title', 'text', 'author'
+            )[start:start + 50])
+            for start in (0, 50)
+        )
+        self.assertEqual(first, second)
+        note = Note.objects.first()
+        self.assertIn(
+            note.pk, search.search_ids(note.author, note.title, 100)
+        )
@@ -0,0 +1,112 @@
+import json
+import os
+import tempfile
+from http import HTTPStatus
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connections
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+
+from notes.forms import WARNING
+from notes.models import AuthorShard, Note, NoteSlug
+
+User = get_user_model()
+
+
+class TestSharding(TransactionTestCase):
+    SHARD = 'shard'
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        connections.settings[self.SHARD] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.path.join(directory.name, 'shard.sqlite3'),
+        }
+        self.addCleanup(self.remove_shard)
+        shards = override_settings(NOTES_SHARDS=['default', self.SHARD])
+        shards.enable()
+        self.addCleanup(shards.disable)
+        call_command('migrate', database=self.SHARD, verbosity=0)
+        self.author = User.objects.create(username='Автор')
+        self.client.force_login(self.author)
+
+    def remove_shard(self):
+        connections[self.SHARD].close()
+        del connections[self.SHARD]
+        del connections.settings[self.SHARD]
+
+    def add(self, client, slug):
+        return client.post(
+            reverse('notes:add'),
+            {'title': 'Заголовок', 'text': 'Текст', 'slug': slug},
+        )
+
+    def sync(self, cursor=''):
+        response = self.client.get(reverse('notes:sync'), {'cursor': cursor})
+        return [
+            json.loads(line)
+            for line in b''.join(response.streaming_content).splitlines()
+        ]
+
+    def test_notes_go_to_author_shard_with_global_slugs(self):
+        """Заметки пишутся в шард автора, а адреса уникальны везде."""
+        AuthorShard.objects.create(author=self.author, alias=self.SHARD)
+        self.add(self.client, 'common')
+        note = Note.objects.using(self.SHARD).get()
+        self.assertFalse(Note.objects.using('default').exists())
+        response = self.client.get(reverse('notes:list'))
+        self.assertEqual(list(response.context['object_list']), [note])
+        reader = User.objects.create(username='Читатель')
+        reader_client = self.client_class()
+        reader_client.force_login(reader)
+        response = self.add(reader_client, 'common')
+        self.assertFormError(response, 'form', 'slug', 'common' + WARNING)
+        self.assertEqual(
+            list(NoteSlug.objects.values_list('pk', 'slug')),
+            [(note.pk, 'common')],
+        )
+
+    def test_rebalance_moves_author_keeping_ids(self):
+        """Перенос сохраняет id, а клиент синхронизации ничего не теряет."""
+        for slug in ('first', 'second'):
+            self.add(self.client, slug)
+        ids = list(Note.objects.values_list('pk', flat=True))
+        self.client.post(reverse('notes:delete', args=('second',)))
+        self.assertFalse(NoteSlug.objects.filter(slug='second').exists())
+        with self.settings(NOTES_SYNC_LAG=0):
+            cursor = self.sync()[-1]['cursor']
+        call_command(
+            'rebalance_notes', self.author.username, to=self.SHARD, grace=0,
+            stdout=StringIO(),
+        )
+        self.assertFalse(Note.objects.using('default').exists())
+        self.assertEqual(
+            list(Note.objects.using(self.SHARD).values_list('pk', flat=True)),
+            ids[:1],
+        )
+        # Запись об удалении переехала с id после курсора клиента.
+        with self.settings(NOTES_SYNC_LAG=0):
+            self.assertIn({'delete': ids[1]}, self.sync(cursor))
+        response = self.client.post(
+            reverse('notes:edit', args=('first',)),
+            {'title': 'Правка', 'text': 'Текст', 'slug': 'first'},
+        )
+        self.assertRedirects(response, reverse('notes:success'))
+        self.assertEqual(
+            Note.objects.using(self.SHARD).get().title, 'Правка'
+        )
+
+    def test_writes_are_refused_while_author_moves(self):
+        """Пока автор переносится, запись отклоняется, а чтение работает."""
+        AuthorShard.objects.create(author=self.author, alias='default',
+                                   moving=True)
+        response = self.add(self.client, 'slug')
+        self.assertEqual(response.status_code, HTTPStatus.SERVICE_UNAVAILABLE)
+        self.assertIn('Retry-After', response)
+        response = self.client.get(reverse('notes:list'))
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertFalse(NoteSlug.objects.exists())
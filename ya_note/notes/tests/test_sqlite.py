@@ -0,0 +1,39 @@
+import os
+import tempfile
+
+from django.db import connections
+from django.test import SimpleTestCase, override_settings
+
+
+class TestSqliteProfile(SimpleTestCase):
+    ALIAS = 'profiled'
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        connections.settings[self.ALIAS] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.path.join(directory.name, 'profiled.sqlite3'),
+        }
+        self.addCleanup(self.remove_database)
+
+    def remove_database(self):
+        connections[self.ALIAS].close()
+        del connections[self.ALIAS]
+        del connections.settings[self.ALIAS]
+
+    def test_profile_applies_to_new_connections(self):
+        """Новое соединение с файлом базы получает PRAGMA своего профиля."""
+        for profile, journal_mode, mmap_size in (
+            ('default', 'delete', 0),
+            ('production', 'wal', 256 * 1024 * 1024),
+        ):
+            with self.subTest(profile=profile), override_settings(
+                SQLITE_PROFILE=profile
+            ):
+                connections[self.ALIAS].close()
+                with connections[self.ALIAS].cursor() as cursor:
+                    cursor.execute('PRAGMA journal_mode')
+                    self.assertEqual(cursor.fetchone()[0], journal_mode)
+                    cursor.execute('PRAGMA mmap_size')
+                    self.assertEqual(cursor.fetchone()[0], mmap_size)
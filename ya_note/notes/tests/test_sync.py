@@ -0,0 +1,68 @@
+import json
+
+from django.test import override_settings
+from django.urls import reverse
+
+from notes.models import Note
+from .base_test import BaseTestContent
+
+
+@override_settings(NOTES_SYNC_LAG=0)
+class TestNoteSync(BaseTestContent):
+
+    def sync(self, **params):
+        response = self.author_client.get(reverse('notes:sync'), params)
+        self.assertEqual(response.status_code, 200)
+        return [
+            json.loads(line)
+            for line in b''.join(response.streaming_content).splitlines()
+        ]
+
+    def test_sync_returns_only_changes_after_cursor(self):
+        """Синхронизация отдаёт только изменения после курсора."""
+        other = Note.objects.create(
+            title='Другая', text='Текст', slug='other', author=self.author
+        )
+        Note.objects.create(
+            title='Чужая', text='Текст', slug='alien', author=self.reader
+        )
+        lines = self.sync()
+        self.assertEqual(
+            [line['put']['id'] for line in lines[:-1]],
+            [self.note.pk, other.pk],
+        )
+        cursor = lines[-1]['cursor']
+        self.assertEqual(self.sync(cursor=cursor)[:-1], [])
+
+        other.title = 'Изменённая'
+        other.save()
+        self.author_client.post(
+            reverse('notes:delete', args=(self.note.slug,))
+        )
+        lines = self.sync(cursor=cursor)
+        self.assertEqual(lines[0]['put']['title'], 'Изменённая')
+        self.assertEqual(lines[1], {'delete': self.note.pk})
+        self.assertFalse(lines[-1]['more'])
+
+    def test_sync_pages_with_limit(self):
+        """С limit изменения приходят частями без пропусков."""
+        Note.objects.bulk_create(
+            Note(title=f'Заметка {index}', text='Текст',
+                 slug=f'note-{index}', author=self.author)
+            for index in range(5)
+        )
+        ids, cursor, more = [], '', True
+        while more:
+            lines = self.sync(cursor=cursor, limit=2)
+            ids += [line['put']['id'] for line in lines[:-1]]
+            cursor, more = lines[-1]['cursor'], lines[-1]['more']
+        self.assertEqual(
+            sorted(ids),
+            list(Note.objects.order_by('pk').values_list('pk', flat=True)),
+        )
+
+    def test_sync_rejects_bad_cursor(self):
+        response = self.author_client.get(
+            reverse('notes:sync'), {'cursor': 'плохой'}
+        )
+        self.assertEqual(response.status_code, 400)
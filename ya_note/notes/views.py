@@ -1,9 +1,40 @@
+from hashlib import md5
+
+from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.db import connections, transaction
+from django.db.models import Case, Q, When
+from django.http import (
+    HttpResponseBadRequest, HttpResponseRedirect, JsonResponse,
+    StreamingHttpResponse
+)
 from django.urls import reverse_lazy
+from django.utils.decorators import method_decorator
+from django.utils.http import quote_etag
 from django.views import generic
+from django.views.decorators.http import condition
+from django.views.decorators.vary import vary_on_cookie
 
 from .forms import NoteForm
-from .models import Note
+from .models import Note, NoteTombstone
+from . import export, importing, search, sync
+from .sharding import shard_for
+
+
+def note_etag(request, slug):
+    """
+    Тег ETag заметки; страница у каждого пользователя своя.
+
+    Last-Modified не отдаётся: по одному времени изменения нельзя
+    отличить ответы разным пользователям.
+    """
+    modified = Note.objects.for_author(request.user).filter(
+        slug=slug
+    ).values_list('modified', flat=True).first()
+    if modified is None:
+        return None
+    parts = (slug, modified.timestamp(), request.user.pk)
+    return quote_etag(md5(repr(parts).encode()).hexdigest())
 
 
 class Home(generic.TemplateView):
@@ -23,7 +54,7 @@ class NoteBase(LoginRequiredMixin):
 
     def get_queryset(self):
         """Пользователь может работать только со своими заметками."""
-        return self.model.objects.filter(author=self.request.user)
+        return self.model.objects.for_author(self.request.user)
 
 
 class NoteCreate(NoteBase, generic.CreateView):
@@ -48,12 +79,130 @@ class NoteDelete(NoteBase, generic.DeleteView):
     """Удаление заметки."""
     template_name = 'notes/delete.html'
 
+    def delete(self, request, *args, **kwargs):
+        """Удаляет заметку и оставляет запись об удалении для клиентов."""
+        self.object = self.get_object()
+        using = self.object._state.db
+        with transaction.atomic(using=using):
+            NoteTombstone.objects.using(using).create(
+                note_id=self.object.pk, author_id=self.object.author_id
+            )
+            self.object.delete()
+        return HttpResponseRedirect(self.get_success_url())
+
 
 class NotesList(NoteBase, generic.ListView):
     """Список всех заметок пользователя."""
     template_name = 'notes/list.html'
 
+    def get_queryset(self):
+        """Загружаем только поля, которые выводит шаблон списка."""
+        return super().get_queryset().only(
+            'id', 'slug', 'title'
+        ).order_by('id')
+
+    def get_paginate_by(self, queryset):
+        return settings.NOTES_COUNT_ON_PAGE
+
 
+@method_decorator(vary_on_cookie, name='get')
+@method_decorator(
+    condition(etag_func=note_etag),
+    name='get'
+)
 class NoteDetail(NoteBase, generic.DetailView):
     """Заметка подробно."""
     template_name = 'notes/detail.html'
+
+
+class NoteSearch(NoteBase, generic.ListView):
+    """Поиск по заметкам пользователя."""
+    template_name = 'notes/search.html'
+
+    def get_queryset(self):
+        """Заметки пользователя, упорядоченные по релевантности."""
+        queryset = super().get_queryset().only('id', 'slug', 'title')
+        text = self.request.GET.get('q', '').strip()
+        if not text:
+            return queryset.none()
+        limit = settings.NOTES_SEARCH_LIMIT
+        if not search.is_supported():
+            return queryset.filter(
+                Q(title__icontains=text) | Q(text__icontains=text)
+            )[:limit]
+        ids = search.search_ids(
+            self.request.user, text, limit,
+            db=connections[shard_for(self.request.user)],
+        )
+        return queryset.filter(pk__in=ids).order_by(
+            Case(*(When(pk=pk, then=rank) for rank, pk in enumerate(ids)))
+        )
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['query'] = self.request.GET.get('q', '')
+        return context
+
+
+class NoteSync(LoginRequiredMixin, generic.View):
+    """Изменения заметок пользователя после курсора в формате NDJSON."""
+
+    def get(self, request, *args, **kwargs):
+        try:
+            cursor = sync.decode_cursor(request.GET.get('cursor'))
+            limit = int(request.GET.get('limit', settings.NOTES_SYNC_LIMIT))
+        except ValueError:
+            return HttpResponseBadRequest('Неверный курсор или limit.')
+        limit = min(max(limit, 1), settings.NOTES_SYNC_LIMIT)
+        return StreamingHttpResponse(
+            sync.changes(request.user, cursor, limit),
+            content_type='application/x-ndjson; charset=utf-8',
+        )
+
+
+class NoteExport(LoginRequiredMixin, generic.View):
+    """Выгрузка всех заметок пользователя в JSON Lines или zip."""
+
+    def get(self, request, *args, **kwargs):
+        try:
+            chunks, content_type, filename = export.FORMATS[
+                request.GET.get('format', 'jsonl')
+            ]
+        except KeyError:
+            return HttpResponseBadRequest('Неизвестный формат выгрузки.')
+        response = StreamingHttpResponse(
+            chunks(request.user), content_type=content_type
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="{filename}"'
+        )
+        return response
+
+
+class NoteImport(LoginRequiredMixin, generic.View):
+    """
+    Массовое создание заметок из тела запроса в формате JSON Lines.
+
+    Тело читается построчно, поэтому размер импорта не ограничен
+    DATA_UPLOAD_MAX_MEMORY_SIZE и не держится в памяти целиком. Если
+    импорт прерван, ответ перечисляет уже созданные заметки и номер
+    строки, на которой он остановился.
+    """
+
+    def post(self, request, *args, **kwargs):
+        try:
+            created, errors = importing.import_notes(
+                request.user, importing.read_jsonl(request)
+            )
+        except importing.ImportStopped as stop:
+            # Записанные пачки остаются: клиент продолжит с нужной строки.
+            return JsonResponse({
+                'created': stop.created,
+                'errors': stop.errors,
+                'failed_line': stop.line,
+                'error': str(stop),
+            }, status=409 if isinstance(stop, importing.SlugConflict) else 400)
+        return JsonResponse(
+            {'created': created, 'errors': errors},
+            status=201 if created else 400,
+        )
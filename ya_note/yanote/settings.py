@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 from django.urls import reverse_lazy
@@ -22,11 +23,15 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'notes.middleware.QueryInspectorMiddleware',
+    'notes.replicas.ReplicaMiddleware',
+    'notes.sharding.ShardMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'notes.profiling.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -56,9 +61,48 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
     }
 }
 
+# Профиль соединений SQLite, см. notes.sqlite.
+SQLITE_PROFILES = {
+    # Настройки SQLite по умолчанию. Режим журнала указан явно: WAL
+    # сохраняется в файле базы и пережил бы смену профиля.
+    'default': {'journal_mode': 'delete'},
+    'production': {
+        'journal_mode': 'wal',
+        'synchronous': 'normal',
+        'busy_timeout': 5000,
+        'mmap_size': 256 * 1024 * 1024,
+        'cache_size': -16 * 1024,
+        'temp_store': 'memory',
+    },
+}
+SQLITE_PROFILE = os.environ.get('SQLITE_PROFILE', 'production')
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Сессии и пользователи, см. notes.auth: кеш в памяти у каждого
+    # процесса свой, и выход в одном процессе не был бы виден другим.
+    'auth': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'auth_cache',
+        'OPTIONS': {'MAX_ENTRIES': 100_000},
+    },
+}
+
+# Кеш сессий и пользователей, см. notes.auth.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+SESSION_CACHE_ALIAS = 'auth'
+AUTHENTICATION_BACKENDS = [
+    'notes.auth.CachedModelBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+AUTH_USER_CACHE_TIMEOUT = 300
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -87,3 +131,72 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('notes:home')
+
+NOTES_COUNT_ON_PAGE = 100
+
+NOTES_SEARCH_LIMIT = 50
+
+# Синхронизация с клиентами, см. notes.sync.
+NOTES_SYNC_LIMIT = 10_000
+NOTES_SYNC_LAG = 2
+
+# Учёт SQL-запросов, см. notes.middleware.
+QUERY_INSPECTOR_ENABLED = False
+QUERY_REPEAT_THRESHOLD = 3
+QUERY_BUDGETS = {
+    'notes:home': 2,
+    'notes:list': 4,
+    'notes:detail': 4,
+    'notes:add': 2,
+    'notes:edit': 3,
+    'notes:delete': 3,
+    'notes:success': 2,
+    'notes:search': 4,
+    'notes:sync': 2,
+    'notes:export': 2,
+}
+
+# Выборочное профилирование запросов, см. notes.profiling.
+PROFILING_SAMPLE_RATE = float(os.environ.get('PROFILING_SAMPLE_RATE', 0))
+PROFILING_VIEWS = set(filter(None, os.environ.get(
+    'PROFILING_VIEWS', ''
+).split(',')))
+PROFILING_HEADER = 'X-Profile'
+PROFILING_DIR = BASE_DIR / 'profiles'
+PROFILING_KEEP = 100
+
+# Чтение страниц с реплик, см. notes.replicas.
+DATABASE_REPLICAS = [
+    f'replica{number}'
+    for number in range(1, int(os.environ.get('DB_REPLICAS', 0)) + 1)
+]
+DATABASES.update({
+    alias: {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / f'db.{alias}.sqlite3',
+        'CONN_MAX_AGE': DATABASES['default']['CONN_MAX_AGE'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    for alias in DATABASE_REPLICAS
+})
+DATABASE_ROUTERS = [
+    'notes.sharding.ShardRouter', 'notes.replicas.ReplicaRouter'
+]
+REPLICA_VIEWS = {'notes:list', 'notes:detail'}
+REPLICA_PIN_SECONDS = 5
+REPLICA_PIN_COOKIE = 'read_primary_until'
+
+# Разделение заметок по авторам, см. notes.sharding.
+NOTES_SHARDS = [
+    f'shard{number}'
+    for number in range(1, int(os.environ.get('NOTES_SHARDS', 0)) + 1)
+]
+DATABASES.update({
+    alias: {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / f'db.{alias}.sqlite3',
+        'CONN_MAX_AGE': DATABASES['default']['CONN_MAX_AGE'],
+    }
+    for alias in NOTES_SHARDS
+})
+NOTES_SHARD_MOVE_GRACE = 2